@@ -0,0 +1,117 @@
+"""# ACTUATION
+
+This script contain the actuation stage of the EnergyPlus Runner. The actions of the agents are
+transformed into actuator values and written with `api.exchange.set_actuator_value`.
+
+With a discrete action space, the `action_transformer` is called once per agent and action when the
+runner is created, and the values are saved in a table for each agent, so the timesteps only index the
+tables. EnergyPlus keeps the value of an actuator until it is changed, so the value written in each
+handle is saved and the writes of the same value are skipped. The counts of the writes are in
+`runner.actuation.counts`, and in the timing metrics of the environment with `callback_timing`.
+
+To write all the actuators in each timestep, add the following to the env_config:
+
+    env_config = {
+        ...
+        'actuator_deduplication': False, # default is True
+    }
+"""
+from gymnasium.spaces import Discrete
+from typing import Any, Callable, Dict, List, Optional
+
+def compile_action_tables(
+    action_transformer: Optional[Callable[[str, Any], Any]],
+    agent_ids: List[str],
+    action_space: Any
+    ) -> Optional[Dict[str, List[float]]]:
+    """Actuator value of each action of each agent.
+
+    Args:
+        action_transformer (Optional[Callable[[str, Any], Any]]): Function (agent_id, action) -> value, or
+        None to write the actions without transformation.
+        agent_ids (List[str]): Agents.
+        action_space (Any): Action space of the agents.
+
+    Returns:
+        Optional[Dict[str, List[float]]]: Table of each agent indexed by `action - action_space.start`, or
+        None if the action space is not discrete.
+    """
+    if not isinstance(action_space, Discrete):
+        return None
+    actions = range(int(action_space.start), int(action_space.start + action_space.n))
+    if action_transformer is None:
+        return {agent: [float(action) for action in actions] for agent in agent_ids}
+    return {agent: [float(action_transformer(agent, action)) for action in actions] for agent in agent_ids}
+
+class ActuationStage:
+    def __init__(self, env_config: Dict[str, Any]) -> None:
+        """Transformation of the actions and writing of the actuators of a runner.
+
+        Args:
+            env_config (Dict[str, Any]): Environment configuration with `ep_actuators`, `action_space` and the
+            optional `action_transformer` and `actuator_deduplication`.
+        """
+        self.agent_ids: List[str] = list(env_config['ep_actuators'].keys())
+        self.action_transformer = env_config.get('action_transformer', False) or None
+        action_space = env_config.get('action_space', None)
+        self.tables = compile_action_tables(self.action_transformer, self.agent_ids, action_space)
+        self.start = int(action_space.start) if self.tables is not None else 0
+        self.deduplicate = env_config.get('actuator_deduplication', True)
+        # (agent, handle, table) of each actuator, bound in `bind`.
+        self.actuators: List[tuple] = []
+        # Last value written in each actuator, NaN before the first write.
+        self.last_values: List[float] = [float('nan')] * len(self.agent_ids)
+        self.counts: Dict[str, int] = {'writes': 0, 'skipped': 0}
+        self.set_actuator_value: Optional[Callable] = None
+
+    def bind(self, exchange: Any, actuator_handles: Dict[str, int]) -> None:
+        """Bind the actuators to their handles. It is called when the handles are initialized.
+
+        Args:
+            exchange (Any): `api.exchange` of the runner.
+            actuator_handles (Dict[str, int]): Handle of the actuator of each agent.
+        """
+        self.set_actuator_value = exchange.set_actuator_value
+        self.actuators = [
+            (agent, actuator_handles[agent], None if self.tables is None else self.tables[agent])
+            for agent in self.agent_ids
+        ]
+        self.last_values = [float('nan')] * len(self.agent_ids)
+
+    def value(self, agent: str, action: Any) -> Any:
+        """Actuator value of the action of an agent."""
+        if self.tables is not None:
+            return self.tables[agent][int(action) - self.start]
+        if self.action_transformer is not None:
+            return self.action_transformer(agent, action)
+        return action
+
+    def write(self, state_argument: Any, dict_action: Dict[str, Any]) -> int:
+        """Write the actuator values of the actions that changed.
+
+        Args:
+            state_argument (c_void_p): EnergyPlus state pointer.
+            dict_action (Dict[str, Any]): Action of each agent, before the transformation.
+
+        Returns:
+            int: Number of `set_actuator_value` calls.
+        """
+        set_actuator_value = self.set_actuator_value
+        last_values = self.last_values
+        deduplicate = self.deduplicate
+        start = self.start
+        writes = 0
+        # The actions are converted with int() because the shared memory exchange sends them as floats.
+        for row, (agent, handle, table) in enumerate(self.actuators):
+            if table is not None:
+                value = table[int(dict_action[agent]) - start]
+            else:
+                value = self.value(agent, dict_action[agent])
+            if deduplicate and last_values[row] == value:
+                continue
+            set_actuator_value(state=state_argument, actuator_handle=handle, actuator_value=value)
+            last_values[row] = value
+            writes += 1
+        self.counts['writes'] += writes
+        self.counts['skipped'] += len(self.actuators) - writes
+        return writes
@@ -0,0 +1,350 @@
+"""# SIMULATOR BACKENDS
+
+This script contain the simulator backends used by the EnergyPlus Runner. A backend is an object with
+the `exchange`, `runtime` and `state_manager` members of the EnergyPlus Python API (`EnergyPlusAPI`).
+It is selected with the env_config:
+
+    env_config = {
+        ...
+        # 'energyplus' (default), 'mock' or an object with the interface of EnergyPlusAPI.
+        'simulator_backend': 'mock',
+        # Options of the mock backend (see `MockEnergyPlusAPI`).
+        'mock_backend_config': {'days': 7, 'traces_csv': 'path/to/eplusout.csv'},
+    }
+
+The EnergyPlus library is loaded the first time that it is used, so the environment can be imported
+and profiled with the mock backend in a machine without EnergyPlus.
+
+The mock backend is deterministic: it replays recorded traces of the variables and meters (e.g. the
+csv output of a previous EnergyPlus simulation) or synthetic daily profiles, and it calls the same
+callbacks of the runner, with a warmup period, in each timestep. The steps per second of the environment
+with the mock backend are measured in `tests/benchmarks`.
+"""
+import re
+import sys
+import csv
+import math
+import zlib
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional
+
+# Installation folder of EnergyPlus 23.2.0 in each platform.
+ENERGYPLUS_PATH = '/usr/local/EnergyPlus-23-2-0' if sys.platform == 'linux' else 'C:/EnergyPlusV23-2-0'
+
+_energyplus_api = None
+
+def energyplus_api(path: Optional[str] = None):
+    """The EnergyPlus Python API. The library is loaded once per process.
+
+    Args:
+        path (Optional[str]): Installation folder of EnergyPlus. Default is ENERGYPLUS_PATH.
+
+    Returns:
+        EnergyPlusAPI: The API object.
+    """
+    global _energyplus_api
+    if _energyplus_api is None:
+        sys.path.insert(0, path or ENERGYPLUS_PATH)
+        from pyenergyplus.api import EnergyPlusAPI
+        _energyplus_api = EnergyPlusAPI()
+    return _energyplus_api
+
+def simulator_api(env_config: Dict[str, Any]):
+    """The backend selected with `env_config['simulator_backend']`.
+
+    Args:
+        env_config (Dict[str, Any]): Environment configuration.
+
+    Returns:
+        Any: An object with the interface of EnergyPlusAPI.
+    """
+    backend = env_config.get('simulator_backend', 'energyplus')
+    if backend == 'energyplus':
+        return energyplus_api(env_config.get('energyplus_path', None))
+    if backend == 'mock':
+        return MockEnergyPlusAPI(**env_config.get('mock_backend_config', {}))
+    if isinstance(backend, str):
+        raise ValueError(f'Unknown simulator_backend: {backend}')
+    return backend
+
+def load_csv_traces(path: str) -> Dict[str, List[float]]:
+    """Read the timestep columns of an EnergyPlus csv output to be replayed by the mock backend.
+
+    The columns are identified by the name without the units and the frequency, in lower case. For
+    example 'THERMAL ZONE: LIVING:Zone Mean Air Temperature [C](TimeStep)' is
+    'thermal zone: living:zone mean air temperature' and the meter 'Electricity:Facility [J](TimeStep)'
+    is 'electricity:facility'.
+
+    Args:
+        path (str): Path to the csv file (eplusout.csv).
+
+    Returns:
+        Dict[str, List[float]]: Values of each column.
+    """
+    with open(path, newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        columns = {}
+        for n, column in enumerate(header):
+            match = re.match(r'\s*(.*?)\s*\[.*\]\s*\((.*)\)', column)
+            if match is not None and match.group(2) in ('TimeStep', 'Each Call'):
+                columns[n] = match.group(1).lower()
+        traces: Dict[str, List[float]] = {name: [] for name in columns.values()}
+        for row in reader:
+            for n, name in columns.items():
+                traces[name].append(float(row[n]))
+    return traces
+
+# Synthetic daily profiles (mean, amplitude) of the weather variables of the mock backend.
+MOCK_WEATHER = {
+    'albedo': (0.2, 0.),
+    'beam_solar': (300., 400.),
+    'diffuse_solar': (100., 100.),
+    'horizontal_ir': (300., 50.),
+    'is_raining': (0., 0.),
+    'is_snowing': (0., 0.),
+    'liquid_precipitation': (0., 0.),
+    'outdoor_barometric_pressure': (90000., 300.),
+    'outdoor_dew_point': (8., 3.),
+    'outdoor_dry_bulb': (20., 8.),
+    'outdoor_relative_humidity': (50., 20.),
+    'sky_temperature': (5., 5.),
+    'wind_direction': (180., 90.),
+    'wind_speed': (3., 2.),
+}
+_DAYS_BEFORE_MONTH = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334, 365]
+
+def _synthetic_trace(name: str, length: int, steps_per_day: int, mean: float = 0., amplitude: float = 1.) -> List[float]:
+    """Daily sinusoidal profile with a phase that depends on the name, so it is deterministic."""
+    phase = 2*math.pi * (zlib.crc32(name.encode()) % 1000) / 1000
+    t = np.arange(length)
+    return (mean + amplitude*np.sin(2*math.pi*t/steps_per_day + phase)).tolist()
+
+class _MockState:
+    """State of a mock simulation."""
+    def __init__(self) -> None:
+        self.begin_callbacks: List[Callable] = []
+        self.end_callbacks: List[Callable] = []
+        self.actuators: Dict[int, float] = {}
+        self.t = 0
+        self.warmup = True
+        self.ready = False
+        self.stop = False
+
+class _MockStateManager:
+    def new_state(self) -> _MockState:
+        return _MockState()
+
+    def reset_state(self, state: _MockState) -> None:
+        state.__init__()
+
+    def delete_state(self, state: _MockState) -> None:
+        pass
+
+class _MockRuntime:
+    def __init__(self, backend: 'MockEnergyPlusAPI') -> None:
+        self.backend = backend
+
+    def callback_begin_zone_timestep_after_init_heat_balance(self, state: _MockState, function: Callable) -> None:
+        state.begin_callbacks.append(function)
+
+    def callback_end_zone_timestep_after_zone_reporting(self, state: _MockState, function: Callable) -> None:
+        state.end_callbacks.append(function)
+
+    def set_console_output_status(self, state: _MockState, print_output: bool) -> None:
+        pass
+
+    def clear_callbacks(self) -> None:
+        pass
+
+    def stop_simulation(self, state: _MockState) -> None:
+        state.stop = True
+
+    def run_energyplus(self, state: _MockState, command_line_args: List[str]) -> int:
+        """Call the callbacks of each timestep. The first day is repeated during the warmup period."""
+        state.ready = True
+        backend = self.backend
+        for warmup_step in range(backend.warmup_days * backend.steps_per_day):
+            if state.stop:
+                return 0
+            state.t = warmup_step % backend.steps_per_day
+            for function in state.begin_callbacks:
+                function(state)
+            for function in state.end_callbacks:
+                function(state)
+        state.warmup = False
+        for t in range(backend.steps):
+            if state.stop:
+                return 0
+            state.t = t
+            for function in state.begin_callbacks:
+                function(state)
+            for function in state.end_callbacks:
+                function(state)
+        return 0
+
+class _MockExchange:
+    def __init__(self, backend: 'MockEnergyPlusAPI') -> None:
+        self.backend = backend
+        self.tph = backend.timesteps_per_hour
+
+    # Handles and values.
+    def api_data_fully_ready(self, state: _MockState) -> bool:
+        return state.ready
+
+    def warmup_flag(self, state: _MockState) -> bool:
+        return state.warmup
+
+    def list_available_api_data_csv(self, state: _MockState) -> bytes:
+        return b''
+
+    def request_variable(self, state: _MockState, variable_name: str, variable_key: str) -> None:
+        pass
+
+    def get_variable_handle(self, state: _MockState, variable_name: str, variable_key: str) -> int:
+        return self.backend.handle(f'{variable_key}:{variable_name}')
+
+    def get_meter_handle(self, state: _MockState, meter_name: str) -> int:
+        return self.backend.handle(meter_name)
+
+    def get_actuator_handle(self, state: _MockState, component_type: str, control_type: str, actuator_key: str) -> int:
+        return self.backend.handle(f'{component_type}:{control_type}:{actuator_key}')
+
+    def get_variable_value(self, state: _MockState, variable_handle: int) -> float:
+        trace = self.backend.traces[variable_handle]
+        return trace[state.t % len(trace)]
+
+    get_meter_value = get_variable_value
+
+    def get_actuator_value(self, state: _MockState, actuator_handle: int) -> float:
+        return state.actuators.get(actuator_handle, 0.)
+
+    def set_actuator_value(self, state: _MockState, actuator_handle: int, actuator_value: float) -> None:
+        state.actuators[actuator_handle] = actuator_value
+
+    # Time.
+    def _day(self, state: _MockState) -> int:
+        return (self.backend.start_day - 1 + state.t // self.backend.steps_per_day) % 365 + 1
+
+    def hour(self, state: _MockState) -> int:
+        return (state.t // self.tph) % 24
+
+    def zone_time_step_number(self, state: _MockState) -> int:
+        return state.t % self.tph + 1
+
+    def minutes(self, state: _MockState) -> int:
+        return (state.t % self.tph + 1) * 60 // self.tph
+
+    def current_time(self, state: _MockState) -> float:
+        return self.hour(state) + (state.t % self.tph + 1) / self.tph
+
+    actual_time = current_time
+
+    def day_of_year(self, state: _MockState) -> int:
+        return self._day(state)
+
+    def month(self, state: _MockState) -> int:
+        day = self._day(state)
+        return next(month for month in range(1, 13) if day <= _DAYS_BEFORE_MONTH[month])
+
+    def day_of_month(self, state: _MockState) -> int:
+        return self._day(state) - _DAYS_BEFORE_MONTH[self.month(state) - 1]
+
+    def day_of_week(self, state: _MockState) -> int:
+        return (self._day(state) - 1) % 7 + 1
+
+    def holiday_index(self, state: _MockState) -> int:
+        return 0
+
+    def year(self, state: _MockState) -> int:
+        return 2017
+
+    def actual_date_time(self, state: _MockState) -> float:
+        return self.year(state) + self.month(state) + self.day_of_month(state) + self.current_time(state)
+
+    def num_time_steps_in_hour(self, state: _MockState) -> int:
+        return self.tph
+
+    def zone_time_step(self, state: _MockState) -> float:
+        return 1 / self.tph
+
+    system_time_step = zone_time_step
+
+    # Weather.
+    def is_raining(self, state: _MockState) -> bool:
+        return False
+
+    def sun_is_up(self, state: _MockState) -> bool:
+        return 6 <= self.hour(state) < 19
+
+    def _weather(self, variable: str, state: _MockState, day_offset: int, hour: int, time_step_number: int) -> float:
+        trace = self.backend.weather[variable]
+        day = state.t // self.backend.steps_per_day + day_offset
+        return trace[(day*self.backend.steps_per_day + hour*self.tph + max(time_step_number - 1, 0)) % len(trace)]
+
+    def __getattr__(self, name: str):
+        # today_weather_{variable}_at_time and tomorrow_weather_{variable}_at_time methods.
+        match = re.fullmatch(r'(today|tomorrow)_weather_(.*)_at_time', name)
+        if match is None or match.group(2) not in MOCK_WEATHER:
+            raise AttributeError(name)
+        day_offset = 0 if match.group(1) == 'today' else 1
+        variable = match.group(2)
+        def weather_at_time(state: _MockState, hour: int, time_step_number: int) -> float:
+            return self._weather(variable, state, day_offset, hour, time_step_number)
+        setattr(self, name, weather_at_time)
+        return weather_at_time
+
+class MockEnergyPlusAPI:
+    def __init__(
+        self,
+        days: int = 7,
+        warmup_days: int = 1,
+        timesteps_per_hour: int = 6,
+        start_day: int = 1,
+        traces: Optional[Dict[str, List[float]]] = None,
+        traces_csv: Optional[str] = None
+        ) -> None:
+        """Deterministic backend with the interface of EnergyPlusAPI.
+
+        Args:
+            days (int): Days of the run period. Default is 7.
+            warmup_days (int): Days of the warmup period. Default is 1.
+            timesteps_per_hour (int): Timesteps per hour. Default is 6.
+            start_day (int): Day of the year of the first day. Default is 1.
+            traces (Optional[Dict[str, List[float]]]): Values of each timestep to replay, with the names in
+            lower case like in `load_csv_traces` ('key:variable name' for the variables and 'meter name' for
+            the meters). The missing variables use a synthetic daily profile. Default is None.
+            traces_csv (Optional[str]): EnergyPlus csv output with the traces to replay. Default is None.
+        """
+        self.days = days
+        self.warmup_days = warmup_days
+        self.timesteps_per_hour = timesteps_per_hour
+        self.start_day = start_day
+        self.steps_per_day = 24 * timesteps_per_hour
+        self.steps = days * self.steps_per_day
+        self.recorded: Dict[str, List[float]] = {}
+        if traces_csv is not None:
+            self.recorded.update(load_csv_traces(traces_csv))
+        if traces is not None:
+            self.recorded.update({name.lower(): list(values) for name, values in traces.items()})
+        # Trace of each handle.
+        self.names: Dict[str, int] = {}
+        self.traces: List[List[float]] = []
+        self.weather = {
+            variable: _synthetic_trace(variable, (days + 1) * self.steps_per_day, self.steps_per_day, *profile)
+            for variable, profile in MOCK_WEATHER.items()
+        }
+        self.state_manager = _MockStateManager()
+        self.runtime = _MockRuntime(self)
+        self.exchange = _MockExchange(self)
+
+    def handle(self, name: str) -> int:
+        """Handle of a variable, meter or actuator. The same name always has the same handle."""
+        name = name.lower()
+        if name not in self.names:
+            self.names[name] = len(self.traces)
+            trace = self.recorded.get(name)
+            if trace is None:
+                trace = _synthetic_trace(name, self.steps_per_day, self.steps_per_day)
+            self.traces.append(trace)
+        return self.names[name]
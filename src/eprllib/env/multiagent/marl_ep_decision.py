@@ -0,0 +1,120 @@
+"""# DECISION INTERVAL
+
+This script contain the decision interval mode of the environment. With `decision_interval` the agents
+take an action each k timesteps instead of each timestep. In the skipped timesteps the runner applies
+the last action again without waking the environment, so the handshakes and the policy inferences are
+divided by k. The observation of a decision aggregates the timesteps since the last one: the meters
+(energy) are summed, the variables and actuators are averaged and the other elements (time, weather
+and prediction) take the last value (see `tools.aggregation`).
+
+To use it, add the following to the env_config:
+
+    env_config = {
+        ...
+        'decision_interval': 6, # global, or per agent: {'opening_window_1': 6, 'opening_window_2': 3}
+        'decision_interval_aggregation': {'Ti': 'last'}, # optional, 'sum', 'mean' or 'last' by element
+    }
+
+With intervals per agent, the observation dict of a step contains only the agents that decide in it and
+the other agents keep their last action. The decisions restart at each `cut_episode_len` boundary,
+where all the agents decide, so the truncation of the episodes is not changed.
+
+The environment saves the timesteps of each step in `env.elapsed_timesteps`. The compiled reward
+functions of `tools.rewards` use it to weight the aggregated values by the timesteps that they cover
+and to count the `cut_reward_len_timesteps` windows in timesteps, so the rewards of an episode do not
+depend on the decision interval.
+
+For decisions that depend on the values of the simulation instead of a fixed interval, see
+`marl_ep_triggers`.
+"""
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from eprllib.env.multiagent.marl_ep_obs_layout import ObservationLayout
+from eprllib.tools.aggregation import aggregation_methods
+
+# Timesteps per day used by `cut_episode_len` (10 minutes timesteps).
+TIMESTEPS_PER_DAY = 144
+
+class DecisionSchedule:
+    def __init__(self, env_config: Dict[str, Any]) -> None:
+        """Timesteps where each agent takes a decision. The timesteps are counted from the start of the
+        simulation, the first one is 0.
+
+        Args:
+            env_config (Dict[str, Any]): Environment configuration with `decision_interval` and `cut_episode_len`.
+
+        Raises:
+            ValueError: If an interval is not a positive integer.
+        """
+        interval = env_config.get('decision_interval', 1) or 1
+        agent_ids = list(env_config['ep_actuators'].keys())
+        if isinstance(interval, dict):
+            self.intervals = {agent: interval.get(agent, 1) for agent in agent_ids}
+        else:
+            self.intervals = {agent: interval for agent in agent_ids}
+        for agent, k in self.intervals.items():
+            if int(k) != k or k < 1:
+                raise ValueError(f'The decision_interval of {agent} must be a positive integer, not {k}.')
+        self.unique_intervals: List[int] = sorted({int(k) for k in self.intervals.values()})
+        # All the agents decide in every timestep (default).
+        self.every_step = self.unique_intervals == [1]
+        cut_episode_len = env_config.get('cut_episode_len', None)
+        self.episode_len: Optional[int] = None if cut_episode_len is None else cut_episode_len * TIMESTEPS_PER_DAY
+
+    def _position(self, timestep: int) -> int:
+        """Timestep from the start of the (cut) episode."""
+        return timestep if self.episode_len is None else timestep % self.episode_len
+
+    def is_start(self, timestep: int) -> bool:
+        """True if the timestep is the first one of a (cut) episode."""
+        return self._position(timestep) == 0
+
+    def is_decision(self, timestep: int) -> bool:
+        """True if any agent takes a decision at the start of the timestep."""
+        position = self._position(timestep)
+        return any(position % k == 0 for k in self.unique_intervals)
+
+    def due_agents(self, timestep: int) -> List[str]:
+        """Agents that take a decision at the start of the timestep."""
+        position = self._position(timestep)
+        return [agent for agent, k in self.intervals.items() if position % k == 0]
+
+    def next_decision(self, timestep: int) -> int:
+        """First timestep after `timestep` with a decision."""
+        position = self._position(timestep)
+        following = min((position // k + 1) * k for k in self.unique_intervals)
+        if self.episode_len is not None:
+            following = min(following, self.episode_len)
+        return timestep - position + following
+
+class IntervalAggregator:
+    def __init__(self, layout: ObservationLayout, env_config: Dict[str, Any]) -> None:
+        """Aggregation of the slots of the observation layout over the timesteps of a decision interval.
+
+        Args:
+            layout (ObservationLayout): Layout of the runner.
+            env_config (Dict[str, Any]): Environment configuration with the optional `decision_interval_aggregation`.
+
+        Raises:
+            ValueError: If an aggregation is not in `tools.aggregation.AGGREGATIONS`.
+        """
+        aggregation = aggregation_methods(env_config)
+        self.sum_slots = np.array(sorted({layout.index[key] for key, method in aggregation.items() if method == 'sum'}), dtype=np.int64)
+        self.mean_slots = np.array(sorted({layout.index[key] for key, method in aggregation.items() if method == 'mean'}), dtype=np.int64)
+        self.slots = np.concatenate([self.sum_slots, self.mean_slots])
+        self.total = np.zeros(len(self.slots))
+        self.count = 0
+
+    def add(self, values: np.ndarray) -> None:
+        """Add the values of a timestep."""
+        self.total += values[self.slots]
+        self.count += 1
+
+    def write(self, values: np.ndarray) -> None:
+        """Write the aggregated values in the slots and start a new interval."""
+        n_sum = len(self.sum_slots)
+        values[self.sum_slots] = self.total[:n_sum]
+        values[self.mean_slots] = self.total[n_sum:] / self.count
+        self.total[:] = 0.
+        self.count = 0
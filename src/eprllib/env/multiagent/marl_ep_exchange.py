@@ -0,0 +1,117 @@
+"""# STEP EXCHANGE
+
+This script contain the object used to exchange the observations and the actions between the
+EnergyPlus Runner thread and the EnergyPlus Environment. It replaces the three queues and three
+events used before with a single lock and one slot in each direction: the runner puts the (obs,
+infos) pair and waits an action, the environment puts the action and waits the (obs, infos) pair.
+
+Each put wakes only the thread that waits in the other side. A wait with timeout raises `queue.Empty`
+(like the queues did) and a wait in a closed exchange raises `ExchangeClosed`, so the callbacks and
+the environment are released immediately when the simulation ends or the runner is stopped.
+"""
+import threading
+from queue import Empty
+from typing import Any, Dict, Optional, Tuple
+
+class ExchangeClosed(Exception):
+    """The exchange was closed and there are no more values to get."""
+
+class StepExchange:
+    def __init__(self) -> None:
+        """One slot for the (obs, infos) pair and one slot for the action, protected by the same lock.
+        """
+        self._lock = threading.Lock()
+        self._obs_ready = threading.Condition(self._lock)
+        self._action_ready = threading.Condition(self._lock)
+        self._obs: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None
+        self._action: Any = None
+        self._has_obs = False
+        self._has_action = False
+        self.closed = False
+
+    def put_observation(self, obs: Dict[str, Any], infos: Dict[str, Any]) -> None:
+        """Put the observation and infos of the timestep. It is called by the runner.
+
+        The exchange works in lockstep, so the slot is empty in a normal execution. If it is not, the
+        old value is replaced. The value is discarded if the exchange is closed.
+
+        Args:
+            obs (Dict[str, Any]): Observation of each agent.
+            infos (Dict[str, Any]): Infos of each agent.
+        """
+        with self._lock:
+            if self.closed:
+                return
+            self._obs = (obs, infos)
+            self._has_obs = True
+            self._obs_ready.notify()
+
+    def get_observation(self, timeout: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Wait the observation and infos of the timestep. It is called by the environment.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds. Default is None (without limit).
+
+        Raises:
+            Empty: If the timeout is over.
+            ExchangeClosed: If the exchange is closed and there is not an observation pending.
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, Any]]: Observation and infos of each agent.
+        """
+        with self._lock:
+            if not self._obs_ready.wait_for(lambda: self._has_obs or self.closed, timeout):
+                raise Empty
+            if not self._has_obs:
+                raise ExchangeClosed
+            value = self._obs
+            self._obs = None
+            self._has_obs = False
+            return value
+
+    def put_action(self, action: Any) -> None:
+        """Put the action of the timestep. It is called by the environment.
+
+        Args:
+            action (Any): Action of each agent.
+        """
+        with self._lock:
+            if self.closed:
+                return
+            self._action = action
+            self._has_action = True
+            self._action_ready.notify()
+
+    def get_action(self, timeout: Optional[float] = None) -> Any:
+        """Wait the action of the timestep. It is called by the runner.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds. Default is None (without limit).
+
+        Raises:
+            Empty: If the timeout is over.
+            ExchangeClosed: If the exchange is closed.
+
+        Returns:
+            Any: Action of each agent.
+        """
+        with self._lock:
+            if not self._action_ready.wait_for(lambda: self._has_action or self.closed, timeout):
+                raise Empty
+            if self.closed:
+                raise ExchangeClosed
+            value = self._action
+            self._action = None
+            self._has_action = False
+            return value
+
+    def close(self) -> None:
+        """Close the exchange and release the threads that are waiting. The observation pending, if
+        any, can be still taken with `get_observation`.
+        """
+        with self._lock:
+            self.closed = True
+            self._action = None
+            self._has_action = False
+            self._obs_ready.notify_all()
+            self._action_ready.notify_all()
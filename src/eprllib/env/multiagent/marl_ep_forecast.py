@@ -0,0 +1,82 @@
+"""# WEATHER FORECAST
+
+This script contain the 24 hours weather prediction used in the observation of the EnergyPlus
+Runner. The hourly weather of the current and the next day is read once per simulated day and
+each timestep takes the next 24 hours with a noise that grows linearly with the horizon.
+"""
+import numpy as np
+from typing import Optional, Sequence, Union
+from eprllib.env.multiagent.marl_ep_obs_layout import FORECAST_HOURS, FORECAST_VARIABLES
+
+# Standard deviation of the prediction at the end of the horizon, in the order of FORECAST_VARIABLES:
+#   - Liquid Precipitation Depth in mm with desviation of 0.5 mm.
+#   - Barometric pressure in Pa with a standart deviation of 1000 Pa,
+#   - Dry Bulb Temperature in °C with squer desviation of 2.05 °C,
+#   - Relative Humidity in % with squer desviation of 20%,
+#   - Wind Direction in degree with squer desviation of 40°,
+#   - Wind Speed in m/s with squer desviation of 3.41 m/s,
+SIGMA_MAX = np.array([0.707107, 31.62, 1.43178211, 4.47213595, 6.32455532, 1.84661853])
+
+class WeatherForecast:
+    """This object keep the hourly weather of two days and produce the noisy prediction of the next
+    24 hours for each timestep.
+    """
+    def __init__(
+        self,
+        seed: Optional[Union[int, Sequence[int]]] = None
+        ) -> None:
+        """The sigma of each hour goes from zero for the next hour to SIGMA_MAX for the last hour
+        of the horizon, following a linear function. It is computed once here.
+
+        Args:
+            seed (Optional[Union[int, Sequence[int]]]): Seed of the random generator of the noise. Use
+            `[seed, episode]` to have a different and reproducible noise in each episode. Default is None.
+
+        Return:
+            None.
+        """
+        self.sigma = np.outer(np.arange(FORECAST_HOURS) / (FORECAST_HOURS - 1), SIGMA_MAX)
+        # Hourly weather of today (rows 0 to 23) and tomorrow (rows 24 to 47).
+        self.table = np.zeros((2*FORECAST_HOURS, len(FORECAST_VARIABLES)))
+        self.day: Optional[int] = None
+        self.rng = np.random.default_rng(seed)
+        self._noise = np.zeros_like(self.sigma)
+
+    def needs_update(self, day: int) -> bool:
+        """Check if the hourly weather must be read again.
+
+        Args:
+            day (int): Current day of the year of the simulation.
+
+        Returns:
+            bool: True if the table does not correspond with the day.
+        """
+        return self.day != day
+
+    def update(self, day: int, table: np.ndarray) -> None:
+        """Set the hourly weather of the day and the next day.
+
+        Args:
+            day (int): Current day of the year of the simulation.
+            table (np.ndarray): Array of shape (48, 6) with the weather of today and tomorrow for each hour,
+            with the columns in the order of FORECAST_VARIABLES.
+        """
+        self.table[:] = table
+        self.day = day
+
+    def predict(self, hour: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Noisy prediction for the hours `hour+1` to `hour+24`, with a single draw of the noise.
+
+        Args:
+            hour (int): Current hour of the simulation (0-23).
+            out (Optional[np.ndarray]): Array of shape (24, 6) where the prediction is written. Default is None.
+
+        Returns:
+            np.ndarray: Prediction of shape (24, 6).
+        """
+        if out is None:
+            out = np.empty_like(self.sigma)
+        self.rng.standard_normal(out=self._noise)
+        np.multiply(self._noise, self.sigma, out=self._noise)
+        np.add(self.table[hour+1:hour+1+FORECAST_HOURS], self._noise, out=out)
+        return out
@@ -0,0 +1,331 @@
+"""# WARM START FORK
+
+This script contain the execution mode where the EnergyPlus warmup is simulated once per (building,
+weather) pair and each episode is played in a fork of the warmed simulation.
+
+A server process runs EnergyPlus until the first timestep after the warmup period and then waits for
+episode requests. For each request the server forks itself: the child process continues the
+simulation from the warmed state and exchange the observations and actions with the environment through
+a Unix socket. The environment use a `ForkedEpisodeRunner` that has the same interface of the
+`EnergyPlusRunner`.
+
+It works only in platforms with `os.fork` (Linux). Use `fork_supported()` to check it.
+
+Note that the episodes share the output folder of the server (the folder of the episode 0), so the
+output files of EnergyPlus are not meaningful in this mode.
+"""
+import os
+import sys
+import shutil
+import signal
+import socket
+import secrets
+import tempfile
+import threading
+import multiprocessing
+import numpy as np
+from multiprocessing.connection import Client, Connection, answer_challenge, deliver_challenge, wait
+from queue import Empty
+from time import perf_counter
+from typing import Any, Dict, Optional, Tuple
+
+from eprllib.env.multiagent.marl_ep_runner import EnergyPlusRunner
+from eprllib.env.multiagent.marl_ep_forecast import WeatherForecast
+from eprllib.env.multiagent.marl_ep_exchange import ExchangeClosed, StepExchange
+from eprllib.env.multiagent.marl_ep_subprocess import ENV_SIDE_KEYS
+
+# Seconds to wait the connection of a forked episode, and interval to check that its process is alive.
+_ACCEPT_TIMEOUT = 120.
+_POLL_INTERVAL = 1.
+
+def fork_supported() -> bool:
+    """Check if the platform can fork processes and use Unix sockets.
+
+    Returns:
+        bool: True if the warm start fork mode can be used.
+    """
+    return sys.platform.startswith('linux') \
+        and hasattr(os, 'fork') \
+        and 'fork' in multiprocessing.get_all_start_methods()
+
+def simulation_key(env_config: Dict[str, Any]) -> Tuple[str, str, int]:
+    """The (building, weather) pair that identify a warmed simulation. The modification time of the
+    epJSON file is included because the episode configuration functions can rewrite the same file. The
+    files that do not exist (e.g. the placeholder of the mock backend) are identified by the path alone.
+    """
+    epw = env_config["epw"] if env_config['is_test'] else env_config["epw_training"]
+    epjson = env_config['epjson']
+    mtime_ns = os.stat(epjson).st_mtime_ns if os.path.exists(epjson) else 0
+    return epjson, epw, mtime_ns
+
+class _ConnectionExchange:
+    """Exchange interface used by the runner of a forked episode to talk with the environment.
+    """
+    def __init__(self, conn: Connection):
+        self.conn = conn
+
+    def put_observation(self, obs: Dict[str, Any], infos: Dict[str, Any]) -> None:
+        self.conn.send(('obs', (obs, infos)))
+
+    def get_action(self, timeout: Optional[float] = None) -> Any:
+        try:
+            if timeout is not None and not self.conn.poll(timeout):
+                raise Empty
+            return self.conn.recv()
+        except (EOFError, OSError):
+            # The environment is closed, so the episode is ended.
+            os._exit(0)
+
+    def close(self) -> None:
+        pass
+
+def _fork_episodes(
+    runner: EnergyPlusRunner,
+    control: Connection,
+    address: str,
+    authkey: bytes,
+    state_argument
+    ) -> None:
+    """Hook of the server runner in the first timestep after the warmup. It forks the process for each
+    episode request and returns in the child, that continues the simulation.
+    """
+    while True:
+        try:
+            request = control.recv()
+        except EOFError:
+            request = None
+        if request is None:
+            # Shutdown of the server.
+            runner.simulation_complete = True
+            runner.api.runtime.stop_simulation(state_argument)
+            return
+        episode = request
+        pid = os.fork()
+        if pid == 0:
+            # Episode process.
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            control.close()
+            np.random.seed()
+            conn = Client(address, family='AF_UNIX', authkey=authkey)
+            runner.episode = episode
+            runner.env_config['episode'] = episode
+            # The forecast keeps the weather table of the warmed state with a new noise.
+            forecast_seed = runner.env_config.get('forecast_seed', None)
+            warmed_forecast = runner.weather_forecast
+            runner.weather_forecast = WeatherForecast(
+                seed=None if forecast_seed is None else [forecast_seed, episode]
+            )
+            if warmed_forecast.day is not None:
+                runner.weather_forecast.update(warmed_forecast.day, warmed_forecast.table)
+            runner.exchange = _ConnectionExchange(conn)
+            runner.fork_connection = conn
+            return
+        control.send(pid)
+
+def _serve(env_config: Dict[str, Any], address: str, authkey: bytes, control: Connection) -> None:
+    """Main function of the server process.
+    """
+    # The episode processes are reaped automatically.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    server_pid = os.getpid()
+    # The server simulation use the output folder of the episode 0.
+    runner = EnergyPlusRunner(
+        episode=0,
+        env_config=env_config,
+        exchange=StepExchange()
+    )
+    runner.fork_connection = None
+    runner.on_warmup_complete = lambda state_argument: _fork_episodes(runner, control, address, authkey, state_argument)
+    # EnergyPlus runs in the main thread, so the process has a single thread when it is forked.
+    runner.start(threaded=False)
+    if os.getpid() != server_pid:
+        # End of a forked episode.
+        runner.fork_connection.send(('done', runner.sim_results))
+        runner.fork_connection.close()
+        os._exit(0)
+    control.close()
+
+def _process_alive(pid: int) -> bool:
+    """Check if a process exists. The episode processes are not children of the environment process."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class WarmStartServer:
+    def __init__(self, env_config: Dict[str, Any]):
+        """Start the server process that run the warmup of the simulation defined in `env_config`.
+
+        Args:
+            env_config (Dict[str, Any]): Environment configuration. It must be picklable, except the keys in
+            `ENV_SIDE_KEYS` that are not sent to the server.
+        """
+        self.key = simulation_key(env_config)
+        self.authkey = secrets.token_bytes(32)
+        # The socket of the episode connections is created here instead of with a Listener, because
+        # the accept must be bounded in time.
+        self.folder = tempfile.mkdtemp(prefix='eprllib-fork-')
+        self.address = os.path.join(self.folder, 'episodes.sock')
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.bind(self.address)
+        self.socket.listen()
+        context = multiprocessing.get_context('spawn')
+        self.control, server_control = context.Pipe()
+        self.process = context.Process(
+            target=_serve,
+            args=(
+                {key: value for key, value in env_config.items() if key not in ENV_SIDE_KEYS},
+                self.address,
+                self.authkey,
+                server_control
+            ),
+            daemon=True
+        )
+        self.process.start()
+        server_control.close()
+
+    def fork_episode(self, episode: int) -> Tuple[int, Connection]:
+        """Request a new episode from the warmed state.
+
+        Args:
+            episode (int): Episode number.
+
+        Returns:
+            Tuple[int, Connection]: Process id and connection with the runner of the episode.
+        """
+        self.control.send(episode)
+        try:
+            pid = self.control.recv()
+        except (EOFError, OSError):
+            raise Exception('The warm start server is not running')
+        # Wait until the episode process connects. If the process dies before, the accept would wait
+        # forever, so it is checked in each interval.
+        deadline = perf_counter() + _ACCEPT_TIMEOUT
+        while self.socket not in wait([self.socket, self.process.sentinel], _POLL_INTERVAL):
+            if perf_counter() > deadline or not self.process.is_alive() or not _process_alive(pid):
+                raise Exception('The warm start server is not running')
+        client, _ = self.socket.accept()
+        conn = Connection(client.detach())
+        # The same authentication of `Listener.accept`, that `Client` expects.
+        deliver_challenge(conn, self.authkey)
+        answer_challenge(conn, self.authkey)
+        return pid, conn
+
+    def shutdown(self) -> None:
+        """Stop the server process.
+        """
+        try:
+            self.control.send(None)
+        except OSError:
+            pass
+        self.process.join(10)
+        if self.process.is_alive():
+            self.process.kill()
+        self.control.close()
+        self.socket.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+class ForkedEpisodeRunner:
+    def __init__(
+        self,
+        episode: int,
+        env_config: Dict[str, Any],
+        exchange: StepExchange,
+        server: WarmStartServer
+        ) -> None:
+        """Runner of the environment side for an episode played in a fork of the warmed simulation.
+        It has the same interface of `EnergyPlusRunner`.
+
+        Args:
+            episode (int): Episode number.
+            env_config (Dict[str, Any]): Environment configuration defined in the call to the EnergyPlus Environment.
+            exchange (StepExchange): Exchange of the observations and actions with the environment.
+            server (WarmStartServer): Server with the warmed simulation.
+        """
+        self.episode = episode
+        self.env_config = env_config
+        self.exchange = exchange
+        self.server = server
+        self.env_config['episode'] = self.episode
+
+        self.conn: Optional[Connection] = None
+        self.pid: Optional[int] = None
+        self.sim_results: int = 0
+        self.simulation_complete = False
+        self.timings: Dict[str, float] = {'startup_s': 0., 'warmup_s': 0., 'teardown_s': 0.}
+        self._receiver: Optional[threading.Thread] = None
+        self._sender: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Fork the warmed simulation and start the threads that move the messages between the
+        connection and the exchange.
+        """
+        start_time = perf_counter()
+        self.pid, self.conn = self.server.fork_episode(self.episode)
+        self.timings['startup_s'] = perf_counter() - start_time
+        self._receiver = threading.Thread(target=self._receive, daemon=True)
+        self._sender = threading.Thread(target=self._send, daemon=True)
+        self._receiver.start()
+        self._sender.start()
+
+    def _receive(self) -> None:
+        """Move the observations and infos from the episode process to the exchange.
+        """
+        while True:
+            try:
+                tag, item = self.conn.recv()
+            except (EOFError, OSError):
+                if not self.simulation_complete:
+                    self.sim_results = 1
+                break
+            if tag == 'obs':
+                self.exchange.put_observation(*item)
+            elif tag == 'done':
+                self.sim_results = item
+                break
+        self.simulation_complete = True
+        self.exchange.close()
+
+    def _send(self) -> None:
+        """Move the actions from the exchange to the episode process.
+        """
+        while True:
+            try:
+                action = self.exchange.get_action()
+            except ExchangeClosed:
+                break
+            if self.simulation_complete:
+                break
+            try:
+                self.conn.send(action)
+            except OSError:
+                break
+
+    def stop(self, delete_state: bool = True) -> None:
+        """Kill the episode process if it is still running and close the connection.
+        """
+        teardown_start = perf_counter()
+        self.simulation_complete = True
+        if self._receiver is not None and self._receiver.is_alive():
+            # The episode is discarded, so the process is killed instead of simulating until the end.
+            try:
+                os.kill(self.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.exchange.close()
+        for thread in [self._receiver, self._sender]:
+            if thread is not None:
+                thread.join()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        self.timings['teardown_s'] = perf_counter() - teardown_start
+        return None
+
+    def failed(self) -> bool:
+        """This method tells if a EnergyPlus simulations was finished successfully or not.
+        """
+        return self.sim_results != 0
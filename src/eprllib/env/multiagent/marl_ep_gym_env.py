@@ -5,12 +5,22 @@ EnergyPlus Runner.
 """
 from ray.rllib.env.multi_agent_env import MultiAgentEnv
 # Used to define the environment base and the size of action and observation spaces.
-from queue import Empty, Full, Queue
-# Used to separate the execution in two threads and comunicate EnergyPlus with this environment.
+from queue import Empty
+from time import perf_counter
 from typing import Any, Dict, Optional
 # To specify the types of variables espected.
 from eprllib.env.multiagent.marl_ep_runner import EnergyPlusRunner
+from eprllib.env.multiagent.marl_ep_exchange import ExchangeClosed, StepExchange
+from eprllib.env.multiagent.marl_ep_decision import DecisionSchedule
+from eprllib.env.multiagent.marl_ep_triggers import triggers_config
+from eprllib.env.multiagent.marl_ep_obs_layout import ELAPSED_NAME
+# Used to comunicate the EnergyPlus thread with this environment.
+from eprllib.env.multiagent.marl_ep_fork import ForkedEpisodeRunner, WarmStartServer, fork_supported, simulation_key
+from eprllib.env.multiagent.marl_ep_subprocess import ENV_SIDE_KEYS, SharedMemoryExchange, SubprocessEnergyPlusRunner
 from eprllib.tools import rewards
+from eprllib.tools.episode_pregeneration import EpisodePregenerator
+from eprllib.tools.model_output import ModelOutputManager
+from eprllib.tools.timing import dump_timing, timing_config
 # The EnergyPlus Runner.
 from gymnasium.spaces import Box
 
@@ -46,10 +56,40 @@ class EnergyPlusEnv_v0(MultiAgentEnv):
         
         # EnergyPlus Runner class.
         self.energyplus_runner: Optional[EnergyPlusRunner] = None
-        # queues for communication between MDP and EnergyPlus.
-        self.obs_queue: Optional[Queue] = None
-        self.act_queue: Optional[Queue] = None
-        self.infos_queue: Optional[Queue] = None
+        # exchange for communication between MDP and EnergyPlus.
+        self.exchange: Optional[StepExchange] = None
+        # Background generation of the episode models (optional).
+        self.episode_pregenerator: Optional[EpisodePregenerator] = None
+        # Deletion and metrics of the models and outputs of the episodes (optional, see `tools.model_output`).
+        self.model_output: Optional[ModelOutputManager] = ModelOutputManager.from_env_config(self.env_config)
+        # Timings of the EnergyPlus startup, warmup and teardown of the last episode.
+        self.energyplus_timings: Dict[str, float] = {}
+        # Decision interval of the agents (see `marl_ep_decision`). The timestep counts the EnergyPlus
+        # timesteps, so it advances until the next decision in each step.
+        self.decision_schedule = DecisionSchedule(self.env_config)
+        self._last_action: Dict[str, Any] = {}
+        # With event-triggered decisions (see `marl_ep_triggers`) the runner decides when the next step
+        # happens, so the timestep advances with the 'elapsed_timesteps' of the infos.
+        self.triggered_decisions = triggers_config(self.env_config) is not None
+        # EnergyPlus timesteps covered by the last step, used by the reward functions.
+        self.elapsed_timesteps = 1
+        # Timing metrics of the callbacks of the last finished episode (optional, see `tools.timing`).
+        self.timing_metrics: Dict[str, float] = {}
+        self._reset_start = 0.
+        # Reward function of the environment. The built-in functions are replaced by their compiled
+        # objects, that are configured at the start of each episode (see `tools.rewards`).
+        self.reward_function = rewards.compile_reward_function(
+            self.env_config.get('reward_function', False) or rewards.dalamagkidis_2007
+        )
+        # energyplus_backend: 'thread' (default) to run EnergyPlus in a thread of this process or
+        # 'subprocess' to run it in a child process. See `marl_ep_subprocess`.
+        if self.env_config.get('energyplus_backend', 'thread') not in ['thread', 'subprocess']:
+            raise ValueError(f"Unknown energyplus_backend: {self.env_config['energyplus_backend']}")
+        # Server with the warmed simulation used when `fork_after_warmup` is True.
+        self.warm_start_server: Optional[WarmStartServer] = None
+        if self.env_config.get('fork_after_warmup', False) and not fork_supported():
+            print('fork_after_warmup is not supported in this platform, the warmup is simulated in each episode.')
+            self.env_config['fork_after_warmup'] = False
         
         # ===CONTROLS=== #
         # variable for the registry of the episode number.
@@ -57,6 +97,9 @@ class EnergyPlusEnv_v0(MultiAgentEnv):
         self.timestep = 0
         self.terminateds = False
         self.truncateds = False
+        # The first observation must be waited in `reset_wait` and the observation of the action in `step_wait`.
+        self._reset_pending = False
+        self._action_sent = False
         # dict to save the last observation and infos in the environment.
         self.last_obs = {}
         self.last_infos = {}
@@ -69,6 +112,19 @@ class EnergyPlusEnv_v0(MultiAgentEnv):
         seed: Optional[int] = None,
         options: Optional[Dict[str, Any]] = None
     ):
+        self.reset_async(seed=seed, options=options)
+        return self.reset_wait()
+
+    def reset_async(
+        self, *,
+        seed: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """First part of `reset`: start the EnergyPlus simulation of the new episode without waiting
+        the first observation. It is used to run the warmup of several environments concurrently (see
+        `marl_ep_vector_env`).
+        """
+        self._reset_start = perf_counter()
         # Increment the counting of episodes in 1.
         self.episode += 1
         # stablish the timestep counting in zero.
@@ -77,13 +133,19 @@ class EnergyPlusEnv_v0(MultiAgentEnv):
         if not self.truncateds:
             # Condition implemented to restart a new epsiode when simulation is completed and 
             # EnergyPlus Runner is already inicialized.
+            # reuse_energyplus_state: If True, the EnergyPlus state is reset and reused in the next
+            # episode instead of being deleted and created again.
+            energyplus_state = None
             if self.energyplus_runner is not None and self.energyplus_runner.simulation_complete:
-                self.energyplus_runner.stop()
-            # Define the queues for flow control between MDP and EnergyPlus threads in a max size 
-            # of 1 because EnergyPlus timestep will be processed at a time.
-            self.obs_queue = Queue(maxsize=1)
-            self.act_queue = Queue(maxsize=1)
-            self.infos_queue = Queue(maxsize=1)
+                energyplus_state = self.energyplus_runner.stop(
+                    delete_state=not self.env_config.get('reuse_energyplus_state', False)
+                )
+                self.energyplus_timings['teardown_s'] = self.energyplus_runner.timings['teardown_s']
+                if self.model_output is not None:
+                    self.model_output.release()
+            # Define the exchange for flow control between MDP and EnergyPlus threads. It has a single
+            # slot in each direction because EnergyPlus timestep will be processed at a time.
+            self.exchange = StepExchange()
             # == Episode configuration == (Optional)
             # If the configuration is not defined, the epjson config will be used.
             
@@ -91,23 +153,75 @@ class EnergyPlusEnv_v0(MultiAgentEnv):
             # of env_config['epjson'] (str). Buid-in function allocated in tools.ep_episode_config
             episode_config_fn = self.env_config.get('episode_config_fn', None)
             if episode_config_fn != None:
-                self.env_config = episode_config_fn(self.env_config)
+                # episode_pregeneration: Optional dict with 'queue_depth' and 'num_workers' to build the
+                # models in a process pool while the previous episodes are running.
+                if self.env_config.get('episode_pregeneration', False):
+                    if self.episode_pregenerator is None:
+                        self.episode_pregenerator = EpisodePregenerator(
+                            episode_config_fn,
+                            self.env_config,
+                            env_side_keys=ENV_SIDE_KEYS,
+                            **self.env_config['episode_pregeneration']
+                        )
+                    self.env_config.update(self.episode_pregenerator.pop())
+                    self.energyplus_timings.update(self.episode_pregenerator.metrics())
+                else:
+                    self.env_config['episode'] = self.episode
+                    self.env_config = episode_config_fn(self.env_config)
+            # The episode configuration can change the references of the reward function.
+            if isinstance(self.reward_function, rewards.RewardFunction):
+                self.reward_function.configure(self.env_config)
             
-            # Start EnergyPlusRunner whith the following configuration.
-            self.energyplus_runner = EnergyPlusRunner(
-                episode=self.episode,
-                env_config=self.env_config,
-                obs_queue=self.obs_queue,
-                act_queue=self.act_queue,
-                infos_queue=self.infos_queue
-            )
+            # fork_after_warmup: If True, the warmup is simulated once for each (building, weather) pair
+            # and the episodes are forks of the warmed simulation. See `marl_ep_fork`.
+            if self.env_config.get('fork_after_warmup', False):
+                key = simulation_key(self.env_config)
+                if self.warm_start_server is not None and self.warm_start_server.key != key:
+                    self.warm_start_server.shutdown()
+                    self.warm_start_server = None
+                if self.warm_start_server is None:
+                    self.warm_start_server = WarmStartServer(self.env_config)
+                self.energyplus_runner = ForkedEpisodeRunner(
+                    episode=self.episode,
+                    env_config=self.env_config,
+                    exchange=self.exchange,
+                    server=self.warm_start_server
+                )
+            elif self.env_config.get('energyplus_backend', 'thread') == 'subprocess':
+                # The observations and actions are exchanged through shared memory with the child process.
+                self.exchange = SharedMemoryExchange.from_env_config(self.env_config)
+                self.energyplus_runner = SubprocessEnergyPlusRunner(
+                    episode=self.episode,
+                    env_config=self.env_config,
+                    exchange=self.exchange
+                )
+            else:
+                # Start EnergyPlusRunner whith the following configuration.
+                self.energyplus_runner = EnergyPlusRunner(
+                    episode=self.episode,
+                    env_config=self.env_config,
+                    exchange=self.exchange,
+                    energyplus_state=energyplus_state
+                )
             # Divide the thread in two in this point.
             self.energyplus_runner.start()
+            if self.model_output is not None:
+                self.model_output.start_episode(self.episode, self.env_config)
+            self._reset_pending = True
+
+    def reset_wait(self):
+        """Second part of `reset`: wait the first observation of the episode started in `reset_async`.
+
+        Returns:
+            Tuple: obs and infos dicts, like `reset`.
+        """
+        if self._reset_pending:
             # Wait untill an observation and an infos are made, and get the values.
-            self.energyplus_runner.obs_event.wait()
-            self.last_obs = self.obs_queue.get()
-            self.energyplus_runner.infos_event.wait()
-            self.last_infos = self.infos_queue.get()
+            self.last_obs, self.last_infos = self.exchange.get_observation()
+            self.energyplus_timings['startup_s'] = self.energyplus_runner.timings['startup_s']
+            self.energyplus_timings['warmup_s'] = self.energyplus_runner.timings['warmup_s']
+            self._reset_pending = False
+        self.energyplus_timings['reset_s'] = perf_counter() - self._reset_start
         
         # Asign the obs and infos to the environment.
         obs = self.last_obs
@@ -115,34 +229,60 @@ class EnergyPlusEnv_v0(MultiAgentEnv):
         
         self.terminateds = False
         self.truncateds = False
+        
+        if not self.decision_schedule.every_step:
+            obs, infos = self._due_agents(obs, infos)
             
         return obs, infos
 
     def step(self, action):
-        # increment the timestep in 1.
-        self.timestep += 1
+        self.step_async(action)
+        return self.step_wait()
+
+    def step_async(self, action) -> None:
+        """First part of `step`: send the action to EnergyPlus without waiting the observation. It is
+        used to step several environments concurrently (see `marl_ep_vector_env`).
+
+        Args:
+            action (Dict[str, Any]): Action of each agent.
+        """
+        if not self.decision_schedule.every_step:
+            # Only the agents that decide in the timestep change their action, the others keep the last one.
+            due_agents = self.decision_schedule.due_agents(self.timestep)
+            self._last_action.update({agent: action[agent] for agent in due_agents if agent in action})
+            action = dict(self._last_action)
+        if not self.triggered_decisions:
+            # increment the timestep until the next decision (1 without decision interval).
+            timestep = self.decision_schedule.next_decision(self.timestep)
+            self.elapsed_timesteps = timestep - self.timestep
+            self.timestep = timestep
+            self._update_truncateds()
+        
+        # simulation_complete is likely to happen after last env step()
+        # is called. The exchange is closed at the end of the simulation, so the wait is released.
+        self._action_sent = not self.energyplus_runner.simulation_complete
+        # if the simulation is not complete, put the action (received by EnergyPlus through 
+        # dedicated callback). The next observation is waited in `step_wait`.
+        if self._action_sent:
+            self.exchange.put_action(action)
+
+    def step_wait(self):
+        """Second part of `step`: wait the observation of the action sent in `step_async` and
+        calculate the reward.
+
+        Returns:
+            Tuple: obs, reward, terminated, truncated and infos dicts, like `step`.
+        """
         # ===CONTROLS=== #
         # terminated variable is used to determine the end of a episode. Is stablished as False until the
         # environment present a terminal state.
         terminated = {}
         truncated = {}
-        # Cut the anual simulation into shorter episodes. Default: 7 days
-        cut_episode_len = self.env_config.get('cut_episode_len', None)
-        if not cut_episode_len == None:
-            cut_episode_len_timesteps = cut_episode_len * 144
-            # TODO: hacer que el corte se multiplique por los pasos de tiempo de un día, detectando
-            # la longitud desde el archivo de EP.
-            if self.timestep % cut_episode_len_timesteps == 0:
-                self.truncateds = True
-        else:
-            self.truncateds = False
         # timeout is set to 5s to handle the time of calculation of EnergyPlus simulation.
         # timeout value can be increased if EnergyPlus timestep takes longer.
         timeout = self.env_config.get("timeout", 5)
         
-        # simulation_complete is likely to happen after last env step()
-        # is called, hence leading to waiting on queue for a timeout.
-        if self.energyplus_runner.simulation_complete:
+        if not self._action_sent:
             # check for simulation errors.
             if self.energyplus_runner.failed():
                 raise Exception("Faulty episode")
@@ -153,23 +293,21 @@ class EnergyPlusEnv_v0(MultiAgentEnv):
             obs = self.last_obs
             infos = self.last_infos
 
-        # if the simulation is not complete, enqueue action (received by EnergyPlus through 
-        # dedicated callback) and then wait to get next observation.
+        # if the simulation is not complete, wait to get next observation.
         else:
             try:
-                # Send the action to the EnergyPlus Runner flow.
-                self.act_queue.put(action,timeout=timeout)
-                self.energyplus_runner.act_event.set()
                 # Get the return observation and infos after the action is applied.
-                self.energyplus_runner.obs_event.wait(timeout=timeout)
-                obs = self.obs_queue.get(timeout=timeout)
-                self.energyplus_runner.infos_event.wait(timeout=timeout)
-                infos = self.infos_queue.get(timeout=timeout)
+                obs, infos = self.exchange.get_observation(timeout=timeout)
                 # Upgrade last observation and infos dicts.
                 self.last_obs = obs
                 self.last_infos = infos
+                if self.triggered_decisions:
+                    # increment the timestep with the timesteps elapsed until the triggered decision.
+                    self.elapsed_timesteps = int(infos[self.env_config['agent_ids'][0]][ELAPSED_NAME])
+                    self.timestep += self.elapsed_timesteps
+                    self._update_truncateds()
 
-            except (Full, Empty):
+            except (Empty, ExchangeClosed):
                 # Set the terminated variable into True to finish the episode.
                 self.terminateds = True
                 # We use the last observation as a observation for the timestep.
@@ -182,11 +320,7 @@ class EnergyPlusEnv_v0(MultiAgentEnv):
             raise Exception("Faulty episode")
         
         # Calculate the reward in the timestep
-        if self.env_config.get('reward_function', False):
-            reward_function = self.env_config['reward_function']
-        else:
-            reward_function = rewards.dalamagkidis_2007
-        reward = reward_function(self, infos)
+        reward = self.reward_function(self, infos)
         
         reward_dict = {}
         for agent in self.env_config['agent_ids']:
@@ -195,11 +329,64 @@ class EnergyPlusEnv_v0(MultiAgentEnv):
         terminated["__all__"] = self.terminateds
         truncated["__all__"] = self.truncateds
         
+        if self.terminateds or self.truncateds:
+            self._episode_timing()
+        elif not self.decision_schedule.every_step:
+            obs, infos = self._due_agents(obs, infos)
+        
         return obs, reward_dict, terminated, truncated, infos
 
+    def _update_truncateds(self) -> None:
+        """Truncate the episode when the timestep reaches the end of a `cut_episode_len` episode."""
+        # Cut the anual simulation into shorter episodes. Default: 7 days
+        cut_episode_len = self.env_config.get('cut_episode_len', None)
+        if not cut_episode_len == None:
+            cut_episode_len_timesteps = cut_episode_len * 144
+            # TODO: hacer que el corte se multiplique por los pasos de tiempo de un día, detectando
+            # la longitud desde el archivo de EP.
+            if self.timestep % cut_episode_len_timesteps == 0:
+                self.truncateds = True
+        else:
+            self.truncateds = False
+
+    def _due_agents(self, obs: Dict[str, Any], infos: Dict[str, Any]) -> tuple:
+        """Keep the observations and infos of the agents that decide in the current timestep."""
+        due_agents = self.decision_schedule.due_agents(self.timestep)
+        return {agent: obs[agent] for agent in due_agents}, {agent: infos[agent] for agent in due_agents}
+
+    def _episode_timing(self) -> None:
+        """Summary of the timing of the callbacks at the end of the episode, with the time of `reset()`
+        and the `stop()` of the previous episode. Only the runner of the 'thread' backend has a timer.
+        """
+        timer = getattr(self.energyplus_runner, 'timer', None)
+        if timer is None:
+            return
+        metrics = timer.summary()
+        timer.clear()
+        metrics['reset_ms'] = self.energyplus_timings.get('reset_s', 0.) * 1000.
+        # Part of the reset that was blocked waiting a pregenerated model.
+        if 'reset_wait_s' in self.energyplus_timings:
+            metrics['reset_wait_ms'] = self.energyplus_timings['reset_wait_s'] * 1000.
+        metrics['stop_ms'] = self.energyplus_timings.get('teardown_s', 0.) * 1000.
+        metrics['api_calls_per_step'] = self.energyplus_runner.api_calls['per_step']
+        # Actuator writes of the episode and writes skipped because the value did not change.
+        counts = self.energyplus_runner.actuation.counts
+        metrics['actuator_writes'] = counts['writes']
+        metrics['actuator_writes_skipped'] = counts['skipped']
+        counts['writes'] = counts['skipped'] = 0
+        self.timing_metrics = metrics
+        if timing_config(self.env_config)['dump']:
+            dump_timing(metrics, self.env_config, self.episode)
+
     def close(self):
         if self.energyplus_runner is not None:
             self.energyplus_runner.stop()
+        if self.episode_pregenerator is not None:
+            self.episode_pregenerator.shutdown()
+        if self.warm_start_server is not None:
+            self.warm_start_server.shutdown()
+        if self.model_output is not None:
+            self.model_output.close()
     
     def render(self, mode="human"):
         pass
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""# OBSERVATION LAYOUT
+
+This script contain the compiled observation layout used by the EnergyPlus Runner. The layout
+is built once per episode from the environment configuration and assigns a fixed slot to each
+element of the observation, in the same order that the runner used to build the observation
+dict. The values are written in place in a preallocated buffer every timestep.
+"""
+import numpy as np
+from typing import Any, Dict, List
+
+# Building general properties that are added to the observation in this order.
+BUILDING_PROPERTIES = [
+    'building_area',
+    'aspect_ratio',
+    'window_area_relation_north',
+    'window_area_relation_east',
+    'window_area_relation_south',
+    'window_area_relation_west',
+    'inercial_mass',
+    'construction_u_factor',
+    'E_cool_ref',
+    'E_heat_ref',
+]
+# Weather prediction variables, in the order that they are added for each hour.
+FORECAST_VARIABLES = [
+    'liquid_precipitation',
+    'outdoor_barometric_pressure',
+    'outdoor_dry_bulb',
+    'outdoor_relative_humidity',
+    'wind_direction',
+    'wind_speed',
+]
+FORECAST_HOURS = 24
+# Slot of the timesteps elapsed since the previous decision, used with `decision_triggers`. It is not
+# observable and it is always copied to the infos dict.
+ELAPSED_NAME = 'elapsed_timesteps'
+
+class ObservationLayout:
+    """This object map each name of the observation to a fixed slot of a preallocated buffer.
+    """
+    def __init__(
+        self,
+        env_config: Dict[str, Any]
+        ) -> None:
+        """The slots follow the order of the observation dict used before: variables, meters,
+        actuators, building properties, time variables, weather variables, the elapsed timesteps (only
+        with `decision_triggers`) and the 24 hours weather prediction. Repeated names share the first slot, like the update of a dict does.
+
+        Args:
+            env_config (Dict[str, Any]): Environment configuration defined in the call to the EnergyPlus Environment.
+
+        Return:
+            None.
+        """
+        self.agent_ids: List[str] = list(env_config['ep_actuators'].keys())
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+
+        for key in env_config['ep_variables'].keys():
+            self._add(key)
+        for key in env_config['ep_meters'].keys():
+            self._add(key)
+        for key in env_config['ep_actuators'].keys():
+            self._add(key)
+        for key in BUILDING_PROPERTIES:
+            self._add(key)
+        for key in env_config.get('time_variables', False) or []:
+            self._add(key)
+        for key in env_config.get('weather_variables', False) or []:
+            self._add(key)
+        if env_config.get('decision_triggers', False):
+            self._add(ELAPSED_NAME)
+
+        # The weather prediction always use the last slots of the buffer as a (24, 6) block.
+        forecast_start = len(self.names)
+        for h in range(FORECAST_HOURS):
+            for variable in FORECAST_VARIABLES:
+                self._add(f'{variable}_forecast_{h+1}')
+        self.forecast_slice = slice(forecast_start, len(self.names))
+
+        # Raw values of all the slots, including the no observable variables.
+        self.values = np.zeros(len(self.names), dtype=np.float64)
+        self.forecast = self.values[self.forecast_slice].reshape(FORECAST_HOURS, len(FORECAST_VARIABLES))
+
+        # Slots that are part of the observation after removing the no observable variables.
+        observable = [True] * len(self.names)
+        for variable in env_config.get('no_observable_variables', False) or []:
+            if not observable[self.index[variable]]:
+                raise KeyError(variable)
+            observable[self.index[variable]] = False
+        if ELAPSED_NAME in self.index:
+            observable[self.index[ELAPSED_NAME]] = False
+        self.observable = np.flatnonzero(observable)
+
+        # Slots copied to the infos dict.
+        self.infos_slots = [
+            (variable, self.index[variable])
+            for variable in env_config.get('infos_variables', False) or []
+        ]
+        if ELAPSED_NAME in self.index and ELAPSED_NAME not in dict(self.infos_slots):
+            self.infos_slots.append((ELAPSED_NAME, self.index[ELAPSED_NAME]))
+
+        # Agent prefix: agent indicator followed by the agent type.
+        prefixes = [
+            np.concatenate(([agent_indicator], np.ravel(env_config['ep_actuators_type'][agent])))
+            for agent_indicator, agent in enumerate(self.agent_ids, start=1)
+        ]
+        self.prefix_len = len(prefixes[0]) if prefixes else 0
+        self.obs_dim = self.prefix_len + len(self.observable)
+        self.agent_obs = np.zeros((len(self.agent_ids), self.obs_dim), dtype=np.float32)
+        for row, prefix in enumerate(prefixes):
+            self.agent_obs[row, :self.prefix_len] = prefix
+
+    def _add(self, name: str) -> None:
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+
+    @property
+    def observation_names(self) -> List[str]:
+        """Names of the elements of each agent observation, in order.
+        """
+        prefix = ['agent_indicator'] + [f'agent_type_{n}' for n in range(self.prefix_len - 1)]
+        return prefix + [self.names[slot] for slot in self.observable]
+
+    def fill_building_properties(self, episode_config: Dict[str, Any]) -> None:
+        """The building properties are constant during the episode, so they are written once.
+
+        Args:
+            episode_config (Dict[str, Any]): `env_config['episode_config']` of the episode.
+        """
+        for key in BUILDING_PROPERTIES:
+            self.values[self.index[key]] = episode_config[key]
+
+    def observations(self) -> Dict[str, np.ndarray]:
+        """Copy the observable slots after the prefix of each agent and return the observation dict.
+
+        The agents observations are rows of a single block. The block is copied before to be sent
+        because RLlib keeps references to the observations of previous timesteps.
+
+        Returns:
+            Dict[str, np.ndarray]: Observation of each agent.
+        """
+        self.agent_obs[:, self.prefix_len:] = self.values[self.observable]
+        block = self.agent_obs.copy()
+        return {agent: block[row] for row, agent in enumerate(self.agent_ids)}
+
+    def infos(self) -> Dict[str, Dict[str, float]]:
+        """Build the infos dict with the `infos_variables`. The same dict is shared by all the agents.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Infos of each agent.
+        """
+        infos_dict = {variable: self.values[slot].item() for variable, slot in self.infos_slots}
+        return {agent: infos_dict for agent in self.agent_ids}
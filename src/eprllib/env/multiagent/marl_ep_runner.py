@@ -4,44 +4,96 @@ This script contain the EnergyPlus Runner that execute EnergyPlus from its
 Python API in the version 23.2.0.
 """
 
-import sys
 import threading
 import numpy as np
-from queue import Queue
-from time import sleep
-from typing import Any, Dict, List, Optional
+from queue import Empty
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from eprllib.env.multiagent.marl_ep_obs_layout import ObservationLayout, FORECAST_HOURS, FORECAST_VARIABLES
+from eprllib.env.multiagent.marl_ep_forecast import WeatherForecast
+from eprllib.env.multiagent.marl_ep_exchange import ExchangeClosed, StepExchange
+from eprllib.env.multiagent.marl_ep_backend import simulator_api
+from eprllib.env.multiagent.marl_ep_decision import DecisionSchedule, IntervalAggregator
+from eprllib.env.multiagent.marl_ep_triggers import DecisionTriggers, triggers_config
+from eprllib.env.multiagent.marl_ep_actuation import ActuationStage
+from eprllib.tools.output_profile import profiled_epjson
+from eprllib.tools.timing import CallbackTimer, timing_config
 
-os_platform = sys.platform
-if os_platform == "linux":
-    sys.path.insert(0, '/usr/local/EnergyPlus-23-2-0')
-else:
-    sys.path.insert(0, 'C:/EnergyPlusV23-2-0')
-    
-from pyenergyplus.api import EnergyPlusAPI
-api = EnergyPlusAPI()
+# Time variables of `env_config['time_variables']`: methods of `api.exchange` called with the state.
+TIME_VARIABLES = [
+    'actual_date_time', # Gets a simple sum of the values of the date/time function. Could be used in random seeding.
+    'actual_time', # Gets a simple sum of the values of the time part of the date/time function. Could be used in random seeding.
+    'current_time', # Get the current time of day in hours, where current time represents the end time of the current time step.
+    'day_of_month', # Get the current day of month (1-31)
+    'day_of_week', # Get the current day of the week (1-7)
+    'day_of_year', # Get the current day of the year (1-366)
+    'holiday_index', # Gets a flag for the current day holiday type: 0 is no holiday, 1 is holiday type #1, etc.
+    'hour', # Get the current hour of the simulation (0-23)
+    'minutes', # Get the current minutes into the hour (1-60)
+    'month', # Get the current month of the simulation (1-12)
+    'num_time_steps_in_hour', # Returns the number of zone time steps in an hour, which is currently a constant value throughout a simulation.
+    'system_time_step', # Gets the current system time step value in EnergyPlus. The system time step is variable and fluctuates during the simulation.
+    'year', # Get the “current” year of the simulation, read from the EPW. All simulations operate at a real year, either user specified or automatically selected by EnergyPlus based on other data (start day of week + leap year option).
+    'zone_time_step', # Gets the current zone time step value in EnergyPlus. The zone time step is variable and fluctuates during the simulation.
+    'zone_time_step_number', # The current zone time step index, from 1 to the number of zone time steps per hour
+]
+# Weather variables of `env_config['weather_variables']`. The methods of `api.exchange` are called with the
+# state, and the `*_at_time` methods also with the current hour and zone time step number.
+WEATHER_VARIABLES = [
+    'is_raining', # Gets a flag for whether the it is currently raining. The C API returns an integer where 1 is yes and 0 is no, this simply wraps that with a bool conversion.
+    'sun_is_up', # Gets a flag for whether the sun is currently up. The C API returns an integer where 1 is yes and 0 is no, this simply wraps that with a bool conversion.
+    # Gets the specified weather data at the specified hour and time step index within that hour
+    'today_weather_albedo_at_time',
+    'today_weather_beam_solar_at_time',
+    'today_weather_diffuse_solar_at_time',
+    'today_weather_horizontal_ir_at_time',
+    'today_weather_is_raining_at_time',
+    'today_weather_is_snowing_at_time',
+    'today_weather_liquid_precipitation_at_time',
+    'today_weather_outdoor_barometric_pressure_at_time',
+    'today_weather_outdoor_dew_point_at_time',
+    'today_weather_outdoor_dry_bulb_at_time',
+    'today_weather_outdoor_relative_humidity_at_time',
+    'today_weather_sky_temperature_at_time',
+    'today_weather_wind_direction_at_time',
+    'today_weather_wind_speed_at_time',
+    'tomorrow_weather_albedo_at_time',
+    'tomorrow_weather_beam_solar_at_time',
+    'tomorrow_weather_diffuse_solar_at_time',
+    'tomorrow_weather_horizontal_ir_at_time',
+    'tomorrow_weather_is_raining_at_time',
+    'tomorrow_weather_is_snowing_at_time',
+    'tomorrow_weather_liquid_precipitation_at_time',
+    'tomorrow_weather_outdoor_barometric_pressure_at_time',
+    'tomorrow_weather_outdoor_dew_point_at_time',
+    'tomorrow_weather_outdoor_dry_bulb_at_time',
+    'tomorrow_weather_outdoor_relative_humidity_at_time',
+    'tomorrow_weather_sky_temperature_at_time',
+    'tomorrow_weather_wind_direction_at_time',
+    'tomorrow_weather_wind_speed_at_time',
+]
 
 class EnergyPlusRunner:
     """This object have the particularity of `start` EnergyPlus, `_collect_obs` and `_send_actions` to
-    send it trhougt queue to the EnergyPlus Environment thread.
+    send it trhougt the step exchange to the EnergyPlus Environment thread.
     """
     def __init__(
         self,
         episode: int,
         env_config: Dict[str, Any],
-        obs_queue: Queue,
-        act_queue: Queue,
-        infos_queue: Queue
+        exchange: StepExchange,
+        energyplus_state: Any = None
         ) -> None:
         """The object has an intensive interaction with EnergyPlus Environment script, exchange information
-        between two threads. For a good coordination queue events are stablished and different canals of
-        information are defined.
+        between two threads. The observations and the actions are exchanged with a `StepExchange`.
 
         Args:
             episode (int): Episode number.
             env_config (Dict[str, Any]): Environment configuration defined in the call to the EnergyPlus Environment.
-            obs_queue (Queue): Queue object definition.
-            act_queue (Queue): Queue object definition.
-            infos_queue (Queue): Queue object definition.
+            exchange (StepExchange): Exchange of the observations and actions with the environment.
+            energyplus_state (Any): EnergyPlus state of a previous runner, kept with `stop(delete_state=False)`.
+            When it is provided the state is reset with `api.state_manager.reset_state()` instead of creating
+            a new one. Default is None.
         
         Return:
             None.
@@ -49,28 +101,79 @@ class EnergyPlusRunner:
         # Asignation of variables.
         self.episode = episode
         self.env_config = env_config
-        self.obs_queue = obs_queue
-        self.act_queue = act_queue
-        self.infos_queue = infos_queue
+        self.exchange = exchange
+        
+        # Simulator backend: the EnergyPlus Python API or a mock (see `marl_ep_backend`).
+        self.api = simulator_api(self.env_config)
         
         # saving the episode in the env_config to use across functions.
         self.env_config['episode'] = self.episode
         
-        # The queue events are generated.
-        self.obs_event = threading.Event()
-        self.act_event = threading.Event()
-        self.infos_event = threading.Event()
-        
         # Variables to be used in this thread.
         self.energyplus_exec_thread: Optional[threading.Thread] = None
-        self.energyplus_state: Any = None
+        self.energyplus_state: Any = energyplus_state
         self.sim_results: int = 0
         self.initialized = False
         self.init_handles = False
         self.simulation_complete = False
         self.first_observation = True
         self.obs = {}
-        self.infos = {}    
+        self.infos = {}
+        # Time in seconds of the EnergyPlus startup (until the API data is ready), the warmup period
+        # (until the first observation) and the teardown in `stop()`.
+        self.timings: Dict[str, float] = {'startup_s': 0., 'warmup_s': 0., 'teardown_s': 0.}
+        self._start_time = 0.
+        self._handles_time = 0.
+        # Optional callable executed with the state pointer in the first timestep after the warmup.
+        self.on_warmup_complete: Optional[Callable[[Any], None]] = None
+        # Compiled observation layout. The handles are bound to its slots in `_init_handles`.
+        self.obs_layout = ObservationLayout(self.env_config)
+        self.var_slots: List[Tuple[int, int]] = []
+        self.meter_slots: List[Tuple[int, int]] = []
+        self.actuator_slots: List[Tuple[int, int]] = []
+        # `api.exchange` methods of the time and weather variables, bound to their slots in `_init_handles`.
+        self.accessor_slots: List[Tuple[int, Callable]] = []
+        self.at_time_accessor_slots: List[Tuple[int, Callable]] = []
+        # Count of `api.exchange` calls: total, in the last step (from the actions to the observation) and
+        # the mean per step.
+        self.api_calls: Dict[str, float] = {'steps': 0, 'total': 0, 'last_step': 0, 'per_step': 0.}
+        self._step_api_calls = 0
+        self._obs_api_calls = 0
+        self._skip_api_calls = 0
+        # Decision interval (optional, see `marl_ep_decision`). `_timestep` is the next timestep that starts,
+        # counted from the start of the simulation, and `_last_action` the action applied in the timesteps
+        # without decision.
+        self.decision_schedule = DecisionSchedule(self.env_config)
+        # Event-triggered decisions (optional, see `marl_ep_triggers`). The triggers can use the time and
+        # weather variables, so they are read before the decision.
+        self.triggers: Optional[DecisionTriggers] = None
+        if triggers_config(self.env_config) is not None:
+            self.triggers = DecisionTriggers(self.obs_layout, self.env_config)
+        self.aggregator: Optional[IntervalAggregator] = None
+        if not self.decision_schedule.every_step or self.triggers is not None:
+            self.aggregator = IntervalAggregator(self.obs_layout, self.env_config)
+        self._timestep = 0
+        self._last_action: Optional[Dict[str, Any]] = None
+        # True if the last observation was sent to the environment, so the next timestep waits an action.
+        self._wait_action = True
+        # Transformation of the actions and writing of the actuators (see `marl_ep_actuation`). The
+        # handles are bound in `_init_handles`.
+        self.actuation = ActuationStage(self.env_config)
+        # Timing of the callbacks (optional, see `tools.timing`). The end of the last callback is used to
+        # measure the EnergyPlus computation until the next one.
+        config = timing_config(self.env_config)
+        self.timer: Optional[CallbackTimer] = None if config is None else CallbackTimer(config['percentiles'])
+        self._callback_exit: Optional[float] = None
+        # The names are checked here because the accessors are compiled in the EnergyPlus callbacks.
+        for config_key, names in [('time_variables', TIME_VARIABLES), ('weather_variables', WEATHER_VARIABLES)]:
+            for variable in self.env_config.get(config_key, False) or []:
+                if variable not in names:
+                    raise ValueError(f'Unknown variable in {config_key}: {variable}. The options are {names}.')
+        # Weather prediction. With `forecast_seed` the noise is reproducible for each episode.
+        forecast_seed = self.env_config.get('forecast_seed', None)
+        self.weather_forecast = WeatherForecast(
+            seed=None if forecast_seed is None else [forecast_seed, self.episode]
+        )
         
         # Declaration of variables this simulation will interact with.
         self.variables: dict = self.env_config['ep_variables']
@@ -101,14 +204,23 @@ class EnergyPlusRunner:
         but will generate a warning since air boundaries are typically always open.
         """
         
-    def start(self) -> None:
+    def start(self, threaded: bool = True) -> None:
         """This method inicialize EnergyPlus. First the episode is configurate, the calling functions
         established and the thread is generated here.
+
+        Args:
+            threaded (bool): Run EnergyPlus in a new thread. If False, EnergyPlus runs in the calling
+            thread and the method returns when the simulation ends. Default is True.
         """
-        # Start a new EnergyPlus state (condition for execute EnergyPlus Python API).
-        self.energyplus_state = api.state_manager.new_state()
+        self._start_time = perf_counter()
+        # Start a new EnergyPlus state (condition for execute EnergyPlus Python API). The state of a
+        # previous episode is reused if it was given, the EnergyPlus library is loaded once per process.
+        if self.energyplus_state is None:
+            self.energyplus_state = self.api.state_manager.new_state()
+        else:
+            self.api.state_manager.reset_state(self.energyplus_state)
         
-        api.runtime.callback_begin_zone_timestep_after_init_heat_balance(self.energyplus_state, self._send_actions)
+        self.api.runtime.callback_begin_zone_timestep_after_init_heat_balance(self.energyplus_state, self._send_actions)
         """Execute the actions in the environment.
         The calling point called “BeginZoneTimestepAfterInitHeatBalance” occurs at the beginning of each
         timestep after “InitHeatBalance” executes and before “ManageSurfaceHeatBalance”. “InitHeatBalance” refers to the step in EnergyPlus modeling when the solar shading and daylighting coefficients
@@ -118,31 +230,42 @@ class EnergyPlusRunner:
         shades, change active window constructions, etc. This calling point would be an appropriate place
         to modify weather data values."""
         
-        api.runtime.callback_end_zone_timestep_after_zone_reporting(self.energyplus_state, self._collect_obs)
+        self.api.runtime.callback_end_zone_timestep_after_zone_reporting(self.energyplus_state, self._collect_obs)
         """Collect the observations after the action executions and use them to provide new actions.
         The calling point called “EndOfZoneTimestepAfterZoneReporting” occurs at the end of a zone
         timestep after output variable reporting is finalized. It is useful for preparing calculations that
         will go into effect the next timestep. Its capabilities are similar to BeginTimestepBeforePredictor,
         except that input data for current time, date, and weather data align with different timesteps."""
         
+        # The variables are requested through the API, so they are available when the output profile
+        # removes the Output:Variable objects of the model.
+        for variable, key in self.variables.values():
+            self.api.exchange.request_variable(self.energyplus_state, variable, key)
+        
         # Control of the console printing process.
-        api.runtime.set_console_output_status(self.energyplus_state, self.env_config['ep_terminal_output'])
+        self.api.runtime.set_console_output_status(self.energyplus_state, self.env_config['ep_terminal_output'])
                 
-        def _run_energyplus():
-            """Run EnergyPlus in a non-blocking way with Threads.
-            """
-            cmd_args = self.make_eplus_args()
-            print(f"running EnergyPlus with args: {cmd_args}")
-            self.sim_results = api.runtime.run_energyplus(self.energyplus_state, cmd_args)
-            self.simulation_complete = True
-            
+        if not threaded:
+            self._run_energyplus()
+            return
+        
         self.energyplus_exec_thread = threading.Thread(
-            target=_run_energyplus,
+            target=self._run_energyplus,
             args=()
         )
         # Here the thread is divide in two.
         self.energyplus_exec_thread.start()
 
+    def _run_energyplus(self) -> None:
+        """Run EnergyPlus in a non-blocking way with Threads.
+        """
+        cmd_args = self.make_eplus_args()
+        print(f"running EnergyPlus with args: {cmd_args}")
+        self.sim_results = self.api.runtime.run_energyplus(self.energyplus_state, cmd_args)
+        self.simulation_complete = True
+        # Release the environment if it is waiting an observation.
+        self.exchange.close()
+
     def _collect_obs(self, state_argument) -> None:
         """EnergyPlus callback that collects output variables, meters and actuator actions
         values and enqueue them to the EnergyPlus Environment thread.
@@ -154,178 +277,103 @@ class EnergyPlusRunner:
         # To not perform observations when the episode is ended
         if self.simulation_complete:
             return
+        timer = self.timer
+        if timer is not None:
+            start = perf_counter()
+            if self._callback_exit is not None:
+                timer.add('energyplus', start - self._callback_exit)
         
-        hour = api.exchange.hour(state_argument)
-        zone_time_step_number = api.exchange.zone_time_step_number(state_argument)
+        hour = self.api.exchange.hour(state_argument)
+        zone_time_step_number = self.api.exchange.zone_time_step_number(state_argument)
         
+        # The observation is written in place in the slots of the compiled layout.
+        values = self.obs_layout.values
         # Variables, meters and actuatos conditions as observation.
-        obs = {
-            **{
-                key: api.exchange.get_variable_value(state_argument, handle)
-                for key, handle
-                in self.var_handles.items()
-            },
-            **{
-                key: api.exchange.get_meter_value(state_argument, handle)
-                for key, handle
-                in self.meter_handles.items()
-            },
-            **{
-                key: api.exchange.get_actuator_value(state_argument, handle)
-                for key, handle
-                in self.actuator_handles.items()
-            }
-        }
-        # Upgrade the observation with the building general properties
-        building_properties = {
-            'building_area': self.env_config['episode_config']['building_area'],
-            'aspect_ratio': self.env_config['episode_config']['aspect_ratio'],
-            'window_area_relation_north': self.env_config['episode_config']['window_area_relation_north'],
-            'window_area_relation_east': self.env_config['episode_config']['window_area_relation_east'],
-            'window_area_relation_south': self.env_config['episode_config']['window_area_relation_south'],
-            'window_area_relation_west': self.env_config['episode_config']['window_area_relation_west'],
-            'inercial_mass': self.env_config['episode_config']['inercial_mass'],
-            'construction_u_factor': self.env_config['episode_config']['construction_u_factor'],
-            'E_cool_ref': self.env_config['episode_config']['E_cool_ref'],
-            'E_heat_ref': self.env_config['episode_config']['E_heat_ref'],
-        }
-        obs.update(building_properties)
+        for slot, handle in self.var_slots:
+            values[slot] = self.api.exchange.get_variable_value(state_argument, handle)
+        for slot, handle in self.meter_slots:
+            values[slot] = self.api.exchange.get_meter_value(state_argument, handle)
+        for slot, handle in self.actuator_slots:
+            values[slot] = self.api.exchange.get_actuator_value(state_argument, handle)
+        # The building general properties are written once in `_init_handles`.
         
-        # Upgrade of the timestep observation with other variables.
-        if self.env_config.get('time_variables', False):
-            time_variables_methods = {
-                'actual_date_time': api.exchange.actual_date_time(state_argument), # Gets a simple sum of the values of the date/time function. Could be used in random seeding.
-                'actual_time': api.exchange.actual_time(state_argument), # Gets a simple sum of the values of the time part of the date/time function. Could be used in random seeding.
-                'current_time': api.exchange.current_time(state_argument), # Get the current time of day in hours, where current time represents the end time of the current time step.
-                'day_of_month': api.exchange.day_of_month(state_argument), # Get the current day of month (1-31)
-                'day_of_week': api.exchange.day_of_week(state_argument), # Get the current day of the week (1-7)
-                'day_of_year': api.exchange.day_of_year(state_argument), # Get the current day of the year (1-366)
-                'holiday_index': api.exchange.holiday_index(state_argument), # Gets a flag for the current day holiday type: 0 is no holiday, 1 is holiday type #1, etc.
-                'hour': api.exchange.hour(state_argument), # Get the current hour of the simulation (0-23)
-                'minutes': api.exchange.minutes(state_argument), # Get the current minutes into the hour (1-60)
-                'month': api.exchange.month(state_argument), # Get the current month of the simulation (1-12)
-                'num_time_steps_in_hour': api.exchange.num_time_steps_in_hour(state_argument), # Returns the number of zone time steps in an hour, which is currently a constant value throughout a simulation.
-                'system_time_step': api.exchange.system_time_step(state_argument), # Gets the current system time step value in EnergyPlus. The system time step is variable and fluctuates during the simulation.
-                'year': api.exchange.year(state_argument), # Get the “current” year of the simulation, read from the EPW. All simulations operate at a real year, either user specified or automatically selected by EnergyPlus based on other data (start day of week + leap year option).
-                'zone_time_step': api.exchange.zone_time_step(state_argument), # Gets the current zone time step value in EnergyPlus. The zone time step is variable and fluctuates during the simulation.
-                'zone_time_step_number': api.exchange.zone_time_step_number(state_argument) # The current zone time step index, from 1 to the number of zone time steps per hour
-            }
-            time_variables_list = self.env_config['time_variables']
-            time_variables_dict = {}
-            for variable in time_variables_list:
-                time_variables_dict[variable] = time_variables_methods[variable]
-            
-            obs.update(time_variables_dict)
-            
-        if self.env_config.get('weather_variables', False):
-            weather_variables_methods = {
-                'is_raining': api.exchange.is_raining(state_argument), # Gets a flag for whether the it is currently raining. The C API returns an integer where 1 is yes and 0 is no, this simply wraps that with a bool conversion.
-                'sun_is_up': api.exchange.sun_is_up(state_argument), # Gets a flag for whether the sun is currently up. The C API returns an integer where 1 is yes and 0 is no, this simply wraps that with a bool conversion.
-                # Gets the specified weather data at the specified hour and time step index within that hour
-                'today_weather_albedo_at_time': api.exchange.today_weather_albedo_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_beam_solar_at_time': api.exchange.today_weather_beam_solar_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_diffuse_solar_at_time': api.exchange.today_weather_diffuse_solar_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_horizontal_ir_at_time': api.exchange.today_weather_horizontal_ir_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_is_raining_at_time': api.exchange.today_weather_is_raining_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_is_snowing_at_time': api.exchange.today_weather_is_snowing_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_liquid_precipitation_at_time': api.exchange.today_weather_liquid_precipitation_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_outdoor_barometric_pressure_at_time': api.exchange.today_weather_outdoor_barometric_pressure_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_outdoor_dew_point_at_time': api.exchange.today_weather_outdoor_dew_point_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_outdoor_dry_bulb_at_time': api.exchange.today_weather_outdoor_dry_bulb_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_outdoor_relative_humidity_at_time': api.exchange.today_weather_outdoor_relative_humidity_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_sky_temperature_at_time': api.exchange.today_weather_sky_temperature_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_wind_direction_at_time': api.exchange.today_weather_wind_direction_at_time(state_argument, hour, zone_time_step_number),
-                'today_weather_wind_speed_at_time': api.exchange.today_weather_wind_speed_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_albedo_at_time': api.exchange.tomorrow_weather_albedo_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_beam_solar_at_time': api.exchange.tomorrow_weather_beam_solar_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_diffuse_solar_at_time': api.exchange.tomorrow_weather_diffuse_solar_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_horizontal_ir_at_time': api.exchange.tomorrow_weather_horizontal_ir_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_is_raining_at_time': api.exchange.tomorrow_weather_is_raining_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_is_snowing_at_time': api.exchange.tomorrow_weather_is_snowing_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_liquid_precipitation_at_time': api.exchange.tomorrow_weather_liquid_precipitation_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_outdoor_barometric_pressure_at_time': api.exchange.tomorrow_weather_outdoor_barometric_pressure_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_outdoor_dew_point_at_time': api.exchange.tomorrow_weather_outdoor_dew_point_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_outdoor_dry_bulb_at_time': api.exchange.tomorrow_weather_outdoor_dry_bulb_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_outdoor_relative_humidity_at_time': api.exchange.tomorrow_weather_outdoor_relative_humidity_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_sky_temperature_at_time': api.exchange.tomorrow_weather_sky_temperature_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_wind_direction_at_time': api.exchange.tomorrow_weather_wind_direction_at_time(state_argument, hour, zone_time_step_number),
-                'tomorrow_weather_wind_speed_at_time': api.exchange.tomorrow_weather_wind_speed_at_time(state_argument, hour, zone_time_step_number)
-            }
-            weather_variables_list = self.env_config['weather_variables']
-            weather_variables_dict = {}
-            for variable in weather_variables_list:
-                weather_variables_dict[variable] = weather_variables_methods[variable]
-            
-            obs.update(weather_variables_dict)
+        triggers = self.triggers
+        if triggers is not None:
+            self._read_accessors(state_argument, hour, zone_time_step_number)
         
-        # Weather prediction of 24 hours
-        weather_pred = {}
-        # The list sigma_max contains the standard deviation of the predictions in the following order:
-        #   - Dry Bulb Temperature in °C with squer desviation of 2.05 °C, 
-        #   - Relative Humidity in % with squer desviation of 20%, 
-        #   - Wind Direction in degree with squer desviation of 40°, 
-        #   - Wind Speed in m/s with squer desviation of 3.41 m/s, 
-        #   - Barometric pressure in Pa with a standart deviation of 1000 Pa, 
-        #   - Liquid Precipitation Depth in mm with desviation of 0.5 mm.
-        sigma_max = np.array([1.43178211, 4.47213595, 6.32455532, 1.84661853, 31.62, 0.707107])
-        for h in range(24):
-            # For each hour, the sigma value goes from a minimum error of zero to the value listed in sigma_max following a linear function:
-            sigma = sigma_max * (h/23)
-            prediction_hour = hour+1 + h
-            if prediction_hour < 24:
-                weather_pred.update({
-                    f'today_weather_liquid_precipitation_at_time_{prediction_hour}': np.random.normal(api.exchange.today_weather_liquid_precipitation_at_time(state_argument, prediction_hour, 0), sigma[5]),
-                    f'today_weather_outdoor_barometric_pressure_at_time{prediction_hour}': np.random.normal(api.exchange.today_weather_outdoor_barometric_pressure_at_time(state_argument, prediction_hour, 0), sigma[4]),
-                    f'today_weather_outdoor_dry_bulb_at_time{prediction_hour}': np.random.normal(api.exchange.today_weather_outdoor_dry_bulb_at_time(state_argument, prediction_hour, 0), sigma[0]),
-                    f'today_weather_outdoor_relative_humidity_at_time{prediction_hour}': np.random.normal(api.exchange.today_weather_outdoor_relative_humidity_at_time(state_argument, prediction_hour, 0), sigma[1]),
-                    f'today_weather_wind_direction_at_time{prediction_hour}': np.random.normal(api.exchange.today_weather_wind_direction_at_time(state_argument, prediction_hour, 0), sigma[2]),
-                    f'today_weather_wind_speed_at_time{prediction_hour}': np.random.normal(api.exchange.today_weather_wind_speed_at_time(state_argument, prediction_hour, 0), sigma[3]),
-                })
+        # In the timesteps without decision the values are only aggregated and the environment is not waked.
+        aggregator = self.aggregator
+        if aggregator is not None:
+            aggregator.add(values)
+            if triggers is None:
+                self._wait_action = self.decision_schedule.is_decision(self._timestep)
             else:
-                prediction_hour_t = prediction_hour - 24
-                weather_pred.update({
-                    f'tomorrow_weather_liquid_precipitation_at_time{prediction_hour_t}': np.random.normal(api.exchange.tomorrow_weather_liquid_precipitation_at_time(state_argument, prediction_hour_t, 0), sigma[5]),
-                    f'tomorrow_weather_outdoor_barometric_pressure_at_time{prediction_hour_t}': np.random.normal(api.exchange.tomorrow_weather_outdoor_barometric_pressure_at_time(state_argument, prediction_hour_t, 0), sigma[4]),
-                    f'tomorrow_weather_outdoor_dry_bulb_at_time{prediction_hour_t}': np.random.normal(api.exchange.tomorrow_weather_outdoor_dry_bulb_at_time(state_argument, prediction_hour_t, 0), sigma[0]),
-                    f'tomorrow_weather_outdoor_relative_humidity_at_time{prediction_hour_t}': np.random.normal(api.exchange.tomorrow_weather_outdoor_relative_humidity_at_time(state_argument, prediction_hour_t, 0), sigma[1]),
-                    f'tomorrow_weather_wind_direction_at_time{prediction_hour_t}': np.random.normal(api.exchange.tomorrow_weather_wind_direction_at_time(state_argument, prediction_hour_t, 0), sigma[2]),
-                    f'tomorrow_weather_wind_speed_at_time{prediction_hour_t}': np.random.normal(api.exchange.tomorrow_weather_wind_speed_at_time(state_argument, prediction_hour_t, 0), sigma[3]),
-                })
-        obs.update(weather_pred)
+                self._wait_action = triggers.decide(values, self.decision_schedule.is_start(self._timestep))
+            if not self._wait_action:
+                self._step_api_calls += self._skip_api_calls
+                if timer is not None:
+                    self._callback_exit = perf_counter()
+                    timer.add('collect_obs', self._callback_exit - start)
+                return
+            aggregator.write(values)
         
-        # Set the variables in the infos dict before to delete from the obs dict.
-        infos_dict = {}
-        if self.env_config.get('infos_variables', False):
-            for variable in self.env_config['infos_variables']:
-                infos_dict[variable] = obs[variable]
+        if triggers is None:
+            self._read_accessors(state_argument, hour, zone_time_step_number)
         
-        infos = {}
-        for agent in self.env_config['agent_ids']:
-            infos[agent] = infos_dict
-        
-        self.infos_queue.put(infos)
-        self.infos_event.set()
+        # Weather prediction of 24 hours. The hourly weather is read once per simulated day
+        # and the noise of the 24 hours is drawn in a single call.
+        day_of_year = self.api.exchange.day_of_year(state_argument)
+        self._step_api_calls += self._obs_api_calls
+        if self.weather_forecast.needs_update(day_of_year):
+            self.weather_forecast.update(day_of_year, self._read_weather_days(state_argument))
+            self._step_api_calls += 2*FORECAST_HOURS*len(FORECAST_VARIABLES)
+        self.weather_forecast.predict(hour, out=self.obs_layout.forecast)
+
+        # Set the variables in the infos dict, including the no observable variables.
+        infos = self.obs_layout.infos()
         
-        if self.env_config.get('no_observable_variables', False):
-            for variable in self.env_config['no_observable_variables']:
-                del obs[variable]
+        # Transform the observation in a numpy array to meet the condition expected in a RLlib Environment.
+        # The no observable variables are not part of the layout observation.
+        next_obs_dict = self.obs_layout.observations()
         
         # save the last obs and infos dicts.
-        self.obs = obs
+        self.obs = next_obs_dict
         self.infos = infos
+        self._count_step_api_calls()
         
-        # Transform the observation in a numpy array to meet the condition expected in a RLlib Environment
-        next_obs = np.array(list(obs.values()))
-        
-        next_obs_dict = {}
-        agent_indicator = 1
-        for agent in self.env_config['agent_ids']:
-            next_obs_dict[agent] = np.concatenate(([agent_indicator], self.env_config['ep_actuators_type'][agent], next_obs))
-            agent_indicator += 1
-        
-        # Set the observation to communicate with the MDP.
-        self.obs_queue.put(next_obs_dict)
-        self.obs_event.set()
+        # Set the observation and infos to communicate with the MDP.
+        self.exchange.put_observation(next_obs_dict, infos)
+        if timer is not None:
+            self._callback_exit = perf_counter()
+            timer.add('collect_obs', self._callback_exit - start)
+
+    def _read_accessors(self, state_argument, hour: int, zone_time_step_number: int) -> None:
+        """Time and weather variables. Only the accessors of the requested variables are called, they
+        are compiled in `_init_handles`.
+        """
+        values = self.obs_layout.values
+        for slot, accessor in self.accessor_slots:
+            values[slot] = accessor(state_argument)
+        for slot, accessor in self.at_time_accessor_slots:
+            values[slot] = accessor(state_argument, hour, zone_time_step_number)
+
+    def _read_weather_days(self, state_argument) -> np.ndarray:
+        """Read the hourly weather of today and tomorrow used in the weather prediction.
+
+        Args:
+            state_argument (c_void_p): EnergyPlus state pointer. This is created with `api.state_manager.new_state()`.
+
+        Returns:
+            np.ndarray: Array of shape (48, 6) with the columns in the order of FORECAST_VARIABLES.
+        """
+        table = np.empty((2*FORECAST_HOURS, len(FORECAST_VARIABLES)))
+        for n, variable in enumerate(FORECAST_VARIABLES):
+            today = getattr(self.api.exchange, f'today_weather_{variable}_at_time')
+            tomorrow = getattr(self.api.exchange, f'tomorrow_weather_{variable}_at_time')
+            for h in range(FORECAST_HOURS):
+                table[h, n] = today(state_argument, h, 0)
+                table[FORECAST_HOURS + h, n] = tomorrow(state_argument, h, 0)
+        return table
 
     def _collect_first_obs(self, state_argument):
         """This method is used to collect only the first observation of the environment when the episode beggins.
@@ -350,61 +398,83 @@ class EnergyPlusRunner:
         # and there are not observations.
         if self.simulation_complete:
             return
+        timer = self.timer
+        if timer is not None and self._callback_exit is not None:
+            timer.add('energyplus', perf_counter() - self._callback_exit)
         
         # If is the first timestep, obtain the first observation before to consult for an action
         if self.first_observation:
+            # Hook executed once in the first timestep after the warmup period (e.g. to fork the
+            # warmed simulation, see `marl_ep_fork`).
+            if self.on_warmup_complete is not None:
+                self.on_warmup_complete(state_argument)
+                if self.simulation_complete:
+                    return
             self._collect_first_obs(state_argument)
             
-        # Wait for an action.
-        event_flag = self.act_event.wait(120)
-        if not event_flag:
-            print('The time waiting an action was over.')
-            return
-        
-        # Get the central action from the EnergyPlus Environment `step` method.
-        # In the case of simple agent a int value and for multiagents a dictionary.
-        dict_action = self.act_queue.get()
-        
-        # Validate if the action must be transformed
-        if self.env_config.get('action_transformer', False):
-            action_transformer = self.env_config['action_transformer']
-            dict_action_transformed = {}
-            # Transform all the actions
-            for agent in self.env_config['agent_ids']:
-                dict_action_transformed[agent] = action_transformer(agent, dict_action[agent])
-            dict_action = dict_action_transformed
+        # In the timesteps without decision the last action is applied again (see `marl_ep_decision`
+        # and `marl_ep_triggers`).
+        self._timestep += 1
+        if self._last_action is not None and not self._wait_action:
+            if timer is not None:
+                write_start = perf_counter()
+            dict_action = self._last_action
+        else:
+            # Wait for the central action from the EnergyPlus Environment `step` method.
+            # In the case of simple agent a int value and for multiagents a dictionary.
+            if timer is not None:
+                wait_start = perf_counter()
+            try:
+                dict_action = self.exchange.get_action(timeout=120)
+            except Empty:
+                print('The time waiting an action was over.')
+                return
+            except ExchangeClosed:
+                # `stop()` close the exchange to release this callback.
+                return
+            if dict_action is None or self.simulation_complete:
+                return
+            if timer is not None:
+                write_start = perf_counter()
+                timer.add('action_wait', write_start - wait_start)
+            self._last_action = dict_action
         
-        # Perform the actions in EnergyPlus simulation.       
-        for agent in self.env_config['agent_ids']:
-            api.exchange.set_actuator_value(
-                state=state_argument,
-                actuator_handle=self.actuator_handles[agent],
-                actuator_value=dict_action[agent]
-            )
+        # Perform the actions in EnergyPlus simulation. The actions are transformed with the compiled
+        # tables of the `action_transformer` and only the actuators whose value changed are written.
+        self._step_api_calls += self.actuation.write(state_argument, dict_action)
+        if timer is not None:
+            self._callback_exit = perf_counter()
+            timer.add('actuator_write', self._callback_exit - write_start)
        
     def _init_callback(self, state_argument) -> bool:
         """Initialize EnergyPlus handles and checks if simulation runtime is ready"""
         self.init_handles = self._init_handles(state_argument)
-        self.initialized = self.init_handles \
-            and not api.exchange.warmup_flag(state_argument)
+        initialized = self.init_handles \
+            and not self.api.exchange.warmup_flag(state_argument)
+        self._step_api_calls += self.init_handles
+        if initialized and not self.initialized:
+            self.timings['warmup_s'] = perf_counter() - self._handles_time
+            # The calls of the warmup period are not counted in the steps.
+            self._step_api_calls = 1
+        self.initialized = initialized
         return self.initialized
 
     def _init_handles(self, state_argument):
         """Initialize sensors/actuators handles to interact with during simulation"""
         if not self.init_handles:
-            if not api.exchange.api_data_fully_ready(state_argument):
+            if not self.api.exchange.api_data_fully_ready(state_argument):
                 return False
                 
             self.var_handles = {
-                key: api.exchange.get_variable_handle(state_argument, *var)
+                key: self.api.exchange.get_variable_handle(state_argument, *var)
                 for key, var in self.variables.items()
             }
             self.meter_handles = {
-                key: api.exchange.get_meter_handle(state_argument, meter)
+                key: self.api.exchange.get_meter_handle(state_argument, meter)
                 for key, meter in self.meters.items()
             }
             self.actuator_handles = {
-                key: api.exchange.get_actuator_handle(state_argument, *actuator)
+                key: self.api.exchange.get_actuator_handle(state_argument, *actuator)
                 for key, actuator in self.actuators.items()
             }
             for handles in [
@@ -413,7 +483,7 @@ class EnergyPlusRunner:
                 self.actuator_handles
             ]:
                 if any([v == -1 for v in handles.values()]):
-                    available_data = api.exchange.list_available_api_data_csv(state_argument).decode('utf-8')
+                    available_data = self.api.exchange.list_available_api_data_csv(state_argument).decode('utf-8')
                     print(
                         f"got -1 handle, check your var/meter/actuator names:\n"
                         f"> variables: {self.var_handles}\n"
@@ -421,22 +491,85 @@ class EnergyPlusRunner:
                         f"> actuators: {self.actuator_handles}\n"
                         f"> available EnergyPlus API data: {available_data}"
                     )
-                
+            
+            # Bind each handle to the slot of the observation layout.
+            index = self.obs_layout.index
+            self.var_slots = [(index[key], handle) for key, handle in self.var_handles.items()]
+            self.meter_slots = [(index[key], handle) for key, handle in self.meter_handles.items()]
+            self.actuator_slots = [(index[key], handle) for key, handle in self.actuator_handles.items()]
+            self.actuation.bind(self.api.exchange, self.actuator_handles)
+            self._compile_accessors()
+            self.obs_layout.fill_building_properties(self.env_config['episode_config'])
+            
+            self._handles_time = perf_counter()
+            self.timings['startup_s'] = self._handles_time - self._start_time
             self.init_handles = True
         return True
 
-    def stop(self) -> None:
+    def _compile_accessors(self) -> None:
+        """Bind the `api.exchange` methods of `time_variables` and `weather_variables` to their slots of
+        the observation layout, so each timestep calls only the methods of the requested variables.
+        """
+        index = self.obs_layout.index
+        self.accessor_slots = []
+        self.at_time_accessor_slots = []
+        for config_key in ['time_variables', 'weather_variables']:
+            for variable in self.env_config.get(config_key, False) or []:
+                accessor = getattr(self.api.exchange, variable)
+                if variable.endswith('_at_time'):
+                    self.at_time_accessor_slots.append((index[variable], accessor))
+                else:
+                    self.accessor_slots.append((index[variable], accessor))
+        # Calls of each observation: hour, zone_time_step_number, day_of_year and the compiled slots. The
+        # timesteps without decision only read hour, zone_time_step_number and the handles, and the
+        # accessors too with triggers.
+        n_accessors = len(self.accessor_slots) + len(self.at_time_accessor_slots)
+        self._skip_api_calls = 2 + len(self.var_slots) + len(self.meter_slots) + len(self.actuator_slots)
+        self._obs_api_calls = self._skip_api_calls + 1 + n_accessors
+        if self.triggers is not None:
+            self._skip_api_calls += n_accessors
+
+    def _count_step_api_calls(self) -> None:
+        """Close the count of `api.exchange` calls of the step, that ends with the observation."""
+        calls = self.api_calls
+        calls['steps'] += 1
+        calls['total'] += self._step_api_calls
+        calls['last_step'] = self._step_api_calls
+        calls['per_step'] = calls['total'] / calls['steps']
+        self._step_api_calls = 0
+
+    def stop(self, delete_state: bool = True) -> Any:
         """Method to stop EnergyPlus simulation and joint the threads.
+        
+        The exchange is closed to release the callbacks that are waiting an action, so the method
+        returns as soon as the simulation is stopped.
+
+        Args:
+            delete_state (bool): Delete the EnergyPlus state. If False, the state is returned to be reused
+            by the runner of the next episode. Default is True.
+
+        Returns:
+            Any: The EnergyPlus state if it was not deleted, else None.
         """
-        if not self.simulation_complete:
-            self.simulation_complete = True
-        sleep(3)
-        self._flush_queues()
-        self.energyplus_exec_thread.join()
-        self.energyplus_exec_thread = None
+        teardown_start = perf_counter()
+        self.simulation_complete = True
+        if self.energyplus_exec_thread is not None:
+            if self.energyplus_exec_thread.is_alive():
+                self.api.runtime.stop_simulation(self.energyplus_state)
+            # Release the callback blocked waiting an action.
+            self.exchange.close()
+            self.energyplus_exec_thread.join()
+            self.energyplus_exec_thread = None
+        self.exchange.close()
         self.first_observation = True
-        api.runtime.clear_callbacks()
-        api.state_manager.delete_state(self.energyplus_state)  
+        self.api.runtime.clear_callbacks()
+        energyplus_state = self.energyplus_state
+        if delete_state and energyplus_state is not None:
+            self.api.state_manager.delete_state(energyplus_state)
+            energyplus_state = None
+        self.energyplus_state = energyplus_state
+        self.timings['teardown_s'] = perf_counter() - teardown_start
+        return energyplus_state
 
     def failed(self) -> bool:
         """This method tells if a EnergyPlus simulations was finished successfully or not.
@@ -455,13 +588,7 @@ class EnergyPlusRunner:
             self.env_config["epw"] if self.env_config['is_test'] else self.env_config["epw_training"],
             "-d",
             f"{self.env_config['output']}/episode-{self.episode:08}",
-            self.env_config["epjson"]
+            # Model with the output profile of the training applied (see `tools/output_profile`).
+            profiled_epjson(self.env_config)
         ]
         return eplus_args
-    
-    def _flush_queues(self):
-        """Method to liberate the space in the different queue objects.
-        """
-        for q in [self.obs_queue, self.act_queue, self.infos_queue]:
-            while not q.empty():
-                q.get()
@@ -0,0 +1,284 @@
+"""# SUBPROCESS ENERGYPLUS RUNNER
+
+This script contain the execution mode where EnergyPlus runs in a child process instead of a thread
+of the RLlib worker. The Python callbacks of EnergyPlus do not compete for the GIL with the policy
+and a crash of EnergyPlus does not take the worker down.
+
+The observations and the actions are exchanged through a `multiprocessing.shared_memory` block with a
+fixed layout of floats (the observation of each agent, the infos variables and the action of each
+agent) and two semaphores, one for each direction. The objects are the same of `StepExchange`, so the
+`EnergyPlusRunner` is used without changes in the child process.
+
+To use it, add the following to the env_config:
+
+    env_config = {
+        ...
+        'energyplus_backend': 'subprocess', # default is 'thread'
+    }
+
+The env_config must be picklable because the child process is started with the 'spawn' method. The keys
+in `ENV_SIDE_KEYS` (e.g. the reward function) are not sent to the child process.
+"""
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory
+from queue import Empty
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from eprllib.env.multiagent.marl_ep_obs_layout import ObservationLayout
+from eprllib.env.multiagent.marl_ep_exchange import ExchangeClosed
+
+# Index of the control values at the start of the block.
+_CLOSED = 0
+_SIM_RESULTS = 1
+_OBS_PENDING = 2
+_CONTROL_LEN = 3
+# Interval in seconds to check if the child process is alive while waiting.
+_POLL_INTERVAL = 1.
+# Keys of the env_config used only in the environment side, that are not sent to the child process.
+ENV_SIDE_KEYS = ['episode_pregeneration', 'episode_config_fn', 'episode_len_fn', 'reward_function']
+
+class SharedMemoryExchange:
+    def __init__(
+        self,
+        agent_ids: List[str],
+        obs_dim: int,
+        infos_variables: List[str],
+        name: Optional[str] = None,
+        semaphores: Optional[Tuple[Any, Any]] = None
+        ) -> None:
+        """Exchange with the interface of `StepExchange` that works between processes.
+
+        The block is created when `name` is None (parent side) and attached otherwise (child side, see
+        `attach_args`).
+
+        Args:
+            agent_ids (List[str]): Agents, in the order of the rows of the block.
+            obs_dim (int): Length of the observation of each agent.
+            infos_variables (List[str]): Variables of the infos dict, shared by all the agents.
+            name (Optional[str]): Name of the shared memory block to attach. Default is None.
+            semaphores (Optional[Tuple[Any, Any]]): Semaphores of the observation and the action to attach.
+            Default is None.
+        """
+        self.agent_ids = agent_ids
+        self.obs_dim = obs_dim
+        self.infos_variables = infos_variables
+        n_agents = len(agent_ids)
+        n_values = _CONTROL_LEN + n_agents*obs_dim + len(infos_variables) + n_agents
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=n_values*8)
+            context = multiprocessing.get_context('spawn')
+            self.semaphores = (context.Semaphore(0), context.Semaphore(0))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.semaphores = semaphores
+        self._obs_ready, self._action_ready = self.semaphores
+        # Views of the block.
+        buffer = np.ndarray((n_values,), dtype=np.float64, buffer=self.shm.buf)
+        self.control = buffer[:_CONTROL_LEN]
+        start = _CONTROL_LEN
+        self.obs = buffer[start:start + n_agents*obs_dim].reshape(n_agents, obs_dim)
+        start += n_agents*obs_dim
+        self.infos = buffer[start:start + len(infos_variables)]
+        start += len(infos_variables)
+        self.action = buffer[start:start + n_agents]
+        if self.owner:
+            buffer[:] = 0.
+        # Process on the other side, checked while waiting.
+        self.peer: Optional[multiprocessing.Process] = None
+
+    @classmethod
+    def from_env_config(cls, env_config: Dict[str, Any]) -> 'SharedMemoryExchange':
+        """Create the block with the layout of the observation defined in the env_config.
+        """
+        layout = ObservationLayout(env_config)
+        return cls(layout.agent_ids, layout.obs_dim, [variable for variable, _ in layout.infos_slots])
+
+    def attach_args(self) -> Tuple[List[str], int, List[str], str, Tuple[Any, Any]]:
+        """Arguments to attach the block in the child process with `SharedMemoryExchange(*args)`.
+        """
+        return self.agent_ids, self.obs_dim, self.infos_variables, self.shm.name, self.semaphores
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.control[_CLOSED])
+
+    def _acquire(self, semaphore, timeout: Optional[float]) -> None:
+        """Wait the semaphore, checking that the process of the other side is alive.
+        """
+        deadline = None if timeout is None else perf_counter() + timeout
+        while True:
+            wait = _POLL_INTERVAL if deadline is None else min(_POLL_INTERVAL, deadline - perf_counter())
+            if semaphore.acquire(timeout=max(wait, 0.)):
+                return
+            if self.peer is not None and not self.peer.is_alive():
+                self.control[_CLOSED] = 1.
+                raise ExchangeClosed
+            if deadline is not None and perf_counter() >= deadline:
+                raise Empty
+
+    def put_observation(self, obs: Dict[str, np.ndarray], infos: Dict[str, Dict[str, float]]) -> None:
+        """Write the observation and infos of the timestep. It is called by the runner.
+        """
+        if self.closed:
+            return
+        for row, agent in enumerate(self.agent_ids):
+            self.obs[row] = obs[agent]
+        if self.agent_ids:
+            agent_infos = infos[self.agent_ids[0]]
+            for n, variable in enumerate(self.infos_variables):
+                self.infos[n] = agent_infos[variable]
+        self.control[_OBS_PENDING] = 1.
+        self._obs_ready.release()
+
+    def get_observation(self, timeout: Optional[float] = None) -> Tuple[Dict[str, np.ndarray], Dict[str, Dict[str, float]]]:
+        """Wait the observation and infos of the timestep. It is called by the environment.
+
+        Raises:
+            Empty: If the timeout is over.
+            ExchangeClosed: If the exchange is closed or the EnergyPlus process is ended, and there is
+            not an observation pending.
+        """
+        if self.closed and not self.control[_OBS_PENDING]:
+            raise ExchangeClosed
+        self._acquire(self._obs_ready, timeout)
+        if not self.control[_OBS_PENDING]:
+            raise ExchangeClosed
+        self.control[_OBS_PENDING] = 0.
+        block = self.obs.astype(np.float32)
+        infos_dict = dict(zip(self.infos_variables, self.infos.tolist()))
+        obs = {agent: block[row] for row, agent in enumerate(self.agent_ids)}
+        return obs, {agent: infos_dict for agent in self.agent_ids}
+
+    def put_action(self, action: Dict[str, Any]) -> None:
+        """Write the action of the timestep. It is called by the environment.
+        """
+        if self.closed:
+            return
+        for n, agent in enumerate(self.agent_ids):
+            self.action[n] = action[agent]
+        self._action_ready.release()
+
+    def get_action(self, timeout: Optional[float] = None) -> Dict[str, float]:
+        """Wait the action of the timestep. It is called by the runner.
+
+        Raises:
+            Empty: If the timeout is over.
+            ExchangeClosed: If the exchange is closed.
+        """
+        if self.closed:
+            raise ExchangeClosed
+        self._acquire(self._action_ready, timeout)
+        if self.closed:
+            raise ExchangeClosed
+        return dict(zip(self.agent_ids, self.action.tolist()))
+
+    def close(self) -> None:
+        """Close the exchange and release the waiting sides.
+        """
+        self.control[_CLOSED] = 1.
+        self._obs_ready.release()
+        self._action_ready.release()
+
+    def release(self) -> None:
+        """Release the shared memory block. The owner also destroys it.
+        """
+        self.control = self.obs = self.infos = self.action = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def _run_subprocess(
+    episode: int,
+    env_config: Dict[str, Any],
+    attach_args: Tuple[List[str], int, List[str], str, Tuple[Any, Any]]
+    ) -> None:
+    """Main function of the EnergyPlus process.
+    """
+    # Imported here to load EnergyPlus only in the child process.
+    from eprllib.env.multiagent.marl_ep_runner import EnergyPlusRunner
+    exchange = SharedMemoryExchange(*attach_args)
+    exchange.peer = multiprocessing.parent_process()
+    runner = EnergyPlusRunner(episode=episode, env_config=env_config, exchange=exchange)
+    runner.start(threaded=False)
+    exchange.control[_SIM_RESULTS] = runner.sim_results
+    exchange.close()
+    exchange.release()
+
+class SubprocessEnergyPlusRunner:
+    def __init__(
+        self,
+        episode: int,
+        env_config: Dict[str, Any],
+        exchange: SharedMemoryExchange
+        ) -> None:
+        """Runner of the environment side for an episode simulated in a child process. It has the same
+        interface of `EnergyPlusRunner`.
+
+        Args:
+            episode (int): Episode number.
+            env_config (Dict[str, Any]): Environment configuration defined in the call to the EnergyPlus Environment.
+            exchange (SharedMemoryExchange): Exchange of the observations and actions with the child process.
+        """
+        self.episode = episode
+        self.env_config = env_config
+        self.exchange = exchange
+        self.env_config['episode'] = self.episode
+        self.process: Optional[multiprocessing.Process] = None
+        self.timings: Dict[str, float] = {'startup_s': 0., 'warmup_s': 0., 'teardown_s': 0.}
+        self._sim_results: Optional[int] = None
+
+    def start(self) -> None:
+        """Start the EnergyPlus process.
+        """
+        start_time = perf_counter()
+        context = multiprocessing.get_context('spawn')
+        self.process = context.Process(
+            target=_run_subprocess,
+            args=(
+                self.episode,
+                {key: value for key, value in self.env_config.items() if key not in ENV_SIDE_KEYS},
+                self.exchange.attach_args()
+            ),
+            daemon=True
+        )
+        self.process.start()
+        self.exchange.peer = self.process
+        self.timings['startup_s'] = perf_counter() - start_time
+
+    @property
+    def simulation_complete(self) -> bool:
+        return self.exchange.control is None or self.exchange.closed \
+            or (self.process is not None and not self.process.is_alive())
+
+    @property
+    def sim_results(self) -> int:
+        if self._sim_results is not None:
+            return self._sim_results
+        if self.process is not None and not self.process.is_alive() and self.process.exitcode != 0:
+            # EnergyPlus crashed.
+            return 1
+        return int(self.exchange.control[_SIM_RESULTS]) if self.exchange.control is not None else 0
+
+    def stop(self, delete_state: bool = True) -> None:
+        """Stop the EnergyPlus process and release the shared memory block.
+        """
+        teardown_start = perf_counter()
+        if self.process is not None:
+            self._sim_results = self.sim_results
+            self.exchange.close()
+            if self.process.is_alive():
+                # The episode is discarded, so the process is terminated instead of simulating until the end.
+                self.process.terminate()
+            self.process.join()
+            self.process = None
+            self.exchange.release()
+        self.timings['teardown_s'] = perf_counter() - teardown_start
+        return None
+
+    def failed(self) -> bool:
+        """This method tells if a EnergyPlus simulations was finished successfully or not.
+        """
+        return self.sim_results != 0
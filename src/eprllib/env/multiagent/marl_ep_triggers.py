@@ -0,0 +1,153 @@
+"""# DECISION TRIGGERS
+
+This script contain the event-triggered decision points of the environment. With `decision_triggers`
+the runner evaluates cheap predicates on the raw values of each timestep and only wakes the environment
+when one of them fires. In the other timesteps the last action is applied again and the observation is
+aggregated like with `decision_interval` (see `marl_ep_decision`).
+
+The predicates compare the values of the timestep with the values of the previous one:
+
+- 'crossing': the variable crosses one of the `thresholds` (e.g. the limits of the comfort band).
+- 'change': the variable changes more than `tolerance` (default 0, e.g. the occupancy).
+- 'onset': the variable becomes different of zero (e.g. `is_raining` or the arrival of the occupants).
+
+Besides, all the agents decide when `max_hold` timesteps passed since the last decision and at the
+start of each `cut_episode_len` episode, so the truncation of the episodes is not changed.
+
+To use it, add the following to the env_config:
+
+    env_config = {
+        ...
+        'decision_triggers': {
+            'max_hold': 12, # optional, maximum timesteps between two decisions
+            'triggers': [
+                {'type': 'crossing', 'variable': 'Ti', 'thresholds': [20., 26.]},
+                {'type': 'change', 'variable': 'occupancy'},
+                {'type': 'onset', 'variable': 'is_raining'}, # requires 'is_raining' in weather_variables
+            ],
+        },
+    }
+
+The variables can be any element of the observation layout, including the no observable variables.
+The timesteps elapsed since the previous decision are added to the infos of each agent with the key
+'elapsed_timesteps', so the discount of the transition can be gamma**elapsed_timesteps (see
+`tools.callbacks.SemiMDPDiscountCallbacks`).
+"""
+import numpy as np
+from typing import Any, Dict, Optional
+
+from eprllib.env.multiagent.marl_ep_obs_layout import ObservationLayout, ELAPSED_NAME
+
+TRIGGER_TYPES = ['crossing', 'change', 'onset']
+
+def triggers_config(env_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Configuration of the triggers, or None if they are not enabled.
+
+    Raises:
+        ValueError: If a trigger type is unknown, a 'crossing' trigger has no thresholds, `max_hold` is
+        not a positive integer or `decision_interval` is also used.
+    """
+    config = env_config.get('decision_triggers', False)
+    if not config:
+        return None
+    interval = env_config.get('decision_interval', 1) or 1
+    if interval != 1:
+        raise ValueError('decision_triggers and decision_interval can not be used together, use max_hold instead.')
+    max_hold = config.get('max_hold', None)
+    if max_hold is not None and (int(max_hold) != max_hold or max_hold < 1):
+        raise ValueError(f'The max_hold of decision_triggers must be a positive integer, not {max_hold}.')
+    triggers = list(config.get('triggers', []))
+    for trigger in triggers:
+        if trigger.get('type', None) not in TRIGGER_TYPES:
+            raise ValueError(f"Unknown trigger type: {trigger.get('type', None)}. The options are {TRIGGER_TYPES}.")
+        if trigger['type'] == 'crossing' and not np.ravel(trigger.get('thresholds', [])).size:
+            raise ValueError(f"The crossing trigger of {trigger['variable']} needs thresholds.")
+    return {'max_hold': None if max_hold is None else int(max_hold), 'triggers': triggers}
+
+class DecisionTriggers:
+    def __init__(self, layout: ObservationLayout, env_config: Dict[str, Any]) -> None:
+        """Predicates of `decision_triggers` compiled to slots of the observation layout.
+
+        Args:
+            layout (ObservationLayout): Layout of the runner. It must have the 'elapsed_timesteps' slot.
+            env_config (Dict[str, Any]): Environment configuration with `decision_triggers`.
+
+        Raises:
+            ValueError: If the configuration is not valid or a variable is not in the layout.
+        """
+        config = triggers_config(env_config)
+        if config is None:
+            raise ValueError('The env_config does not have decision_triggers.')
+        self.max_hold: Optional[int] = config['max_hold']
+        crossing_slots, crossing_thresholds, change_slots, change_tolerance, onset_slots = [], [], [], [], []
+        for trigger in config['triggers']:
+            variable = trigger['variable']
+            if variable not in layout.index:
+                raise ValueError(f"The variable {variable} of the {trigger['type']} trigger is not in the observation.")
+            slot = layout.index[variable]
+            if trigger['type'] == 'crossing':
+                for threshold in np.ravel(trigger['thresholds']):
+                    crossing_slots.append(slot)
+                    crossing_thresholds.append(threshold)
+            elif trigger['type'] == 'change':
+                change_slots.append(slot)
+                change_tolerance.append(trigger.get('tolerance', 0.))
+            else:
+                onset_slots.append(slot)
+        self.crossing_slots = np.array(crossing_slots, dtype=np.int64)
+        self.crossing_thresholds = np.array(crossing_thresholds, dtype=np.float64)
+        self.change_slots = np.array(change_slots, dtype=np.int64)
+        self.change_tolerance = np.array(change_tolerance, dtype=np.float64)
+        self.onset_slots = np.array(onset_slots, dtype=np.int64)
+        self.elapsed_slot = layout.index[ELAPSED_NAME]
+        # Raw values of the previous timestep, None until the first one.
+        self.previous: Optional[np.ndarray] = None
+        # Timesteps since the last decision.
+        self.elapsed = 0
+        # Number of decisions produced by each reason. A decision can have several reasons.
+        self.counts: Dict[str, int] = {reason: 0 for reason in TRIGGER_TYPES + ['max_hold', 'start']}
+
+    def fire(self, values: np.ndarray) -> bool:
+        """Evaluate the predicates with the raw values of a timestep and save them for the next one.
+
+        Args:
+            values (np.ndarray): Raw values of the layout, before the aggregation.
+
+        Returns:
+            bool: True if any predicate fires.
+        """
+        previous = self.previous
+        if previous is None:
+            self.previous = values.copy()
+            return False
+        crossing = bool(((values[self.crossing_slots] >= self.crossing_thresholds)
+            != (previous[self.crossing_slots] >= self.crossing_thresholds)).any())
+        change = bool((np.abs(values[self.change_slots] - previous[self.change_slots]) > self.change_tolerance).any())
+        onset = bool(((values[self.onset_slots] != 0) & (previous[self.onset_slots] == 0)).any())
+        np.copyto(previous, values)
+        self.counts['crossing'] += crossing
+        self.counts['change'] += change
+        self.counts['onset'] += onset
+        return crossing or change or onset
+
+    def decide(self, values: np.ndarray, start: bool) -> bool:
+        """Decide if the environment is waked in a timestep. With a decision, the elapsed timesteps are
+        written in their slot and the count starts again.
+
+        Args:
+            values (np.ndarray): Raw values of the layout, before the aggregation.
+            start (bool): The next timestep starts an episode, so all the agents must decide.
+
+        Returns:
+            bool: True if the agents take a decision for the next timestep.
+        """
+        self.elapsed += 1
+        fired = self.fire(values)
+        hold = self.max_hold is not None and self.elapsed >= self.max_hold
+        self.counts['max_hold'] += hold
+        self.counts['start'] += start
+        if not (fired or hold or start):
+            return False
+        values[self.elapsed_slot] = self.elapsed
+        self.elapsed = 0
+        return True
@@ -0,0 +1,163 @@
+"""# ENERGYPLUS VECTOR ENVIRONMENT
+
+This script define a batched environment that drives N EnergyPlus simulations (e.g. N buildings) from
+a single worker. The observations are returned stacked in an array of shape (N, n_agents, obs_dim) and
+the actions are received in an array of shape (N, n_agents), so the policy inference can be done in a
+single batch for all the buildings.
+
+The simulations are stepped concurrently: `step_async` sends the actions to all the EnergyPlus
+simulations and `step_wait` collects the observations. Use `'energyplus_backend': 'subprocess'` in the
+env_config to simulate each building in its own process (see `marl_ep_subprocess`).
+
+Example:
+```
+>>> vector_env = EnergyPlusVectorEnv(env_config, num_envs=4)
+>>> obs, infos = vector_env.reset()
+>>> obs.shape
+(4, 2, 167)
+>>> obs, rewards, terminateds, truncateds, infos = vector_env.step(actions)
+```
+"""
+import os
+import copy
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from eprllib.env.multiagent.marl_ep_gym_env import EnergyPlusEnv_v0
+
+class EnergyPlusVectorEnv:
+    def __init__(
+        self,
+        env_config: Dict[str, Any],
+        num_envs: int,
+        env_config_fn: Optional[Callable[[Dict[str, Any], int], Dict[str, Any]]] = None
+        ) -> None:
+        """Create `num_envs` EnergyPlus environments with the same configuration.
+
+        Args:
+            env_config (Dict[str, Any]): Environment configuration, like in `EnergyPlusEnv_v0`. Each
+            environment writes its outputs in the subfolder `env-{index:03}` of `env_config['output']`.
+            num_envs (int): Number of environments.
+            env_config_fn (Optional[Callable[[Dict[str, Any], int], Dict[str, Any]]]): Function that take
+            the copy of the env_config and the index of the environment and return it modified, e.g. to
+            use a different building in each environment. Default is None.
+        """
+        if num_envs < 1:
+            raise ValueError('num_envs must be greater than zero')
+        self.num_envs = num_envs
+        self.envs: List[EnergyPlusEnv_v0] = []
+        for index in range(num_envs):
+            config = dict(env_config)
+            # The nested dicts that the episode configuration modify must not be shared.
+            for key in ['episode_config', 'reward_function_config']:
+                if key in config:
+                    config[key] = copy.deepcopy(config[key])
+            config['output'] = os.path.join(env_config['output'], f'env-{index:03}')
+            if env_config_fn is not None:
+                config = env_config_fn(config, index)
+            self.envs.append(EnergyPlusEnv_v0(config))
+
+        self.agent_ids: List[str] = list(self.envs[0].env_config['agent_ids'])
+        self.observation_space = self.envs[0].observation_space
+        self.action_space = self.envs[0].action_space
+        self.obs_dim = self.observation_space.shape[0]
+
+        # Buffers of the batch.
+        self.obs = np.zeros((num_envs, len(self.agent_ids), self.obs_dim), dtype=np.float32)
+        self.rewards = np.zeros((num_envs, len(self.agent_ids)), dtype=np.float64)
+        self.terminateds = np.zeros(num_envs, dtype=bool)
+        self.truncateds = np.zeros(num_envs, dtype=bool)
+
+    def _write_obs(self, index: int, obs: Dict[str, np.ndarray]) -> None:
+        # With decision intervals per agent, the agents without decision keep their last observation.
+        for row, agent in enumerate(self.agent_ids):
+            if agent in obs:
+                self.obs[index, row] = obs[agent]
+
+    def reset(self, *, seed: Optional[int] = None) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """Reset all the environments. The warmup periods are simulated concurrently.
+
+        Args:
+            seed (Optional[int]): Seed passed to the environments. Default is None.
+
+        Returns:
+            Tuple[np.ndarray, List[Dict[str, Any]]]: Observations of shape (N, n_agents, obs_dim) and the
+            infos dict of each environment.
+        """
+        for env in self.envs:
+            env.reset_async(seed=seed)
+        infos = []
+        for index, env in enumerate(self.envs):
+            obs, env_infos = env.reset_wait()
+            self._write_obs(index, obs)
+            infos.append(env_infos)
+        self.terminateds[:] = False
+        self.truncateds[:] = False
+        return self.obs.copy(), infos
+
+    def _action_dicts(self, actions: Union[np.ndarray, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Convert the batched actions in the action dict of each environment.
+        """
+        if isinstance(actions, np.ndarray):
+            if actions.shape[:2] != (self.num_envs, len(self.agent_ids)):
+                raise ValueError(f'actions must have shape ({self.num_envs}, {len(self.agent_ids)}, ...), got {actions.shape}')
+            return [
+                {agent: actions[index, row] for row, agent in enumerate(self.agent_ids)}
+                for index in range(self.num_envs)
+            ]
+        return list(actions)
+
+    def step_async(self, actions: Union[np.ndarray, List[Dict[str, Any]]]) -> None:
+        """Send the actions to all the simulations without waiting the observations.
+
+        Args:
+            actions (Union[np.ndarray, List[Dict[str, Any]]]): Array of shape (N, n_agents) or a list
+            with the action dict of each environment.
+        """
+        for env, action in zip(self.envs, self._action_dicts(actions)):
+            env.step_async(action)
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        """Wait the observations of all the simulations.
+
+        The environments that end the episode are reset automatically: their row of the observations
+        is the first observation of the next episode and the last observation is saved in the infos
+        with the key 'final_observation'.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]: Observations
+            (N, n_agents, obs_dim), rewards (N, n_agents), terminateds (N,), truncateds (N,) and the
+            infos dict of each environment.
+        """
+        infos = []
+        for index, env in enumerate(self.envs):
+            obs, reward, terminated, truncated, env_infos = env.step_wait()
+            self._write_obs(index, obs)
+            for row, agent in enumerate(self.agent_ids):
+                self.rewards[index, row] = reward[agent]
+            self.terminateds[index] = terminated['__all__']
+            self.truncateds[index] = truncated['__all__']
+            infos.append(env_infos)
+
+        done = np.flatnonzero(self.terminateds | self.truncateds)
+        if len(done):
+            final_obs = self.obs[done].copy()
+            for index in done:
+                self.envs[index].reset_async()
+            for n, index in enumerate(done):
+                obs, _ = self.envs[index].reset_wait()
+                self._write_obs(index, obs)
+                infos[index] = dict(infos[index])
+                infos[index]['final_observation'] = final_obs[n]
+
+        return self.obs.copy(), self.rewards.copy(), self.terminateds.copy(), self.truncateds.copy(), infos
+
+    def step(self, actions: Union[np.ndarray, List[Dict[str, Any]]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        """Step all the simulations concurrently. See `step_async` and `step_wait`.
+        """
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self) -> None:
+        for env in self.envs:
+            env.close()
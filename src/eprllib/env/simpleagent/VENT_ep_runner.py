@@ -138,8 +138,13 @@ class EnergyPlusRunner:
         self.env_config['epw'], _, _, _ = ep_episode_config.weather_file(self.env_config)
         # Configurate the episode.
         
-        self.weather_stats = weather_utils.Probabilities(self.env_config)
-        # Specify the weather statisitical file.
+        forecast_seed = self.env_config.get('forecast_seed', None)
+        self.weather_stats = weather_utils.Probabilities(
+            self.env_config,
+            seed=None if forecast_seed is None else [forecast_seed, self.episode]
+        )
+        # Specify the weather statisitical file. With `forecast_seed` the noise of the predictions is
+        # reproducible for each episode.
         
         self.energyplus_state = api.state_manager.new_state()
         # Start a new EnergyPlus state (condition for execute EnergyPlus Python API).
@@ -0,0 +1,275 @@
+"""# EVALUATION SWEEP
+
+This script contain the engine to evaluate several controls (DRL checkpoints, the conventional control
+and the no-ventilation baseline) over several buildings (epJSON files) and weather files (EPW). Each
+combination is a cell of the sweep and is evaluated with `init_drl_evaluation` or `init_rb_evaluation`
+in its own output folder.
+
+The cells are run in a local process pool, or as Ray tasks with `use_ray=True`, with at most
+`max_workers` simulations at a time. The completed cells save a `result.json` file, so a sweep that
+is executed again only runs the cells that are missing or failed. The results of all the cells are
+collected in the table `results.csv` of the output folder.
+
+Example:
+```
+>>> results = evaluation_sweep(
+...     env_config,
+...     output='path/to/sweep',
+...     epjsons=['prot_1.epJSON', 'prot_3.epJSON'],
+...     epws=['GEF_Lujan_de_cuyo-hour-H4.epw'],
+...     checkpoints={'drl_1': 'path/to/checkpoint_000047'},
+...     conventional={'SP_temp': 22, 'dT_up': 2.5, 'dT_dn': 2.5},
+...     noventilation=True,
+...     max_workers=4,
+... )
+>>> results[0]
+{'cell': 'drl_1__prot_1__GEF_Lujan_de_cuyo-hour-H4', 'controller': 'drl_1', ..., 'episode_reward': -1520.3, ...}
+```
+"""
+import os
+import csv
+import json
+import zlib
+import importlib.util
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Union
+
+# Name of the files of each cell and of the sweep.
+RESULT_FILE = 'result.json'
+TRAJECTORY_NAME = 'trajectory'
+TABLE_FILE = 'results.csv'
+TABLE_COLUMNS = [
+    'cell', 'controller', 'kind', 'epjson', 'epw', 'status', 'episode_reward', 'steps',
+    'elapsed_s', 'trajectory', 'error',
+]
+
+def _stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+def _path_hash(path: str) -> str:
+    return f"{zlib.crc32(os.path.abspath(path).encode()):08x}"
+
+def _file_names(paths: List[str]) -> Dict[str, str]:
+    """Name of each file in the cells. It is the stem of the file, with a hash of the path when other
+    file of the list has the same stem (e.g. the same model in two folders).
+    """
+    files: Dict[str, set] = {}
+    for path in paths:
+        files.setdefault(_stem(path), set()).add(os.path.abspath(path))
+    return {
+        path: _stem(path) if len(files[_stem(path)]) == 1 else f"{_stem(path)}_{_path_hash(path)}"
+        for path in paths
+    }
+
+def _controllers(
+    checkpoints: Union[List[str], Dict[str, str]],
+    conventional: Optional[Dict[str, Any]],
+    noventilation: bool,
+    use_RNN: bool
+    ) -> List[Dict[str, Any]]:
+    """Controls of the sweep. The checkpoints given as a list are named with a hash of the path, so the
+    names do not change between executions.
+    """
+    if not isinstance(checkpoints, dict):
+        checkpoints = {f"drl_{_path_hash(path)}": path for path in checkpoints}
+    controllers = [
+        {'name': name, 'kind': 'drl', 'checkpoint_path': path, 'use_RNN': use_RNN}
+        for name, path in checkpoints.items()
+    ]
+    if conventional is not None:
+        controllers.append({'name': 'conventional', 'kind': 'conventional', 'policy_config': conventional})
+    if noventilation:
+        controllers.append({'name': 'noventilation', 'kind': 'noventilation'})
+    return controllers
+
+def sweep_cells(
+    env_config: Dict[str, Any],
+    output: str,
+    epjsons: List[str],
+    epws: List[str],
+    checkpoints: Optional[Union[List[str], Dict[str, str]]] = None,
+    conventional: Optional[Dict[str, Any]] = None,
+    noventilation: bool = False,
+    use_RNN: bool = True
+    ) -> List[Dict[str, Any]]:
+    """Cells of the sweep: all the combinations of controls, epJSON and EPW files. See `evaluation_sweep`.
+
+    Raises:
+        ValueError: If two cells have the same name, e.g. a file is repeated in `epjsons` or `epws`.
+    """
+    epjson_names = _file_names(epjsons)
+    epw_names = _file_names(epws)
+    cells = []
+    names = set()
+    for controller in _controllers(checkpoints or [], conventional, noventilation, use_RNN):
+        for epjson in epjsons:
+            for epw in epws:
+                cell = f"{controller['name']}__{epjson_names[epjson]}__{epw_names[epw]}"
+                # The cells with the same name would share the output folder and the result.
+                if cell in names:
+                    raise ValueError(f'The cell {cell} is repeated in the sweep.')
+                names.add(cell)
+                cell_env_config = dict(env_config)
+                cell_env_config.update({'epjson': epjson, 'epw': epw, 'output': os.path.join(output, cell)})
+                cells.append({
+                    'cell': cell,
+                    'controller': controller,
+                    'env_config': cell_env_config,
+                })
+    return cells
+
+def _run_cell(cell: Dict[str, Any]) -> Dict[str, Any]:
+    """Evaluate a cell and save its result. It is executed in a worker of the pool or as a Ray task.
+    """
+    controller = cell['controller']
+    env_config = cell['env_config']
+    result = {
+        'cell': cell['cell'],
+        'controller': controller['name'],
+        'kind': controller['kind'],
+        'epjson': env_config['epjson'],
+        'epw': env_config['epw'],
+        'trajectory': os.path.join(env_config['output'], TRAJECTORY_NAME),
+    }
+    start = perf_counter()
+    try:
+        # Imported here to load RLlib only in the workers that evaluate a checkpoint.
+        if controller['kind'] == 'drl':
+            from eprllib.postprocess.marl_init_evaluation import init_drl_evaluation
+            episode_reward = init_drl_evaluation(
+                env_config, controller['checkpoint_path'], TRAJECTORY_NAME, use_RNN=controller['use_RNN']
+            )
+        elif controller['kind'] == 'conventional':
+            from eprllib.postprocess.marl_init_conventional import init_rb_evaluation
+            episode_reward = init_rb_evaluation(env_config, controller['policy_config'], TRAJECTORY_NAME)
+        elif controller['kind'] == 'noventilation':
+            from eprllib.postprocess.marl_init_noventilation import init_rb_evaluation
+            episode_reward = init_rb_evaluation(env_config, {}, TRAJECTORY_NAME)
+        else:
+            raise ValueError(f"Unknown controller kind: {controller['kind']}")
+        from eprllib.postprocess.trajectory_recorder import load_trajectory
+        result.update({
+            'status': 'completed',
+            'episode_reward': float(episode_reward),
+            'steps': len(load_trajectory(result['trajectory'])),
+            'elapsed_s': perf_counter() - start,
+            'error': '',
+        })
+    except Exception:
+        result.update({
+            'status': 'failed',
+            'episode_reward': None,
+            'steps': None,
+            'elapsed_s': perf_counter() - start,
+            'error': traceback.format_exc(),
+        })
+        return result
+    # The result file is the mark of a completed cell, so it is written at the end.
+    with open(os.path.join(env_config['output'], RESULT_FILE), 'w') as f:
+        json.dump(result, f)
+    return result
+
+def _completed_result(cell: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    path = os.path.join(cell['env_config']['output'], RESULT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def _run_local(cells: List[Dict[str, Any]], max_workers: int) -> List[Dict[str, Any]]:
+    # The 'spawn' method avoids to fork a process with the EnergyPlus or Ray threads running.
+    with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(_run_cell, cells))
+
+def _run_ray(cells: List[Dict[str, Any]], max_workers: int) -> List[Dict[str, Any]]:
+    import ray
+    if not ray.is_initialized():
+        ray.init()
+    run_cell = ray.remote(num_cpus=1)(_run_cell)
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = {}
+    for cell in cells:
+        # Bounded concurrency: wait one task before to submit a new one.
+        if len(pending) >= max_workers:
+            done, _ = ray.wait(list(pending), num_returns=1)
+            result = ray.get(done[0])
+            results[result['cell']] = result
+            del pending[done[0]]
+        pending[run_cell.remote(cell)] = cell['cell']
+    for result in ray.get(list(pending)):
+        results[result['cell']] = result
+    return [results[cell['cell']] for cell in cells]
+
+def write_results_table(results: List[Dict[str, Any]], path: str) -> None:
+    """Write the results of the cells as a CSV table with the `TABLE_COLUMNS`.
+    """
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for result in results:
+            writer.writerow(result)
+
+def evaluation_sweep(
+    env_config: Dict[str, Any],
+    output: str,
+    epjsons: List[str],
+    epws: List[str],
+    checkpoints: Optional[Union[List[str], Dict[str, str]]] = None,
+    conventional: Optional[Dict[str, Any]] = None,
+    noventilation: bool = False,
+    use_RNN: bool = True,
+    max_workers: Optional[int] = None,
+    use_ray: bool = False
+    ) -> List[Dict[str, Any]]:
+    """Evaluate all the combinations of controls, epJSON and EPW files.
+
+    Args:
+        env_config (Dict[str, Any]): Environment configuration of the evaluations. The keys 'epjson', 'epw'
+        and 'output' are defined for each cell. It must be picklable.
+        output (str): Folder of the sweep. Each cell is saved in a subfolder with the name of the cell. The
+        names use the stems of the files, with a hash of the path if two files have the same stem.
+        epjsons (List[str]): Paths of the epJSON files.
+        epws (List[str]): Paths of the EPW files.
+        checkpoints (Optional[Union[List[str], Dict[str, str]]]): Paths of the DRL checkpoints, or a dict with
+        the name of the control and the path. Default is None (no DRL control).
+        conventional (Optional[Dict[str, Any]]): `policy_config` of the conventional control. If None, the
+        conventional control is not evaluated. Default is None.
+        noventilation (bool): If True, the no-ventilation baseline is evaluated. Default is False.
+        use_RNN (bool): If the DRL policies have a LSTM. Default is True.
+        max_workers (Optional[int]): Maximum number of evaluations at a time. Default is the number of CPUs.
+        use_ray (bool): If True, the cells are executed as Ray tasks instead of a local process pool. If Ray
+        can not be imported, the local pool is used. Default is False.
+
+    Returns:
+        List[Dict[str, Any]]: Result of each cell (the rows of `results.csv`). The cells completed in a
+        previous execution are not evaluated again.
+
+    Raises:
+        ValueError: If two cells have the same name, e.g. a file is repeated in `epjsons` or `epws`.
+    """
+    cells = sweep_cells(env_config, output, epjsons, epws, checkpoints, conventional, noventilation, use_RNN)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    results: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for cell in cells:
+        result = _completed_result(cell)
+        if result is not None:
+            results[cell['cell']] = result
+        else:
+            missing.append(cell)
+    if missing:
+        print(f"Evaluation sweep: {len(missing)} cells to run, {len(results)} already completed.")
+        if use_ray and importlib.util.find_spec('ray') is None:
+            print('Ray is not available, the cells are executed in a local process pool.')
+            use_ray = False
+        run = _run_ray if use_ray else _run_local
+        for result in run(missing, min(max_workers, len(missing))):
+            results[result['cell']] = result
+    table = [results[cell['cell']] for cell in cells]
+    os.makedirs(output, exist_ok=True)
+    write_results_table(table, os.path.join(output, TABLE_FILE))
+    return table
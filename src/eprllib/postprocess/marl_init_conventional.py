@@ -5,8 +5,8 @@ This script execute the conventional controls in the evaluation scenario.
 import sys
 sys.path.insert(0, 'C:/Users/grhen/Documents/GitHub/natural_ventilation_EP_RLlib')
 import os
-import csv
 from eprllib.env.multiagent.marl_ep_gym_env import EnergyPlusEnv_v0
+from eprllib.postprocess.trajectory_recorder import TrajectoryRecorder
 from eprllib.agents.conventional import Conventional
 
 
@@ -17,7 +17,7 @@ def init_rb_evaluation(
 ) -> float:
     """This method execute RB Natural Ventilation Policy with `policy_config` configuration from
     `checkpoint_path` for `EnergyPlusEnv_v0` with `env_config` configuration and save the results 
-    of an evaluation episode in `env_config['output']/name` file.
+    of an evaluation episode in `env_config['output']/name` files (see `trajectory_recorder`).
 
     Args:
         env_config (dict): Environment configuration
@@ -75,53 +75,36 @@ def init_rb_evaluation(
     # create the output folder if it doesn't exist
     if not os.path.exists(env_config['output']):
         os.makedirs(env_config['output'])
-    # open the file in the write mode
-    data = open(env_config['output']+'/'+name+'.csv', 'w')
-    # create the csv writer
-    writer = csv.writer(data)
+    # create the recorder of the episode (see `load_trajectory` to read the results)
+    recorder = TrajectoryRecorder.from_env(env, env_config['output']+'/'+name)
     terminated = {}
     terminated["__all__"] = False # variable de control de lazo (es verdadera cuando termina un episodio)
     episode_reward = 0
-    # se obtiene la observaión inicial del entorno para el episodio
-    obs_dict, infos = env.reset()
-    while not terminated["__all__"]: # se ejecuta un paso de tiempo hasta terminar el episodio
-        # se calculan las acciones convencionales de cada elemento
-        To = infos[_agents_id_list[0]]["To"]
-        Ti = infos[_agents_id_list[0]]["Ti"]
-        action_w1 = infos[_agents_id_list[0]]["opening_window_1"]
-        action_w2 = infos[_agents_id_list[0]]["opening_window_2"]
-        
-        actions_dict = {
-            'opening_window_1': policy.window_opening(Ti, To, action_w1),
-            'opening_window_2': policy.window_opening(Ti, To, action_w2)
-        }
-        
-        # se ejecuta un paso de tiempo
-        obs_dict, reward, terminated, truncated, infos = env.step(actions_dict)
-        # se guardan los datos
-        # write a row to the csv file
-        row = []
-        
-        obs_list = obs_dict[_agents_id_list[0]].tolist()
-        for _ in range(len(obs_list)):
-            row.append(obs_list[_])
-        
-        action_list = list(actions_dict.values())
-        for _ in range(len(action_list)):
-            row.append(action_list[_])
-        
-        row.append(reward[_agents_id_list[0]])
-        row.append(terminated["__all__"])
-        row.append(truncated["__all__"])
+    try:
+        # se obtiene la observaión inicial del entorno para el episodio
+        obs_dict, infos = env.reset()
+        while not terminated["__all__"]: # se ejecuta un paso de tiempo hasta terminar el episodio
+            # se calculan las acciones convencionales de cada elemento
+            To = infos[_agents_id_list[0]]["To"]
+            Ti = infos[_agents_id_list[0]]["Ti"]
+            action_w1 = infos[_agents_id_list[0]]["opening_window_1"]
+            action_w2 = infos[_agents_id_list[0]]["opening_window_2"]
         
-        info_list = list(infos[_agents_id_list[0]].values())
-        for _ in range(len(info_list)):
-            row.append(info_list[_])
+            actions_dict = {
+                'opening_window_1': policy.window_opening(Ti, To, action_w1),
+                'opening_window_2': policy.window_opening(Ti, To, action_w2)
+            }
         
-        writer.writerow(row)
-        episode_reward += reward[_agents_id_list[0]]
-    # close the file
-    data.close()
+            # se ejecuta un paso de tiempo
+            obs_dict, reward, terminated, truncated, infos = env.step(actions_dict)
+            # se guardan los datos
+            recorder.record(obs_dict, actions_dict, reward, terminated, truncated, infos)
+            episode_reward += reward[_agents_id_list[0]]
+    finally:
+        # write the last rows and close the file
+        recorder.close()
+        # stop the simulation if the episode was not completed (e.g. an error of the policy)
+        env.close()
 
     return episode_reward
 
@@ -5,9 +5,9 @@ This script execute the conventional controls in the evaluation scenario.
 import sys
 sys.path.insert(0, 'C:/Users/grhen/Documents/GitHub/natural_ventilation_EP_RLlib')
 import os
-import csv
 from ray.rllib.policy.policy import Policy
 from eprllib.env.multiagent.marl_ep_gym_env import EnergyPlusEnv_v0
+from eprllib.postprocess.trajectory_recorder import TrajectoryRecorder
 import numpy as np
 
 def init_drl_evaluation(
@@ -15,15 +15,20 @@ def init_drl_evaluation(
     checkpoint_path: str,
     name: str,
     use_RNN: bool = True,
+    batched: bool = True,
 ) -> float:
     """This method restore a DRL Policy from `checkpoint_path` for `EnergyPlusEnv_v0` with 
     `env_config` configuration and save the results of an evaluation episode in 
-    `env_config['output']/name` file.
+    `env_config['output']/name` files (see `trajectory_recorder`).
 
     Args:
         env_config (dict): Environment configuration
         checkpoint_path (str): Path to the checkpointing produced during training.
         name (str): file name where the results will be save.
+        use_RNN (bool): If the policy has a LSTM. The h- and c-states are kept for each agent. Default is True.
+        batched (bool): If True, the observations of all the agents are stacked and the actions are
+        computed with a single call to `compute_actions` in each timestep. If False, `compute_single_action`
+        is called for each agent. Default is True.
     
     Return:
         float: The acumulated reward in the episode.
@@ -70,57 +75,55 @@ def init_drl_evaluation(
     # create the output folder if it doesn't exist
     if not os.path.exists(env_config['output']):
         os.makedirs(env_config['output'])
-    # open the file in the write mode
-    data = open(env_config['output']+'/'+name+'.csv', 'w')
-    # create the csv writer
-    writer = csv.writer(data)
+    # create the recorder of the episode (see `load_trajectory` to read the results)
+    recorder = TrajectoryRecorder.from_env(env, env_config['output']+'/'+name)
     terminated = {}
     terminated["__all__"] = False # variable de control de lazo (es verdadera cuando termina un episodio)
     episode_reward = 0
-    # se obtiene la observaión inicial del entorno para el episodio
-    obs_dict, infos = env.reset()
+    try:
+        # se obtiene la observaión inicial del entorno para el episodio
+        obs_dict, infos = env.reset()
     
-    if use_RNN:
-        # range(2) b/c h- and c-states of the LSTM.
-        lstm_cell_size = env_config['RLlib']['model']['lstm_cell_size']
-        state = [np.zeros([lstm_cell_size], np.float32) for _ in range(2)]
+        shared_policy = policy['shared_policy']
+        if use_RNN:
+            # range(2) b/c h- and c-states of the LSTM. Each agent has its own row of the states, so the
+            # recurrent state is not shared between the agents.
+            lstm_cell_size = env_config['RLlib']['model']['lstm_cell_size']
+            state = [np.zeros([len(_agents_id_list), lstm_cell_size], np.float32) for _ in range(2)]
     
-    while not terminated["__all__"]: # se ejecuta un paso de tiempo hasta terminar el episodio
-        # se calculan las acciones convencionales de cada elemento
-        actions_dict = {}
-        for agent in _agents_id:
-            if use_RNN:
-                action, state, _ = policy['shared_policy'].compute_single_action(obs_dict[agent], state)
+        while not terminated["__all__"]: # se ejecuta un paso de tiempo hasta terminar el episodio
+            # se calculan las acciones de cada elemento
+            if batched:
+                # A single forward pass of the shared policy for all the agents.
+                obs_batch = np.stack([obs_dict[agent] for agent in _agents_id_list])
+                if use_RNN:
+                    actions, state, _ = shared_policy.compute_actions(obs_batch, state_batches=state)
+                else:
+                    actions, _, _ = shared_policy.compute_actions(obs_batch)
+                actions_dict = dict(zip(_agents_id_list, actions))
             else:
-                action, _, _ = policy['shared_policy'].compute_single_action(obs_dict[agent])
-            actions_dict[agent] = action
-        
-        # se ejecuta un paso de tiempo
-        obs_dict, reward, terminated, truncated, infos = env.step(actions_dict)
-        # se guardan los datos
-        # write a row to the csv file
-        row = []
-        
-        obs_list = obs_dict[_agents_id_list[0]].tolist()
-        for _ in range(len(obs_list)):
-            row.append(obs_list[_])
-        
-        action_list = list(actions_dict.values())
-        for _ in range(len(action_list)):
-            row.append(action_list[_])
-        
-        row.append(reward[_agents_id_list[0]])
-        row.append(terminated["__all__"])
-        row.append(truncated["__all__"])
+                actions_dict = {}
+                for n, agent in enumerate(_agents_id_list):
+                    if use_RNN:
+                        action, agent_state, _ = shared_policy.compute_single_action(
+                            obs_dict[agent], [state_part[n] for state_part in state]
+                        )
+                        for state_part, agent_state_part in zip(state, agent_state):
+                            state_part[n] = agent_state_part
+                    else:
+                        action, _, _ = shared_policy.compute_single_action(obs_dict[agent])
+                    actions_dict[agent] = action
         
-        info_list = list(infos[_agents_id_list[0]].values())
-        for _ in range(len(info_list)):
-            row.append(info_list[_])
-        
-        writer.writerow(row)
-        episode_reward += reward[_agents_id_list[0]]
-    # close the file
-    data.close()
+            # se ejecuta un paso de tiempo
+            obs_dict, reward, terminated, truncated, infos = env.step(actions_dict)
+            # se guardan los datos
+            recorder.record(obs_dict, actions_dict, reward, terminated, truncated, infos)
+            episode_reward += reward[_agents_id_list[0]]
+    finally:
+        # write the last rows and close the file
+        recorder.close()
+        # stop the simulation if the episode was not completed (e.g. an error of the policy)
+        env.close()
     
     return episode_reward
 
@@ -201,10 +204,16 @@ if __name__ == '__main__':
     except OSError:
         pass
     
-    episode_reward = init_drl_evaluation(
-        env_config,
-        checkpoint_path,
-        name
-    )
-    
-    print(f"Episode reward is: {episode_reward}.")
+    # Steps per second of the evaluation with a call to the policy per agent and with batched calls.
+    from time import perf_counter
+    from eprllib.postprocess.trajectory_recorder import load_trajectory
+    for batched in [False, True]:
+        start = perf_counter()
+        episode_reward = init_drl_evaluation(
+            env_config,
+            checkpoint_path,
+            name,
+            batched=batched
+        )
+        steps_s = len(load_trajectory(env_config['output']+'/'+name))/(perf_counter() - start)
+        print(f"Episode reward is: {episode_reward} (batched={batched}, {steps_s:.0f} steps/s).")
@@ -0,0 +1,197 @@
+"""# TRAJECTORY RECORDER
+
+This script contain the recorder of the evaluation episodes. Each timestep is saved as a row of typed
+NumPy columns (observation, actions, reward, terminated, truncated and infos) in a preallocated block
+that is written to a binary file when it is full. The names of the columns are taken from the
+observation layout and saved in a JSON file next to the data, so the result can be memory-mapped for
+the analysis instead of parsing a CSV file.
+
+Example:
+```
+>>> with TrajectoryRecorder.from_env(env, 'path/to/output/name') as recorder:
+...     obs_dict, reward, terminated, truncated, infos = env.step(actions_dict)
+...     recorder.record(obs_dict, actions_dict, reward, terminated, truncated, infos)
+>>> trajectory = load_trajectory('path/to/output/name')
+>>> trajectory['Ti'] # infos or observation column
+>>> trajectory.data['reward']
+```
+"""
+import os
+import json
+import numpy as np
+from typing import Any, Dict, List
+
+from eprllib.env.multiagent.marl_ep_obs_layout import ObservationLayout
+
+# Extensions of the data and the description of the columns.
+DATA_EXTENSION = '.bin'
+META_EXTENSION = '.json'
+
+def trajectory_dtype(obs_dim: int, n_agents: int, n_infos: int) -> np.dtype:
+    """Type of a row of the trajectory.
+    """
+    return np.dtype([
+        ('obs', np.float32, (obs_dim,)),
+        ('action', np.float64, (n_agents,)),
+        ('reward', np.float64),
+        ('terminated', np.bool_),
+        ('truncated', np.bool_),
+        ('infos', np.float64, (n_infos,)),
+    ])
+
+class TrajectoryRecorder:
+    def __init__(
+        self,
+        path: str,
+        obs_names: List[str],
+        agent_ids: List[str],
+        infos_names: List[str],
+        block_size: int = 4096
+        ) -> None:
+        """Recorder of an episode in the files `path + '.bin'` and `path + '.json'`.
+
+        Args:
+            path (str): Path of the files, without extension.
+            obs_names (List[str]): Names of the elements of the observation.
+            agent_ids (List[str]): Agents, in the order of the actions.
+            infos_names (List[str]): Variables of the infos dict.
+            block_size (int): Number of rows that are kept in memory before to write them. Default is 4096.
+        """
+        self.path = path
+        self.columns = {'obs': list(obs_names), 'action': list(agent_ids), 'infos': list(infos_names)}
+        self.dtype = trajectory_dtype(len(obs_names), len(agent_ids), len(infos_names))
+        self.block = np.zeros(block_size, dtype=self.dtype)
+        self.length = 0
+        self._row = 0
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self._file = open(path + DATA_EXTENSION, 'wb')
+
+    @classmethod
+    def from_env(cls, env, path: str, block_size: int = 4096) -> 'TrajectoryRecorder':
+        """Create the recorder with the columns of the observation layout of the environment.
+
+        Args:
+            env (EnergyPlusEnv_v0): Environment of the episode.
+            path (str): Path of the files, without extension.
+            block_size (int): Number of rows that are kept in memory before to write them. Default is 4096.
+        """
+        layout = ObservationLayout(env.env_config)
+        return cls(
+            path,
+            layout.observation_names,
+            layout.agent_ids,
+            [variable for variable, _ in layout.infos_slots],
+            block_size
+        )
+
+    def record(
+        self,
+        obs_dict: Dict[str, np.ndarray],
+        actions_dict: Dict[str, Any],
+        reward: Dict[str, float],
+        terminated: Dict[str, bool],
+        truncated: Dict[str, bool],
+        infos: Dict[str, Dict[str, float]]
+        ) -> None:
+        """Save a timestep with the values returned by `env.step`. The observation, reward and infos are
+        the ones of the first agent, like the CSV files of the evaluations.
+        """
+        agent = self.columns['action'][0]
+        row = self.block[self._row]
+        row['obs'] = obs_dict[agent]
+        row['action'] = [actions_dict[agent_id] for agent_id in self.columns['action']]
+        row['reward'] = reward[agent]
+        row['terminated'] = terminated['__all__']
+        row['truncated'] = truncated['__all__']
+        agent_infos = infos[agent]
+        row['infos'] = [agent_infos[variable] for variable in self.columns['infos']]
+        self._row += 1
+        if self._row == len(self.block):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the rows in memory and update the description of the columns.
+        """
+        if self._row:
+            self._file.write(self.block[:self._row].tobytes())
+            self._file.flush()
+            self.length += self._row
+            self._row = 0
+        with open(self.path + META_EXTENSION, 'w') as f:
+            json.dump({
+                'length': self.length,
+                'dtype': [list(field) for field in self.dtype.descr],
+                'columns': self.columns,
+            }, f)
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> 'TrajectoryRecorder':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+class Trajectory:
+    def __init__(self, data: np.ndarray, columns: Dict[str, List[str]]) -> None:
+        """Recorded episode. `data` is a structured array with the fields of `trajectory_dtype`.
+
+        Args:
+            data (np.ndarray): Rows of the episode.
+            columns (Dict[str, List[str]]): Names of the elements of the 'obs', 'action' and 'infos' fields.
+        """
+        self.data = data
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Column by name. The infos variables are searched first, then the observation and the actions.
+        The fields 'reward', 'terminated' and 'truncated' are also available.
+        """
+        if name in self.data.dtype.names and name not in ('obs', 'action', 'infos'):
+            return self.data[name]
+        for field in ('infos', 'obs', 'action'):
+            if name in self.columns[field]:
+                return self.data[field][:, self.columns[field].index(name)]
+        raise KeyError(name)
+
+    def infos_columns(self) -> Dict[str, np.ndarray]:
+        """Columns of the infos variables, e.g. to evaluate a reward function with `series`.
+        """
+        return {name: self.data['infos'][:, n] for n, name in enumerate(self.columns['infos'])}
+
+    def to_csv(self, path: str) -> None:
+        """Write the trajectory as a CSV file with header, in the column order of the old evaluations.
+        """
+        header = self.columns['obs'] + self.columns['action'] + ['reward', 'terminated', 'truncated'] + self.columns['infos']
+        table = np.column_stack([
+            self.data['obs'], self.data['action'], self.data['reward'],
+            self.data['terminated'], self.data['truncated'], self.data['infos']
+        ])
+        np.savetxt(path, table, delimiter=',', header=','.join(header), comments='')
+
+def load_trajectory(path: str, mmap: bool = True) -> Trajectory:
+    """Load a trajectory saved by `TrajectoryRecorder`.
+
+    Args:
+        path (str): Path of the files, without extension.
+        mmap (bool): If True, the data is memory-mapped in read-only mode instead of being read. Default is True.
+
+    Returns:
+        Trajectory: The recorded episode.
+    """
+    with open(path + META_EXTENSION) as f:
+        meta = json.load(f)
+    dtype = np.dtype([tuple(field) for field in meta['dtype']])
+    if mmap and meta['length'] > 0:
+        data = np.memmap(path + DATA_EXTENSION, dtype=dtype, mode='r', shape=(meta['length'],))
+    else:
+        data = np.fromfile(path + DATA_EXTENSION, dtype=dtype, count=meta['length'])
+    return Trajectory(data, meta['columns'])
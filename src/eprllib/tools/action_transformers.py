@@ -1,6 +1,10 @@
 """This script will be contain some action transformer methods to implement in
 eprllib. Most of them are applied in the test section where examples to test the 
 library are developed.
+
+With a discrete action space, the runner calls the transformer once for each agent and action and
+saves the values in a table (see `env.multiagent.marl_ep_actuation`), so the comparisons of the agent
+ids are not executed in each timestep.
 """
 
 def thermostat_dual(agent_id, action):
@@ -0,0 +1,37 @@
+"""Aggregation of the variables, meters and actuators of the environment over several timesteps.
+
+With `decision_interval` or `decision_triggers` (see `env.multiagent.marl_ep_decision`), the values of a
+decision aggregate the timesteps since the last one: the meters (energy) are summed and the variables
+and actuators are averaged by default. The method of each element can be changed with the env_config:
+
+    env_config = {
+        ...
+        'decision_interval_aggregation': {'Ti': 'last'}, # 'sum', 'mean' or 'last' by element
+    }
+
+The reward functions of `tools.rewards` use the same methods to recover the values per timestep.
+"""
+from typing import Any, Dict
+
+AGGREGATIONS = ['sum', 'mean', 'last']
+
+def aggregation_methods(env_config: Dict[str, Any]) -> Dict[str, str]:
+    """Aggregation of each variable, meter and actuator over the timesteps of a decision interval.
+
+    Args:
+        env_config (Dict[str, Any]): Environment configuration with the optional `decision_interval_aggregation`.
+
+    Returns:
+        Dict[str, str]: Method of AGGREGATIONS of each element.
+
+    Raises:
+        ValueError: If an aggregation is not in AGGREGATIONS.
+    """
+    aggregation = {key: 'mean' for key in env_config.get('ep_variables', {})}
+    aggregation.update({key: 'mean' for key in env_config.get('ep_actuators', {})})
+    aggregation.update({key: 'sum' for key in env_config.get('ep_meters', {})})
+    aggregation.update(env_config.get('decision_interval_aggregation', {}) or {})
+    for key, method in aggregation.items():
+        if method not in AGGREGATIONS:
+            raise ValueError(f'The aggregation of {key} must be one of {AGGREGATIONS}, not {method}.')
+    return aggregation
@@ -0,0 +1,111 @@
+"""RLlib callbacks of eprllib.
+
+`EnergyPlusTimingCallbacks` reports the timing of the EnergyPlus callbacks of each episode (see
+`tools.timing`) as custom metrics, with the prefix 'timing/'. Use it with `'callback_timing'` in the
+env_config:
+
+    config = (
+        PPOConfig()
+        .environment(env=EnergyPlusEnv_v0, env_config=env_config)
+        .callbacks(EnergyPlusTimingCallbacks)
+    )
+
+`SemiMDPDiscountCallbacks` corrects the advantages of the episodes with event-triggered decisions
+(see `env.multiagent.marl_ep_triggers`): a step that lasts k EnergyPlus timesteps is discounted with
+gamma**k instead of gamma. It works with the algorithms that use GAE (e.g. PPO). Both callbacks can be
+combined with `ray.rllib.algorithms.callbacks.make_multi_callbacks`.
+"""
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+from ray.rllib.algorithms.callbacks import DefaultCallbacks
+from ray.rllib.evaluation.postprocessing import Postprocessing
+from ray.rllib.policy.sample_batch import SampleBatch
+
+from eprllib.env.multiagent.marl_ep_obs_layout import ELAPSED_NAME
+
+# Prefix of the custom metrics.
+TIMING_PREFIX = 'timing/'
+
+def semi_mdp_advantages(
+    rewards: np.ndarray,
+    vf_preds: np.ndarray,
+    elapsed: np.ndarray,
+    last_r: float,
+    gamma: float,
+    lambda_: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """Generalized advantage estimation with the discount gamma**elapsed of each step.
+
+    Args:
+        rewards (np.ndarray): Rewards of the steps.
+        vf_preds (np.ndarray): Value predictions of the observations of the steps.
+        elapsed (np.ndarray): Timesteps elapsed in each step.
+        last_r (float): Value of the observation after the last step (0 if the episode terminated).
+        gamma (float): Discount of a timestep.
+        lambda_ (float): GAE parameter of a step.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Advantages and value targets of the steps.
+    """
+    discounts = gamma ** np.asarray(elapsed, dtype=np.float64)
+    next_values = np.append(vf_preds[1:], last_r)
+    deltas = rewards + discounts * next_values - vf_preds
+    advantages = np.zeros(len(deltas))
+    advantage = 0.
+    for t in range(len(deltas) - 1, -1, -1):
+        advantage = deltas[t] + discounts[t] * lambda_ * advantage
+        advantages[t] = advantage
+    return advantages, advantages + vf_preds
+
+class EnergyPlusTimingCallbacks(DefaultCallbacks):
+    def on_episode_end(
+        self,
+        *,
+        worker: Any,
+        base_env: Any,
+        policies: Dict[str, Any],
+        episode: Any,
+        env_index: Optional[int] = None,
+        **kwargs
+        ) -> None:
+        """Copy the `timing_metrics` of the environment of the episode to its custom metrics.
+        """
+        env = base_env.get_sub_environments()[env_index or 0]
+        for key, value in getattr(env, 'timing_metrics', {}).items():
+            episode.custom_metrics[TIMING_PREFIX + key] = value
+
+class SemiMDPDiscountCallbacks(DefaultCallbacks):
+    def on_postprocess_trajectory(
+        self,
+        *,
+        worker: Any,
+        episode: Any,
+        agent_id: Any,
+        policy_id: str,
+        policies: Dict[str, Any],
+        postprocessed_batch: SampleBatch,
+        original_batches: Dict[str, Any],
+        **kwargs
+        ) -> None:
+        """Compute again the advantages and value targets of the trajectory with the 'elapsed_timesteps'
+        of the infos of each step.
+
+        The value of the observation after the last step is recovered from the last advantage computed by
+        RLlib, that is r + gamma*V(s') - V(s).
+        """
+        batch = postprocessed_batch
+        if Postprocessing.ADVANTAGES not in batch or SampleBatch.VF_PREDS not in batch or SampleBatch.INFOS not in batch:
+            return
+        elapsed = np.array([
+            info.get(ELAPSED_NAME, 1) if isinstance(info, dict) else 1 for info in batch[SampleBatch.INFOS]
+        ], dtype=np.float64)
+        config = policies[policy_id].config
+        gamma, lambda_ = config['gamma'], config['lambda']
+        if len(elapsed) == 0 or gamma == 0 or (elapsed == 1).all():
+            return
+        rewards = batch[SampleBatch.REWARDS]
+        vf_preds = batch[SampleBatch.VF_PREDS]
+        last_r = (batch[Postprocessing.ADVANTAGES][-1] - rewards[-1] + vf_preds[-1]) / gamma
+        advantages, value_targets = semi_mdp_advantages(rewards, vf_preds, elapsed, last_r, gamma, lambda_)
+        batch[Postprocessing.ADVANTAGES] = advantages.astype(np.float32)
+        batch[Postprocessing.VALUE_TARGETS] = value_targets.astype(np.float32)
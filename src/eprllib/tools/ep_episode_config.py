@@ -2,9 +2,20 @@
 """
 import numpy as np
 import os
-import json
+from eprllib.tools import epjson_cache, model_output
+from eprllib.tools.model_analysis import ModelAnalysis, polygon_areas
 from eprllib.tools.weather_utils import weather_file
 
+# epJSON object types modified by `episode_epJSON`. Only these subtrees are copied from the cached base model.
+EPISODE_MUTABLE_KEYS = [
+    'Material',
+    'WindowMaterial:SimpleGlazingSystem',
+    'BuildingSurface:Detailed',
+    'FenestrationSurface:Detailed',
+    'InternalMass',
+    'ZoneHVAC:IdealLoadsAirSystem',
+]
+
 def random_building_config(env_config:dict):
     """This method define the path to the epJSON file.
 
@@ -36,12 +47,13 @@ def random_building_config(env_config:dict):
     if epjson_files_folder_path is None:
         ValueError('epjson_files_folder_path is not defined')
     
+    epjson_files = epjson_cache.listdir(epjson_files_folder_path)
     id_epjson_file = env_config['episode_config'].get('id_epjson_file', None)
     if id_epjson_file is None:
-        id_epjson_file = np.random.randint(0, len(os.listdir(epjson_files_folder_path)))
+        id_epjson_file = np.random.randint(0, len(epjson_files))
     
     # The path to the epjson file is defined
-    env_config['epjson'] = os.path.join(epjson_files_folder_path, os.listdir(epjson_files_folder_path)[id_epjson_file])
+    env_config['epjson'] = os.path.join(epjson_files_folder_path, epjson_files[id_epjson_file])
     
     return env_config
 
@@ -76,12 +88,13 @@ def random_weather_config(env_config:dict) -> str:
     if epw_files_folder_path is None:
         ValueError('epw_files_folder_path is not defined')
     
+    epw_files = epjson_cache.listdir(epw_files_folder_path)
     id_epw_file = env_config['episode_config'].get('id_epw_file', None)
     if id_epw_file is None:
-        id_epw_file = np.random.randint(0, len(os.listdir(epw_files_folder_path)))
+        id_epw_file = np.random.randint(0, len(epw_files))
     
     # The path to the epjson file is defined
-    epw_path = os.path.join(epw_files_folder_path, os.listdir(epw_files_folder_path)[id_epw_file])
+    epw_path = os.path.join(epw_files_folder_path, epw_files[id_epw_file])
     
     return epw_path
 
@@ -101,8 +114,11 @@ def episode_epJSON(env_config: dict):
         raise ValueError('epjson is not defined')
     
     # Establish the epJSON Object, it will be manipulated to modify the building model.
-    with open(env_config['episode_config']['epjson']) as file:
-        epJSON_object: dict = json.load(file)
+    # The base model is parsed once per process and only the modified subtrees are copied.
+    epJSON_object: dict = epjson_cache.episode_copy(
+        epjson_cache.load_epjson(env_config['episode_config']['epjson']),
+        EPISODE_MUTABLE_KEYS
+    )
     
     # == BUILDING ==
     # The building volume is V=h(high)*w(weiht)*l(large) m3
@@ -168,7 +184,7 @@ def episode_epJSON(env_config: dict):
     epJSON_object['WindowMaterial:SimpleGlazingSystem']['WindowMaterial']['solar_heat_gain_coefficient'] = (0.67-0.26) * np.random.random_sample() + 0.26
     # Change the window areas for each orientation
     
-    window_area_relation = []
+    window_area_relation = [0., 0., 0., 0.]
     window_area_relation[0] = env_config['episode_config']['window_area_relation_north'] = (0.9-0.05) * np.random.random_sample() + 0.05
     window_area_relation[1] = env_config['episode_config']['window_area_relation_east'] = (0.9-0.05) * np.random.random_sample() + 0.05
     window_area_relation[2] = env_config['episode_config']['window_area_relation_south'] = (0.9-0.05) * np.random.random_sample() + 0.05
@@ -189,11 +205,10 @@ def episode_epJSON(env_config: dict):
     for key in [key for key in epJSON_object["InternalMass"].keys()]:
         epJSON_object["InternalMass"][key]["surface_area"] = np.random.randint(10,40)
     
-    # The total inertial thermal mass is calculated.
-    env_config['episode_config']['inercial_mass'] = inertial_mass(epJSON_object)
-    
-    # The global U factor is calculated.
-    env_config['episode_config']['construction_u_factor'] = u_factor(epJSON_object)
+    # The model is indexed once to calculate the total inertial thermal mass and the global U factor.
+    analysis = ModelAnalysis(epJSON_object)
+    env_config['episode_config']['inercial_mass'] = analysis.inertial_mass()
+    env_config['episode_config']['construction_u_factor'] = analysis.u_factor()
     
     # The limit capacity of bouth cooling and heating are changed.
     E_cool_ref = env_config['episode_config']['E_cool_ref'] = (3000 - 100)*np.random.random_sample() + 100
@@ -212,310 +227,67 @@ def episode_epJSON(env_config: dict):
     # Select the schedule file for loads
     epJSON_object['epw'] = random_weather_config(env_config)
     
-    # The new modify epjson file is writed in the results folder created by RLlib
-    # If don't exist, reate a folder call 'models' into env_config['episode_config']['epjson_files_folder_path']
-    if not os.path.exists(f"{env_config['episode_config']['epjson_files_folder_path']}/models"):
-        os.makedirs(f"{env_config['episode_config']['epjson_files_folder_path']}/models")
-    
-    env_config["epjson"] = f"{env_config['episode_config']['epjson_files_folder_path']}/models/model-{env_config['episode']:08}-{os.getpid():05}.epJSON"
-    with open(env_config["epjson"], 'w') as fp:
-        json.dump(epJSON_object, fp, sort_keys=False, indent=4)
-        # The new modify epjson file is writed.
+    # The new modify epjson file is writed as compact JSON in the folder 'models' of
+    # env_config['episode_config']['epjson_files_folder_path'], or in the folder of `model_output`.
+    env_config["epjson"] = model_output.write_model(epJSON_object, env_config)
     
     return env_config
 
 def inertial_mass(epJSON_object: dict[str,dict]):
-    """_summary_
+    """This function calculate the total thermal mass of the building surfaces and the internal masses
+    of the building in J/°C. See `model_analysis.ModelAnalysis`.
 
     Args:
-        epJSON_object (dict[str,dict]): _description_
+        epJSON_object (dict[str,dict]): The epJSON model.
 
     Returns:
-        _type_: _description_
+        float: The inertial mass of the building.
     """
-    # se define una lista para almacenar
-    masas_termicas = []
-    
-    building_surfaces = [key for key in epJSON_object["BuildingSurface:Detailed"].keys()]
-    # se obtienen los nombres de las superficies de la envolvente
-    internal_mass_surfaces = [key for key in epJSON_object["InternalMass"].keys()]
-    
-    all_building_keys = [key for key in epJSON_object.keys()]
-    all_material_list = ['Material','Material:NoMass','Material:InfraredTransparent','Material:AirGap',
-        'Material:RoofVegetation','WindowMaterial:SimpleGlazingSystem','WindowMaterial:Glazing',
-        'WindowMaterial:GlazingGroup:Thermochromic','WindowMaterial:Glazing:RefractionExtinctionMethod',
-        'WindowMaterial:Gas','WindowGap:SupportPillar','WindowGap:DeflectionState',
-        'WindowMaterial:GasMixture','WindowMaterial:Gap'
-    ]
-    materials_dict = {}
-    for material in all_material_list:
-        if material in all_building_keys:
-            materials_dict[material] = epJSON_object[material].keys()
-    # se obtienen los nombres de los diferentes tipos de materiales
-    
-    # lazo para consultar cada superficie de la envolvente
-    for surface in building_surfaces:
-        # se calcula el área de la superficie
-        area = material_area(epJSON_object,surface)
-        # se identifica la consutrucción
-        s_construction = epJSON_object['BuildingSurface:Detailed'][surface]['construction_name']
-        
-        # se obtiene la densidad del materia: \rho[kg/m3]
-        # se obtiene el calor específico del material: C[J/kg°C]
-        # se calcula el volumen que ocupa el material: V[m3]=area*thickness
-        # se calcula la masa térmica: M[J/°C] = \rho[kg/m3] * C[J/kg°C] * V[m3]
-        
-        # se establece un lazo para calcular la masa térmica de cada capa
-        m_surface = 0
-        layers = [key for key in epJSON_object['Construction'][s_construction].keys()]
-        for layer in layers:
-            material = epJSON_object['Construction'][s_construction][layer]
-            material_list = find_dict_key_by_nested_key(
-                material,
-                materials_dict
-            )
-            # se obtiene el espesor y la conductividad térmica del material de la capa
-            if material_list == 'Material:NoMass' or material_list == 'Material:AirGap' or material_list == 'Material:InfraredTransparent' or material_list == 'WindowMaterial:Gas':
-                m_capa = 0
-            else:
-                espesor_capa = epJSON_object[material_list][material]['thickness']
-                calor_especifico_capa = epJSON_object[material_list][material]['specific_heat']
-                densidad_capa = epJSON_object[material_list][material]['density']
-                m_capa = area * espesor_capa * calor_especifico_capa * densidad_capa
-
-            # se suma la resistencia de la superficie
-            m_surface += m_capa
-        # se guarda la resistencia de la superficie
-        masas_termicas.append(m_surface)
-    
-    # se suma la masa interna asignada
-    for surface in internal_mass_surfaces:
-        # se calcula el área de la superficie
-        area = epJSON_object['InternalMass'][surface]['surface_area']
-        # se identifica la consutrucción
-        s_construction = epJSON_object['InternalMass'][surface]['construction_name']
-        
-        # se obtiene la densidad del materia: \rho[kg/m3]
-        # se obtiene el calor específico del material: C[J/kg°C]
-        # se calcula el volumen que ocupa el material: V[m3]=area*thickness
-        # se calcula la masa térmica: M[J/°C] = \rho[kg/m3] * C[J/kg°C] * V[m3]
-        
-        # se establece un lazo para calcular la masa térmica de cada capa
-        m_surface = 0
-        layers = [key for key in epJSON_object['Construction'][s_construction].keys()]
-        for layer in layers:
-            material = epJSON_object['Construction'][s_construction][layer]
-            material_list = find_dict_key_by_nested_key(
-                material,
-                materials_dict
-            )
-            # se obtiene el espesor y la conductividad térmica del material de la capa
-            if material_list == 'Material:NoMass' or material_list == 'Material:AirGap' or material_list == 'Material:InfraredTransparent' or material_list == 'WindowMaterial:Gas':
-                m_capa = 0
-            else:
-                espesor_capa = epJSON_object[material_list][material]['thickness']
-                calor_especifico_capa = epJSON_object[material_list][material]['specific_heat']
-                densidad_capa = epJSON_object[material_list][material]['density']
-                m_capa = area * espesor_capa * calor_especifico_capa * densidad_capa
-
-            # se suma la resistencia de la superficie
-            m_surface += m_capa
-        # se guarda la resistencia de la superficie
-        masas_termicas.append(m_surface)
-    
-    # Cálculo de la masa termica total
-    M_total = 0
-    for m in range(0,len(masas_termicas)-1,1):
-        M_total += masas_termicas[m]
-    
-    return M_total
+    return ModelAnalysis(epJSON_object).inertial_mass()
     
 def u_factor(epJSON_object: dict[str,dict]):
     """This function select all the building surfaces and fenestration surfaces and calculate the
-    global U-factor of the building, like EnergyPlus does.
+    global U-factor of the building in W/°C, like EnergyPlus does. See `model_analysis.ModelAnalysis`.
+
+    Args:
+        epJSON_object (dict[str,dict]): The epJSON model.
+
+    Returns:
+        float: The sum of area/resistance of all the surfaces.
     """
-    # se define una lista para almacenar las resistencias de cada supercie
-    resistences = []
-    areas = []
-    # se obtienen los nombres de las superficies de la envolvente
-    building_surfaces = [key for key in epJSON_object['BuildingSurface:Detailed'].keys()]
-    fenestration_surfaces = [key for key in epJSON_object['FenestrationSurface:Detailed'].keys()]
-    # se obtienen los nombres de los diferentes tipos de materiales
-    
-    all_building_keys = [key for key in epJSON_object.keys()]
-    all_material_list = ['Material','Material:NoMass','Material:InfraredTransparent','Material:AirGap',
-        'Material:RoofVegetation','WindowMaterial:SimpleGlazingSystem','WindowMaterial:Glazing',
-        'WindowMaterial:GlazingGroup:Thermochromic','WindowMaterial:Glazing:RefractionExtinctionMethod',
-        'WindowMaterial:Gas','WindowGap:SupportPillar','WindowGap:DeflectionState',
-        'WindowMaterial:GasMixture','WindowMaterial:Gap'
-    ]
-    materials_dict = {}
-    for material in all_material_list:
-        if material in all_building_keys:
-            materials_dict[material] = epJSON_object[material].keys()
-    # se obtienen los nombres de los diferentes tipos de materiales
-    
-    # lazo para consultar cada superficie de la envolvente
-    for surface in building_surfaces:
-        # se calcula el área de la superficie
-        areas.append(material_area(epJSON_object,surface))
-        # se identifica la consutrucción
-        s_construction = epJSON_object['BuildingSurface:Detailed'][surface]['construction_name']
-        # se establece un lazo para calcular la resistencia de cada capa
-        r_surface = 0
-        layers = [key for key in epJSON_object['Construction'][s_construction].keys()]
-        for layer in layers:
-            material = epJSON_object['Construction'][s_construction][layer]
-            material_list = find_dict_key_by_nested_key(
-                material,
-                materials_dict
-            )
-            # se obtiene el espesor y la conductividad térmica del material de la capa
-            if material_list == 'Material:NoMass' or material_list == 'Material:AirGap':
-                r_capa = epJSON_object[material_list][material]['thermal_resistance']
-            elif material_list == 'Material:InfraredTransparent':
-                r_capa = 0
-            elif material_list == 'WindowMaterial:Gas':
-                espesor_capa = epJSON_object[material_list][material]['thickness']
-                if epJSON_object[material_list][material]['gas_type'] == 'Air':
-                    conductividad_capa = 0.0257
-                elif epJSON_object[material_list][material]['gas_type'] == 'Argon':
-                    conductividad_capa = 0.0162
-                elif epJSON_object[material_list][material]['gas_type'] == 'Xenon':
-                    conductividad_capa = 0.00576
-                elif epJSON_object[material_list][material]['gas_type'] == 'Krypton':
-                    conductividad_capa = 0.00943
-                else:
-                    print('El nombre del gas no corresponde con los que pueden utilizarse: Air, Argon, Xenon, Krypton.')
-                    NameError
-                r_capa = espesor_capa/conductividad_capa
-            else:
-                espesor_capa = epJSON_object[material_list][material]['thickness']
-                conductividad_capa = epJSON_object[material_list][material]['conductivity']
-                r_capa = espesor_capa/conductividad_capa
-
-            # se suma la resistencia de la superficie
-            r_surface += r_capa
-        # se guarda la resistencia de la superficie
-        resistences.append(r_surface)
-        
-    # lazo para consultar cada superfice de fenestración
-    for fenestration in fenestration_surfaces:
-        # se calcula el área de la superficie
-        areas.append(fenestration_area(epJSON_object, fenestration))
-        # se identifica la consutrucción
-        s_construction = epJSON_object['FenestrationSurface:Detailed'][fenestration]['construction_name']
-        # se establece un lazo para calcular la resistencia de cada capa
-        r_surface = 0
-        layers = [key for key in epJSON_object['Construction'][s_construction].keys()]
-        for layer in layers:
-            material = epJSON_object['Construction'][s_construction][layer]
-            material_list = find_dict_key_by_nested_key(
-                material,
-                materials_dict
-            )
-            # se obtiene el espesor y la conductividad térmica del material de la capa
-            if material_list == 'Material:NoMass' or material_list == 'Material:AirGap':
-                r_capa = epJSON_object[material_list][material]['thermal_resistance']
-            elif material_list == 'Material:InfraredTransparent':
-                r_capa = 0
-            elif material_list == 'WindowMaterial:Gas':
-                espesor_capa = epJSON_object[material_list][material]['thickness']
-                if epJSON_object[material_list][material]['gas_type'] == 'Air':
-                    conductividad_capa = 0.0257
-                elif epJSON_object[material_list][material]['gas_type'] == 'Argon':
-                    conductividad_capa = 0.0162
-                elif epJSON_object[material_list][material]['gas_type'] == 'Xenon':
-                    conductividad_capa = 0.00576
-                elif epJSON_object[material_list][material]['gas_type'] == 'Krypton':
-                    conductividad_capa = 0.00943
-                else:
-                    print('El nombre del gas no corresponde con los que pueden utilizarse: Air, Argon, Xenon, Krypton.')
-                    NameError
-                r_capa = espesor_capa/conductividad_capa
-            else:
-                espesor_capa = epJSON_object[material_list][material]['thickness']
-                conductividad_capa = epJSON_object[material_list][material]['conductivity']
-                r_capa = espesor_capa/conductividad_capa
-
-            # se suma la resistencia de la superficie
-            r_surface += r_capa
-        # se guarda la resistencia de la superficie
-        resistences.append(r_surface)
-
-    # Cálculo de U-Factor en W/°C
-    u_factor = 0
-    for n in range(0, len(areas)-1,1):
-        u_factor =+ areas[n]/resistences[n]
-    
-    return u_factor
+    return ModelAnalysis(epJSON_object).u_factor()
 
 def material_area(epJSON_object, nombre_superficie):
-    """_summary_
+    """Area of a `BuildingSurface:Detailed` object.
 
     Args:
-        epJSON_object (_type_): _description_
-        nombre_superficie (_type_): _description_
+        epJSON_object (dict): The epJSON model.
+        nombre_superficie (str): Name of the surface.
 
     Returns:
-        _type_: _description_
+        float: The area of the surface in m2.
     """
-    # Calcula dos vectores que forman dos lados del cuadrilátero
-    vector1 = [
-        epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][1]['vertex_x_coordinate'] - epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][0]['vertex_x_coordinate'],
-        epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][1]['vertex_y_coordinate'] - epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][0]['vertex_y_coordinate'],
-        epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][1]['vertex_z_coordinate'] - epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][0]['vertex_z_coordinate']
-    ]
-    vector2 = [
-        epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][2]['vertex_x_coordinate'] - epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][0]['vertex_x_coordinate'],
-        epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][2]['vertex_y_coordinate'] - epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][0]['vertex_y_coordinate'],
-        epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][2]['vertex_z_coordinate'] - epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices'][0]['vertex_z_coordinate']
-    ]
-
-    # Calcula el producto vectorial entre los dos vectores
-    producto_vectorial = [
-        vector1[1] * vector2[2] - vector1[2] * vector2[1],
-        vector1[2] * vector2[0] - vector1[0] * vector2[2],
-        vector1[0] * vector2[1] - vector1[1] * vector2[0]
-    ]
-
-    # Calcula el módulo del producto vectorial como el área del cuadrilátero
-    area = 0.5 * (abs(producto_vectorial[0]) + abs(producto_vectorial[1]) + abs(producto_vectorial[2]))
-    return area
+    vertices = epJSON_object['BuildingSurface:Detailed'][nombre_superficie]['vertices']
+    return float(polygon_areas(np.array([[
+        [vertex['vertex_x_coordinate'], vertex['vertex_y_coordinate'], vertex['vertex_z_coordinate']]
+        for vertex in vertices
+    ]]))[0])
 
 def fenestration_area(epJSON_object, fenestration):
-    """_summary_
+    """Area of a `FenestrationSurface:Detailed` object.
 
     Args:
-        epJSON_object (_type_): _description_
-        fenestration (_type_): _description_
+        epJSON_object (dict): The epJSON model.
+        fenestration (str): Name of the fenestration surface.
 
     Returns:
-        _type_: _description_
+        float: The area of the fenestration in m2.
     """
-    
-    # Calcula dos vectores que forman dos lados del cuadrilátero
-    vector1 = [
-        epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_2_x_coordinate'] - epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_1_x_coordinate'],
-        epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_2_y_coordinate'] - epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_1_y_coordinate'],
-        epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_2_z_coordinate'] - epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_1_z_coordinate']
-    ]
-    vector2 = [
-        epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_3_x_coordinate'] - epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_1_x_coordinate'],
-        epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_3_y_coordinate'] - epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_1_y_coordinate'],
-        epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_3_z_coordinate'] - epJSON_object['FenestrationSurface:Detailed'][fenestration]['vertex_1_z_coordinate']
-    ]
-
-    # Calcula el producto vectorial entre los dos vectores
-    producto_vectorial = [
-        vector1[1] * vector2[2] - vector1[2] * vector2[1],
-        vector1[2] * vector2[0] - vector1[0] * vector2[2],
-        vector1[0] * vector2[1] - vector1[1] * vector2[0]
-    ]
-
-    # Calcula el módulo del producto vectorial como el área del cuadrilátero
-    area = 0.5 * (abs(producto_vectorial[0]) + abs(producto_vectorial[1]) + abs(producto_vectorial[2]))
-    return area
+    surface = epJSON_object['FenestrationSurface:Detailed'][fenestration]
+    return float(polygon_areas(np.array([[
+        [surface['vertex_'+str(v)+'_x_coordinate'], surface['vertex_'+str(v)+'_y_coordinate'], surface['vertex_'+str(v)+'_z_coordinate']]
+        for v in range(1,5,1) if 'vertex_'+str(v)+'_x_coordinate' in surface
+    ]]))[0])
 
 def find_dict_key_by_nested_key(key, lists_dict):
     """_summary_
@@ -566,7 +338,7 @@ def window_size_epJSON(epJSON_object, window:str, area_ventana:float):
         L.append([window_vertexs[vertex_x], window_vertexs[vertex_y], window_vertexs[vertex_z]])
 
     # Se calcula el factor de escala de la ventana
-    area_ventana_old = fenestration_area(ventana_escalada)
+    area_ventana_old = fenestration_area(epJSON_object, window)
     factor_escala = area_ventana/area_ventana_old
     centro = calcular_centro(L)
     ventana_escalada = []
@@ -655,5 +427,5 @@ def building_dimension(epJSON_object, h:float, w:float, l:float):
         # Iterate over the four vertices of the surface
         for _ in range(4):
             for xyz in range(3):
-                epJSON_object['FenestrationSurface:Detailed'][window_name]['vertex_'+str(_)+'_'+coordinate[xyz]+'_coordinate'] = window_coordinates[window_name][_][xyz]
+                epJSON_object['FenestrationSurface:Detailed'][window_name]['vertex_'+str(_+1)+'_'+coordinate[xyz]+'_coordinate'] = window_coordinates[window_name][_][xyz]
         
\ No newline at end of file
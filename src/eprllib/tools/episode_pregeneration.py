@@ -0,0 +1,132 @@
+"""Background generation of the episode models in a process pool.
+
+The `episode_config_fn` (e.g. `ep_episode_config.episode_epJSON`) is executed by the workers of the
+pool while the current episode is running, so `reset()` only takes a model that is already built. The
+time that `reset()` was blocked waiting a model is reported in the timing metrics of the environment
+as 'reset_wait_ms' (see `tools.timing`).
+
+To use it, add the following to the env_config:
+
+    env_config = {
+        ...
+        'episode_config_fn': ep_episode_config.episode_epJSON,
+        'episode_pregeneration': {
+            'queue_depth': 2, # number of models built in advance
+            'num_workers': 1, # number of processes of the pool
+        },
+    }
+"""
+import numpy as np
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Callable, Deque, Dict, Sequence
+
+# Keys of the env_config that an episode configuration function define for the episode.
+EPISODE_KEYS = ['epjson', 'epw', 'epw_training', 'episode_config', 'reward_function_config', 'output_profile_epjson']
+
+def _init_worker() -> None:
+    """Each worker must draw different random models."""
+    np.random.seed()
+
+def _generate_episode(episode_config_fn: Callable, env_config: Dict[str, Any], episode: int) -> Dict[str, Any]:
+    """Execute the episode configuration function in a worker of the pool.
+
+    Args:
+        episode_config_fn (Callable): Function that take the env_config as argument and return it modified.
+        env_config (Dict[str, Any]): Copy of the environment configuration.
+        episode (int): Sequence number of the generated model, used to name the files.
+
+    Returns:
+        Dict[str, Any]: The EPISODE_KEYS of the modified env_config.
+    """
+    env_config['episode'] = episode
+    env_config = episode_config_fn(env_config)
+    return {key: env_config[key] for key in EPISODE_KEYS if key in env_config}
+
+class EpisodePregenerator:
+    def __init__(
+        self,
+        episode_config_fn: Callable,
+        env_config: Dict[str, Any],
+        queue_depth: int = 2,
+        num_workers: int = 1,
+        start_method: str = 'spawn',
+        env_side_keys: Sequence[str] = ('episode_pregeneration',),
+    ):
+        """This object keep a bounded queue of episodes in preparation.
+
+        Args:
+            episode_config_fn (Callable): Function that take the env_config as argument and return it modified.
+            env_config (Dict[str, Any]): Environment configuration. It is copied at each submission, so the
+            changes made in the environment are used in the next models.
+            queue_depth (int): Number of models built in advance. Default is 2.
+            num_workers (int): Number of processes of the pool. Default is 1.
+            start_method (str): Start method of the processes. 'spawn' is used by default because the
+            EnergyPlus thread can be running when the workers are started.
+            env_side_keys (Sequence[str]): Keys of the env_config that are not sent to the workers, like
+            the functions of the environment that can not be pickled (e.g. lambdas). The environment uses
+            `marl_ep_subprocess.ENV_SIDE_KEYS`. The `episode_config_fn` is sent as its own argument.
+        """
+        if queue_depth < 1 or num_workers < 1:
+            raise ValueError('queue_depth and num_workers must be greater than zero')
+        self.episode_config_fn = episode_config_fn
+        self.env_config = env_config
+        self.queue_depth = queue_depth
+        self.env_side_keys = set(env_side_keys)
+        self.executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+        )
+        self.queue: Deque[Future] = deque()
+        self.submitted = 0
+        # Time that reset() was blocked waiting a model.
+        self.last_wait = 0.
+        self.total_wait = 0.
+        self.episodes = 0
+        self._fill()
+
+    def _fill(self) -> None:
+        """Submit new models until the queue is full."""
+        while len(self.queue) < self.queue_depth:
+            self.queue.append(self.executor.submit(
+                _generate_episode,
+                self.episode_config_fn,
+                {key: value for key, value in self.env_config.items() if key not in self.env_side_keys},
+                self.submitted
+            ))
+            self.submitted += 1
+
+    def pop(self) -> Dict[str, Any]:
+        """Take the next model of the queue. It only blocks if the model is not ready yet.
+
+        Returns:
+            Dict[str, Any]: The EPISODE_KEYS of the env_config for the episode.
+        """
+        start = perf_counter()
+        future = self.queue.popleft()
+        # The replacement is submitted before to wait, to keep the workers busy.
+        self._fill()
+        episode_keys = future.result()
+        self.last_wait = perf_counter() - start
+        self.total_wait += self.last_wait
+        self.episodes += 1
+        return episode_keys
+
+    def metrics(self) -> Dict[str, float]:
+        """Time that reset() was blocked waiting models.
+
+        Returns:
+            Dict[str, float]: Last and mean wait in seconds.
+        """
+        return {
+            'reset_wait_s': self.last_wait,
+            'reset_wait_mean_s': self.total_wait / self.episodes if self.episodes else 0.,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the workers and discard the models not used."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.queue.clear()
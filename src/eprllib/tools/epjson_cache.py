@@ -0,0 +1,133 @@
+"""Process-wide cache of the parsed epJSON models and the directory listings used to configure the
+episodes.
+
+The entries are validated with the modification time of the file or folder, so a file edited during
+the training is parsed again. The parsed objects are shared and must not be modified: use
+`episode_copy` to get a copy where only the subtrees that the episode changes are new objects.
+
+Example:
+```
+>>> from eprllib.tools import epjson_cache
+>>> base = epjson_cache.load_epjson('path/to/model.epJSON')
+>>> epJSON_object = epjson_cache.episode_copy(base, ['Material', 'RunPeriod'])
+>>> epjson_cache.cache_info()
+{'hits': 0, 'misses': 1, 'size': 1, 'maxsize': 32}
+```
+"""
+import os
+import json
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+class ModelCache:
+    def __init__(self, maxsize: int = 32):
+        """LRU cache of parsed JSON files and directory listings.
+
+        Args:
+            maxsize (int): Maximum number of entries. The least recently used entry is removed when
+            this number is exceeded. Default is 32.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, path: str, load) -> Any:
+        """Return the cached value of `path` or load it if it is missing or outdated."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = (kind, path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = load(path)
+        with self._lock:
+            self._entries[key] = (signature, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def load_json(self, path: str) -> Dict[str, Any]:
+        """Parsed JSON file. The object is shared, so it must not be modified.
+
+        Args:
+            path (str): Path to the JSON (epJSON) file.
+
+        Returns:
+            Dict[str, Any]: Parsed object.
+        """
+        def load(path):
+            with open(path) as file:
+                return json.load(file)
+        return self._get('json', path, load)
+
+    def listdir(self, path: str) -> List[str]:
+        """Names of the entries of a folder, in the order given by `os.listdir`.
+
+        Args:
+            path (str): Path to the folder.
+
+        Returns:
+            List[str]: A new list with the names.
+        """
+        return list(self._get('listdir', path, lambda path: tuple(os.listdir(path))))
+
+    def info(self) -> Dict[str, int]:
+        """Hits and misses counters of the cache.
+
+        Returns:
+            Dict[str, int]: hits, misses, size and maxsize of the cache.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def clear(self) -> None:
+        """Remove all the entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+# Cache shared by all the functions of the process.
+MODEL_CACHE = ModelCache()
+
+def load_epjson(path: str) -> Dict[str, Any]:
+    """Parsed epJSON file from the process cache. The object is shared, so it must not be modified.
+    """
+    return MODEL_CACHE.load_json(path)
+
+def listdir(path: str) -> List[str]:
+    """Names of the entries of a folder from the process cache.
+    """
+    return MODEL_CACHE.listdir(path)
+
+def cache_info() -> Dict[str, int]:
+    """Hits and misses counters of the process cache.
+    """
+    return MODEL_CACHE.info()
+
+def episode_copy(epJSON_object: Dict[str, Any], mutable_keys: Iterable[str]) -> Dict[str, Any]:
+    """Copy of an epJSON object where only the subtrees in `mutable_keys` are deep copied. The rest
+    of the subtrees are shared with the original object and must not be modified.
+
+    Args:
+        epJSON_object (Dict[str, Any]): Parsed epJSON object, usually from `load_epjson`.
+        mutable_keys (Iterable[str]): epJSON object types that will be modified (e.g. 'Material').
+
+    Returns:
+        Dict[str, Any]: The copy of the epJSON object.
+    """
+    epJSON_copy = dict(epJSON_object)
+    for key in mutable_keys:
+        if key in epJSON_copy:
+            epJSON_copy[key] = copy.deepcopy(epJSON_object[key])
+    return epJSON_copy
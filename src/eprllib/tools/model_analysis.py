@@ -0,0 +1,198 @@
+"""Geometry and thermal properties of epJSON models.
+
+The model is indexed once in NumPy arrays: the vertices of the surfaces, the layers of the constructions
+as a matrix of material indices and the properties of the materials. The areas, thermal resistances,
+U-factors and thermal masses of all the surfaces are then computed with vectorized operations, so the
+analysis can be executed for each randomized episode (see `ep_episode_config.episode_epJSON`).
+
+Example:
+```
+>>> analysis = ModelAnalysis(epJSON_object)
+>>> analysis.u_factor() # W/K
+>>> analysis.inertial_mass() # J/K
+>>> dict(zip(analysis.surface_names, analysis.areas))
+```
+"""
+import numpy as np
+from typing import Any, Dict, List
+
+# Object types of the materials that can be used in the layers of a construction.
+MATERIAL_TYPES = [
+    'Material', 'Material:NoMass', 'Material:InfraredTransparent', 'Material:AirGap',
+    'Material:RoofVegetation', 'WindowMaterial:SimpleGlazingSystem', 'WindowMaterial:Glazing',
+    'WindowMaterial:GlazingGroup:Thermochromic', 'WindowMaterial:Glazing:RefractionExtinctionMethod',
+    'WindowMaterial:Gas', 'WindowGap:SupportPillar', 'WindowGap:DeflectionState',
+    'WindowMaterial:GasMixture', 'WindowMaterial:Gap'
+]
+# Materials without thermal mass.
+NO_MASS_TYPES = ['Material:NoMass', 'Material:AirGap', 'Material:InfraredTransparent', 'WindowMaterial:Gas']
+# Materials defined by their thermal resistance.
+RESISTANCE_TYPES = ['Material:NoMass', 'Material:AirGap']
+# Fields of the vertices of `FenestrationSurface:Detailed`.
+FENESTRATION_VERTEX_KEYS = [
+    (f'vertex_{v}_x_coordinate', f'vertex_{v}_y_coordinate', f'vertex_{v}_z_coordinate') for v in range(1, 5)
+]
+# Conductivity of the gases of `WindowMaterial:Gas` [W/m-K].
+GAS_CONDUCTIVITY = {'Air': 0.0257, 'Argon': 0.0162, 'Xenon': 0.00576, 'Krypton': 0.00943}
+
+def polygon_areas(vertices: np.ndarray) -> np.ndarray:
+    """Areas of planar polygons with the Newell method.
+
+    Args:
+        vertices (np.ndarray): Vertices with shape (n_polygons, n_vertices, 3). Polygons with less vertices
+        can be padded repeating the last vertex.
+
+    Returns:
+        np.ndarray: Areas with shape (n_polygons,).
+    """
+    x, y, z = vertices[..., 0], vertices[..., 1], vertices[..., 2]
+    # Next vertex of each vertex, the last one is followed by the first one.
+    following = np.arange(1, vertices.shape[1] + 1) % vertices.shape[1]
+    x1, y1, z1 = x[:, following], y[:, following], z[:, following]
+    normal_x = (y * z1 - z * y1).sum(axis=1)
+    normal_y = (z * x1 - x * z1).sum(axis=1)
+    normal_z = (x * y1 - y * x1).sum(axis=1)
+    return 0.5 * np.sqrt(normal_x**2 + normal_y**2 + normal_z**2)
+
+def _pad_vertices(polygons: List[List[float]]) -> np.ndarray:
+    """Array (n_polygons, max_vertices, 3) of the polygons given as flat lists of coordinates. The polygons
+    with less vertices are padded with their last vertex.
+    """
+    n_coordinates = max((len(polygon) for polygon in polygons), default=0)
+    coordinates = []
+    for polygon in polygons:
+        coordinates += polygon
+        coordinates += polygon[-3:] * ((n_coordinates - len(polygon)) // 3)
+    return np.array(coordinates, dtype=float).reshape(len(polygons), n_coordinates // 3, 3)
+
+def _material_properties(material_type: str, name: str, material: Dict[str, Any]) -> tuple:
+    """Thermal resistance [m2-K/W] and heat capacity per area [J/m2-K] of a layer of material."""
+    if material_type in RESISTANCE_TYPES:
+        resistance = material['thermal_resistance']
+    elif material_type == 'Material:InfraredTransparent':
+        resistance = 0.
+    elif material_type == 'WindowMaterial:Gas':
+        if material['gas_type'] not in GAS_CONDUCTIVITY:
+            raise ValueError(f"The gas_type of {name} must be one of {list(GAS_CONDUCTIVITY)}, not {material['gas_type']}.")
+        resistance = material['thickness'] / GAS_CONDUCTIVITY[material['gas_type']]
+    elif material_type == 'WindowMaterial:SimpleGlazingSystem':
+        resistance = 1. / material['u_factor']
+    elif 'thickness' in material and 'conductivity' in material:
+        resistance = material['thickness'] / material['conductivity']
+    else:
+        resistance = 0.
+    if material_type in NO_MASS_TYPES:
+        capacity = 0.
+    else:
+        capacity = material.get('thickness', 0.) * material.get('density', 0.) * material.get('specific_heat', 0.)
+    return resistance, capacity
+
+class ModelAnalysis:
+    def __init__(self, epJSON_object: Dict[str, Any]) -> None:
+        """Index of the surfaces, constructions and materials of an epJSON model.
+
+        The surfaces are the `BuildingSurface:Detailed` objects followed by the `FenestrationSurface:Detailed`
+        objects. The `InternalMass` objects are indexed apart because they do not have vertices.
+
+        Args:
+            epJSON_object (Dict[str, Any]): Model. It is not modified.
+
+        Raises:
+            ValueError: If a construction uses a material that is not defined.
+        """
+        # Materials. The last index is an empty layer (R=0, C=0) used to pad the constructions.
+        self.material_names: List[str] = []
+        properties = []
+        for material_type in MATERIAL_TYPES:
+            for name, material in epJSON_object.get(material_type, {}).items():
+                self.material_names.append(name)
+                properties.append(_material_properties(material_type, name, material))
+        self.material_index = {name: n for n, name in enumerate(self.material_names)}
+        properties.append((0., 0.))
+        self.material_resistance, self.material_capacity = np.array(properties).T
+
+        # Constructions as a matrix (n_constructions, max_layers) of material indices.
+        constructions = epJSON_object.get('Construction', {})
+        self.construction_names: List[str] = list(constructions)
+        self.construction_index = {name: n for n, name in enumerate(self.construction_names)}
+        n_layers = max((len(layers) for layers in constructions.values()), default=0)
+        self.layers = np.full((len(constructions), n_layers), len(self.material_names), dtype=np.int64)
+        for c, (construction, layers) in enumerate(constructions.items()):
+            for l, material in enumerate(layers.values()):
+                if material not in self.material_index:
+                    raise ValueError(f'The material {material} of the construction {construction} is not defined.')
+                self.layers[c, l] = self.material_index[material]
+
+        # Surfaces.
+        building_surfaces = epJSON_object.get('BuildingSurface:Detailed', {})
+        fenestration_surfaces = epJSON_object.get('FenestrationSurface:Detailed', {})
+        self.surface_names: List[str] = list(building_surfaces) + list(fenestration_surfaces)
+        self.n_building_surfaces = len(building_surfaces)
+        polygons = []
+        for surface in building_surfaces.values():
+            coordinates = []
+            for vertex in surface['vertices']:
+                coordinates += (vertex['vertex_x_coordinate'], vertex['vertex_y_coordinate'], vertex['vertex_z_coordinate'])
+            polygons.append(coordinates)
+        for surface in fenestration_surfaces.values():
+            coordinates = []
+            for x, y, z in FENESTRATION_VERTEX_KEYS:
+                if x in surface:
+                    coordinates += (surface[x], surface[y], surface[z])
+            polygons.append(coordinates)
+        self.vertices = _pad_vertices(polygons)
+        self.surface_construction = np.array([
+            self.construction_index[surface['construction_name']]
+            for surface in list(building_surfaces.values()) + list(fenestration_surfaces.values())
+        ], dtype=np.int64)
+        # Base surface of each fenestration surface, to compute the net areas.
+        surface_index = {name: n for n, name in enumerate(building_surfaces)}
+        self.fenestration_base = np.array([
+            surface_index.get(surface.get('building_surface_name', None), -1)
+            for surface in fenestration_surfaces.values()
+        ], dtype=np.int64)
+
+        # Internal masses.
+        internal_masses = epJSON_object.get('InternalMass', {})
+        self.internal_mass_names: List[str] = list(internal_masses)
+        self.internal_mass_area = np.array([mass['surface_area'] for mass in internal_masses.values()], dtype=float)
+        self.internal_mass_construction = np.array([
+            self.construction_index[mass['construction_name']] for mass in internal_masses.values()
+        ], dtype=np.int64)
+
+        self.areas = polygon_areas(self.vertices) if len(polygons) else np.zeros(0)
+
+    @property
+    def net_areas(self) -> np.ndarray:
+        """Areas of the surfaces without the areas of their windows and doors [m2]."""
+        net = self.areas.copy()
+        fenestration = self.fenestration_base >= 0
+        np.subtract.at(net, self.fenestration_base[fenestration], self.areas[self.n_building_surfaces:][fenestration])
+        return net
+
+    @property
+    def construction_resistance(self) -> np.ndarray:
+        """Thermal resistance of each construction, sum of its layers [m2-K/W]."""
+        return self.material_resistance[self.layers].sum(axis=1)
+
+    @property
+    def construction_capacity(self) -> np.ndarray:
+        """Heat capacity per area of each construction, sum of its layers [J/m2-K]."""
+        return self.material_capacity[self.layers].sum(axis=1)
+
+    def surface_u_factors(self) -> np.ndarray:
+        """U-factor of the construction of each surface, without air films [W/m2-K]."""
+        resistance = self.construction_resistance[self.surface_construction]
+        with np.errstate(divide='ignore'):
+            return np.where(resistance > 0, 1. / resistance, 0.)
+
+    def u_factor(self) -> float:
+        """Global U-factor of the building: sum of the net area over the resistance of all the surfaces [W/K]."""
+        return float((self.net_areas * self.surface_u_factors()).sum())
+
+    def inertial_mass(self) -> float:
+        """Thermal mass of the surfaces (net areas) and the internal masses of the building [J/K]."""
+        capacity = self.construction_capacity
+        surfaces = (self.net_areas * capacity[self.surface_construction]).sum()
+        internal = (self.internal_mass_area * capacity[self.internal_mass_construction]).sum()
+        return float(surfaces + internal)
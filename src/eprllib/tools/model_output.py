@@ -0,0 +1,245 @@
+"""Management of the files that the episodes leave on disk: the epJSON models generated by the episode
+configuration functions (e.g. `ep_episode_config.episode_epJSON`) and the `episode-XXXXXXXX` output
+folders of EnergyPlus.
+
+The models are written as compact JSON, by default in a RAM-backed folder (`/dev/shm`) when it is
+available. After the simulation of an episode ends, the environment release its files: the bytes are
+counted and the files are deleted, keeping only the last `keep_last` episodes and the total size under
+`quota_mb`.
+
+To use it, add the following to the env_config:
+
+    env_config = {
+        ...
+        'model_output': {
+            'models_dir': None, # default: /dev/shm/eprllib-models-<uid> or <epjson_files_folder_path>/models
+            'delete_models': True,
+            'delete_outputs': True,
+            'keep_last': 1, # episodes whose files are not deleted
+            'quota_mb': None, # maximum size of the kept files
+        },
+    }
+
+The metrics of the files are in `env.model_output.metrics`.
+"""
+import os
+import json
+import shutil
+import tempfile
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from eprllib.tools import output_profile
+
+# RAM-backed folder used for the models when it is available.
+TMPFS_DIR = '/dev/shm'
+
+def _tmpfs_models_dir() -> Optional[str]:
+    if os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK):
+        uid = os.getuid() if hasattr(os, 'getuid') else 0
+        return os.path.join(TMPFS_DIR, f'eprllib-models-{uid}')
+    return None
+
+def models_dir(env_config: Dict[str, Any]) -> str:
+    """Folder where the models of the episodes are written.
+
+    Args:
+        env_config (Dict[str, Any]): Environment configuration.
+
+    Returns:
+        str: `model_output['models_dir']` if it is defined. Without `model_output`, the folder 'models' of
+        `episode_config['epjson_files_folder_path']`, like before. With `model_output`, the tmpfs folder if
+        it is available.
+    """
+    config = env_config.get('model_output', False)
+    if config and config.get('models_dir', None):
+        return config['models_dir']
+    if config:
+        tmpfs = _tmpfs_models_dir()
+        if tmpfs is not None:
+            return tmpfs
+    return f"{env_config['episode_config']['epjson_files_folder_path']}/models"
+
+def write_model(epJSON_object: Dict[str, Any], env_config: Dict[str, Any]) -> str:
+    """Write the epJSON model of the episode as compact JSON.
+
+    The file is written with a temporary name and then renamed, so EnergyPlus never reads an
+    incomplete model. The output profile of the env_config is applied (see `output_profile`) and the path
+    is saved in `env_config['output_profile_epjson']`, so the runner does not apply it again.
+
+    Args:
+        epJSON_object (Dict[str, Any]): Model of the episode.
+        env_config (Dict[str, Any]): Environment configuration, with the 'episode' number.
+
+    Returns:
+        str: Path of the model.
+    """
+    folder = models_dir(env_config)
+    os.makedirs(folder, exist_ok=True)
+    path = f"{folder}/model-{env_config['episode']:08}-{os.getpid():05}.epJSON"
+    profile = output_profile.active_profile(env_config)
+    if profile is not None:
+        epJSON_object = output_profile.apply_output_profile(epJSON_object, profile)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    with os.fdopen(fd, 'w') as fp:
+        json.dump(epJSON_object, fp, sort_keys=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    env_config['output_profile_epjson'] = path
+    return path
+
+def path_size(path: str) -> int:
+    """Bytes of a file or of all the files of a folder. Missing paths have size 0."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return size
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+class ModelOutputManager:
+    def __init__(
+        self,
+        models_dir: str,
+        delete_models: bool = True,
+        delete_outputs: bool = True,
+        keep_last: int = 1,
+        quota_mb: Optional[float] = None
+        ) -> None:
+        """Keep the record of the files of each episode and delete them after their simulation.
+
+        Args:
+            models_dir (str): Folder of the generated models. Only the models of this folder are deleted,
+            never the epJSON files of the user.
+            delete_models (bool): Delete the models of the released episodes. Default is True.
+            delete_outputs (bool): Delete the output folders of the released episodes. Default is True.
+            keep_last (int): Number of released episodes whose files are kept. Default is 1.
+            quota_mb (Optional[float]): Maximum size of the kept files. The oldest episodes are deleted first
+            when it is exceeded, even if they are in `keep_last`. If the files that can not be deleted
+            (with `delete_models` or `delete_outputs` False) exceed it, a warning is printed once.
+            Default is None (no quota).
+        """
+        self.models_dir = os.path.abspath(models_dir)
+        self.delete_models = delete_models
+        self.delete_outputs = delete_outputs
+        self.keep_last = keep_last
+        self.quota_bytes = None if quota_mb is None else int(quota_mb * 2**20)
+        self.pending: Optional[Dict[str, Any]] = None
+        # Released episodes with files that can be deleted, from the oldest.
+        self.kept: Deque[Dict[str, Any]] = deque()
+        self.quota_warned = False
+        self.metrics: Dict[str, float] = {
+            'episodes': 0,
+            'model_bytes': 0,
+            'output_bytes': 0,
+            'total_bytes_written': 0,
+            'bytes_per_episode': 0.,
+            'kept_bytes': 0,
+            'deleted_bytes': 0,
+            'quota_exceeded': 0,
+        }
+
+    @classmethod
+    def from_env_config(cls, env_config: Dict[str, Any]) -> Optional['ModelOutputManager']:
+        """Create the manager with `env_config['model_output']`, or return None if it is not defined.
+        """
+        config = env_config.get('model_output', False)
+        if not config:
+            return None
+        return cls(
+            models_dir(env_config),
+            delete_models=config.get('delete_models', True),
+            delete_outputs=config.get('delete_outputs', True),
+            keep_last=config.get('keep_last', 1),
+            quota_mb=config.get('quota_mb', None),
+        )
+
+    def start_episode(self, episode: int, env_config: Dict[str, Any]) -> None:
+        """Record the files of the episode that starts. It is called by the environment when the
+        EnergyPlus simulation is started.
+        """
+        # The previous episode is released here if the environment did not stop its simulation.
+        self.release()
+        epjson = os.path.abspath(env_config['epjson'])
+        self.pending = {
+            'episode': episode,
+            'model': epjson if os.path.dirname(epjson) == self.models_dir else None,
+            'output': f"{env_config['output']}/episode-{episode:08}",
+        }
+
+    def release(self) -> None:
+        """Count the files of the last episode and delete the old files. It is called by the environment
+        after the EnergyPlus simulation of the episode is stopped.
+        """
+        if self.pending is None:
+            return
+        record, self.pending = self.pending, None
+        record['model_bytes'] = path_size(record['model']) if record['model'] is not None else 0
+        record['output_bytes'] = path_size(record['output'])
+        episode_bytes = record['model_bytes'] + record['output_bytes']
+        self.metrics['episodes'] += 1
+        self.metrics['model_bytes'] = record['model_bytes']
+        self.metrics['output_bytes'] = record['output_bytes']
+        self.metrics['total_bytes_written'] += episode_bytes
+        self.metrics['bytes_per_episode'] = self.metrics['total_bytes_written'] / self.metrics['episodes']
+        self.metrics['kept_bytes'] += episode_bytes
+        # The episodes without files to delete are not recorded, their bytes stay in kept_bytes.
+        if self._deletable(record):
+            self.kept.append(record)
+
+        while len(self.kept) > self.keep_last:
+            self._delete_oldest()
+        if self.quota_bytes is None or self.metrics['kept_bytes'] <= self.quota_bytes:
+            return
+        deletable_bytes = sum(self._deletable_bytes(record) for record in self.kept)
+        if self.metrics['kept_bytes'] - deletable_bytes > self.quota_bytes:
+            # Deleting the kept episodes would not be enough, so they are kept.
+            if not self.quota_warned:
+                print(f"The files of the episodes ({self.metrics['kept_bytes']} bytes) exceed the quota of {self.quota_bytes} bytes "
+                      f"and the quota can not be enforced with delete_models={self.delete_models} and delete_outputs={self.delete_outputs}.")
+                self.quota_warned = True
+            return
+        while self.metrics['kept_bytes'] > self.quota_bytes:
+            if self._delete_oldest():
+                self.metrics['quota_exceeded'] += 1
+
+    def _deletable(self, record: Dict[str, Any]) -> bool:
+        """True if the episode has files that are enabled to be deleted."""
+        return self.delete_outputs or (self.delete_models and record['model'] is not None)
+
+    def _deletable_bytes(self, record: Dict[str, Any]) -> int:
+        """Bytes of the files of an episode that are enabled to be deleted."""
+        deletable_bytes = record['output_bytes'] if self.delete_outputs else 0
+        if self.delete_models and record['model'] is not None:
+            deletable_bytes += record['model_bytes']
+        return deletable_bytes
+
+    def _delete_oldest(self) -> int:
+        """Delete the files of the oldest kept episode that are enabled to be deleted, and return their bytes."""
+        record = self.kept.popleft()
+        if self.delete_models and record['model'] is not None:
+            _remove(record['model'])
+        if self.delete_outputs:
+            _remove(record['output'])
+        deleted_bytes = self._deletable_bytes(record)
+        self.metrics['kept_bytes'] -= deleted_bytes
+        self.metrics['deleted_bytes'] += deleted_bytes
+        return deleted_bytes
+
+    def close(self) -> None:
+        """Release the last episode and delete all the files that can be deleted."""
+        self.release()
+        while self.kept:
+            self._delete_oldest()
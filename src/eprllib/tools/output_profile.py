@@ -0,0 +1,131 @@
+"""Output profiles of the EnergyPlus simulations.
+
+The RL loop reads all the variables, meters and actuators through the EnergyPlus API, so the output
+files (ESO, MTR, tables, SQL, eio and others) of the training episodes are not used. An output profile
+removes the `Output:*` objects of the episode model and disables the files with `OutputControl:Files`
+before the simulation is launched. The variables of `ep_variables` are requested through the API by the
+runner, so they are available without `Output:Variable` objects.
+
+To use it, add the following to the env_config of the training:
+
+    env_config = {
+        ...
+        'output_profile': 'training', # default is 'full' (the model is not changed)
+    }
+
+or, to keep some outputs:
+
+    env_config = {
+        ...
+        'output_profile': {
+            'keep': ['Output:Meter'], # object types that are not removed
+            'files': {'output_mtr': 'Yes'}, # fields of OutputControl:Files that are enabled
+        },
+    }
+
+The profile is applied only to the training episodes: the evaluations (`'is_test': True`) keep the full
+reports.
+"""
+import os
+import json
+import tempfile
+from typing import Any, Dict, List, Optional, Union
+
+from eprllib.tools import epjson_cache
+
+# Fields of OutputControl:Files (EnergyPlus 9.4 and later). The profiles set them to 'No'.
+OUTPUT_FILES_FIELDS = [
+    'output_csv', 'output_mtr', 'output_eso', 'output_eio', 'output_tabular', 'output_sqlite',
+    'output_json', 'output_audit', 'output_zone_sizing', 'output_system_sizing', 'output_dxf',
+    'output_bnd', 'output_rdd', 'output_mdd', 'output_mtd', 'output_end', 'output_shd', 'output_dfs',
+    'output_glhe', 'output_delightin', 'output_delighteldmp', 'output_delightdfdmp', 'output_edd',
+    'output_dbg', 'output_perflog', 'output_sln', 'output_sci', 'output_wrl', 'output_screen',
+    'output_extshd', 'output_tarcog',
+]
+# Object types that only produce reports, removed by the profiles besides the `Output:*` objects.
+REPORT_OBJECT_TYPES = [
+    'OutputControl:Table:Style',
+    'OutputControl:ReportingTolerances',
+    'OutputControl:SurfaceColorScheme',
+]
+# Predefined profiles. None means that the model is not changed.
+OUTPUT_PROFILES: Dict[str, Optional[Dict[str, Any]]] = {
+    'full': None,
+    'training': {'keep': [], 'files': {}},
+}
+
+def resolve_profile(profile: Union[str, Dict[str, Any], None]) -> Optional[Dict[str, Any]]:
+    """Return the profile definition of a name or a dict, or None if the model is not changed.
+
+    Raises:
+        ValueError: If the name is not in OUTPUT_PROFILES.
+    """
+    if profile is None:
+        return None
+    if isinstance(profile, str):
+        if profile not in OUTPUT_PROFILES:
+            raise ValueError(f'Unknown output_profile: {profile}. The options are {list(OUTPUT_PROFILES)}.')
+        return OUTPUT_PROFILES[profile]
+    return {'keep': list(profile.get('keep', [])), 'files': dict(profile.get('files', {}))}
+
+def active_profile(env_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Profile definition of the episode, or None if the model is not changed (default profile or evaluation).
+    """
+    if env_config.get('is_test', False):
+        return None
+    return resolve_profile(env_config.get('output_profile', 'full'))
+
+def apply_output_profile(
+    epJSON_object: Dict[str, Any],
+    profile: Union[str, Dict[str, Any], None]
+    ) -> Dict[str, Any]:
+    """Remove the output objects of an epJSON model and disable the output files.
+
+    Args:
+        epJSON_object (Dict[str, Any]): Model. It is not modified, so it can be a shared object of `epjson_cache`.
+        profile (Union[str, Dict[str, Any], None]): Name of a profile in OUTPUT_PROFILES or a dict with the
+        object types to 'keep' and the OutputControl:Files fields to enable in 'files'.
+
+    Returns:
+        Dict[str, Any]: A new top level dict with the other object types shared with `epJSON_object`, or
+        the same object if the profile does not change the model.
+    """
+    definition = resolve_profile(profile)
+    if definition is None:
+        return epJSON_object
+    keep: List[str] = definition['keep']
+    epJSON_copy = {
+        key: value for key, value in epJSON_object.items()
+        if key in keep or not (key.startswith('Output:') or key in REPORT_OBJECT_TYPES)
+    }
+    files = {field: 'No' for field in OUTPUT_FILES_FIELDS}
+    files.update(definition['files'])
+    epJSON_copy['OutputControl:Files'] = {'OutputControl:Files 1': files}
+    return epJSON_copy
+
+def profiled_epjson(env_config: Dict[str, Any]) -> str:
+    """Path of the model of the episode with the output profile of the env_config applied.
+
+    The models written by `model_output.write_model` already have the profile. The other models are
+    written once with the profile in the folder `output_profile` of `env_config['output']`.
+
+    Args:
+        env_config (Dict[str, Any]): Environment configuration.
+
+    Returns:
+        str: Path of the model to simulate.
+    """
+    profile = active_profile(env_config)
+    epjson = env_config['epjson']
+    if profile is None or env_config.get('output_profile_epjson', None) == epjson:
+        return epjson
+    folder = os.path.join(env_config['output'], 'output_profile')
+    stat = os.stat(epjson)
+    path = os.path.join(folder, f"{os.path.splitext(os.path.basename(epjson))[0]}-{stat.st_mtime_ns}.epJSON")
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with os.fdopen(fd, 'w') as fp:
+            json.dump(apply_output_profile(epjson_cache.load_epjson(epjson), profile), fp, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    return path
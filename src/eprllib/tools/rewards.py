@@ -27,12 +27,391 @@ the rewards function have this property, so it is not mandatory to define it.
 # Property `beta_reward`
 This property is used to define the value of the beta parameter of the reward function. Not all
 the rewards function have this property, so it is not mandatory to define it.
+
+# Compiled reward functions
+The reward functions with windowed terms are implemented as `RewardFunction` objects. The
+configuration (`env_config['reward_function_config']`) is resolved once in `configure`, which the
+environment calls at the start of each episode, and the windows are kept as running sums, so the
+cost of each step does not depend on the length of the window. The functions `dalamagkidis_2007`
+and `normalize_reward_function` can still be used as `reward_function`: the environment replaces
+them with their compiled objects (see `compile_reward_function`).
+
+# Decision intervals
+With `decision_interval` or `decision_triggers` (see `env.multiagent.marl_ep_decision`) a step covers
+`env.elapsed_timesteps` EnergyPlus timesteps and its infos are aggregated: the meters are summed and the
+variables are averaged. The compiled reward functions add each value to the windows weighted by the
+timesteps that it covers and count the `cut_reward_len_timesteps` windows in timesteps, so a step that
+ends n windows returns the reward of the n windows. The rewards of an episode are the same with and
+without decision interval when the values are constant in each interval.
+
+# Vectorized evaluation
+The `RewardFunction` objects also compute the rewards of a whole recorded episode with NumPy, to
+evaluate the rewards offline without the per-step loop. The columns are the arrays of the infos
+variables used by the reward (e.g. ppd, occupancy, Ti, heating, cooling, co2), keyed by the names of
+the `reward_function_config`, and the first value corresponds to the timestep 1 of the episode:
+
+    ```
+    reward_function = Dalamagkidis2007()
+    reward_function.configure(env_config)
+    rewards = reward_function.series(columns) # shape (T,)
+    rewards = reward_function.grid(columns, [{'w1': 0.5}, {'w1': 0.8, 'energy_ref': 1e6}]) # shape (2, T)
+    ```
 """
 # Importing the neccesary libraries
-from typing import Dict
+from typing import Any, Callable, Dict, List
 from math import exp
 import numpy as np
 
+from eprllib.tools.aggregation import aggregation_methods
+
+class RewardFunction:
+    """Base class of the compiled reward functions. The subclasses resolve the configuration in
+    `configure` and compute the reward of each timestep in `__call__`, with the same arguments of the
+    reward functions.
+    """
+    # Parameters of the configuration that can be changed in `grid`.
+    parameters: List[str] = []
+
+    def configure(self, env_config: Dict[str, Any]) -> None:
+        """Resolve the configuration of the reward. It is called by the environment at the start of
+        each episode, because the episode configuration can change the references.
+
+        Args:
+            env_config (Dict[str, Any]): Environment configuration.
+        """
+        raise NotImplementedError
+
+    def __call__(self, EnvObject, infos: Dict) -> float:
+        raise NotImplementedError
+
+    def series(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """Rewards of all the timesteps of an episode.
+
+        Args:
+            columns (Dict[str, np.ndarray]): Arrays of length T of the infos variables used by the reward.
+
+        Returns:
+            np.ndarray: Rewards of shape (T,), the same values returned in each step of the episode.
+        """
+        return self.grid(columns, [{}])[0]
+
+    def grid(self, columns: Dict[str, np.ndarray], settings: List[Dict[str, float]]) -> np.ndarray:
+        """Rewards of all the timesteps of an episode for several settings of the parameters.
+
+        Args:
+            columns (Dict[str, np.ndarray]): Arrays of length T of the infos variables used by the reward.
+            settings (List[Dict[str, float]]): Values of the `parameters` that change in each setting. The
+            parameters not included take the value of the configuration.
+
+        Returns:
+            np.ndarray: Rewards of shape (n_settings, T).
+        """
+        params = {}
+        for setting in settings:
+            for name in setting:
+                if name not in self.parameters:
+                    raise ValueError(f'{name} is not a parameter of {type(self).__name__}: {self.parameters}')
+        for name in self.parameters:
+            # Shape (n_settings, 1) to broadcast over the timesteps.
+            params[name] = np.array(
+                [setting.get(name, getattr(self, name, 0.)) for setting in settings], dtype=np.float64
+            )[:, None]
+        columns = {name: np.asarray(column, dtype=np.float64) for name, column in columns.items()}
+        length = len(next(iter(columns.values()))) if columns else 0
+        return np.broadcast_to(self._series(columns, params), (len(settings), length)).copy()
+
+    def _series(self, columns: Dict[str, np.ndarray], params: Dict[str, np.ndarray]) -> np.ndarray:
+        """Rewards of shape (n_settings, T) or (T,) of `grid`.
+        """
+        raise NotImplementedError
+
+class WindowSum:
+    """Running sum and count of the timestep values of a tumbling window."""
+    __slots__ = ('sum', 'count')
+
+    def __init__(self) -> None:
+        self.sum = 0
+        self.count = 0
+
+    def add(self, value: float, timesteps: int = 1) -> None:
+        """Add the value of a timestep, or the mean value of several timesteps."""
+        if timesteps == 1:
+            self.sum += value
+        else:
+            self.sum += value*timesteps
+        self.count += timesteps
+
+    def clear(self) -> None:
+        self.sum = 0
+        self.count = 0
+
+def window_sums(values: np.ndarray, cut_reward_len_timesteps: int) -> np.ndarray:
+    """Sum of the values of each tumbling window, placed in the last timestep of the window. The other
+    timesteps and the incomplete window at the end are zero.
+
+    Args:
+        values (np.ndarray): Values of shape (..., T).
+        cut_reward_len_timesteps (int): Length of the windows.
+
+    Returns:
+        np.ndarray: Array with the shape of `values`.
+    """
+    length = values.shape[-1]
+    n_windows = length // cut_reward_len_timesteps
+    sums = np.zeros(values.shape)
+    end = n_windows*cut_reward_len_timesteps
+    sums[..., cut_reward_len_timesteps-1:end:cut_reward_len_timesteps] = values[..., :end].reshape(
+        values.shape[:-1] + (n_windows, cut_reward_len_timesteps)
+    ).sum(axis=-1)
+    return sums
+
+def window_ends(length: int, cut_reward_len_timesteps: int) -> np.ndarray:
+    """Mask of the timesteps where the reward is calculated.
+    """
+    return (np.arange(1, length + 1) % cut_reward_len_timesteps) == 0
+
+def _summed_names(env_config: Dict[str, Any]) -> List[str]:
+    """Names of the infos variables that are summed over the timesteps of a decision (the meters by
+    default), so their value per timestep is the value divided by the elapsed timesteps.
+    """
+    return [key for key, method in aggregation_methods(env_config).items() if method == 'sum']
+
+def _elapsed_windows(EnvObject, cut_reward_len_timesteps: int) -> tuple:
+    """Timesteps covered by the step and number of windows that end in them."""
+    elapsed = getattr(EnvObject, 'elapsed_timesteps', 1)
+    timestep = EnvObject.timestep
+    return elapsed, timestep//cut_reward_len_timesteps - (timestep - elapsed)//cut_reward_len_timesteps
+
+def _reward_config(env_config: Dict[str, Any]) -> Dict[str, Any]:
+    config = env_config.get('reward_function_config', False)
+    if not config:
+        print('The reward function configuration is not defined. The default function will be use.')
+        return {}
+    return config
+
+class Dalamagkidis2007(RewardFunction):
+    """Compiled version of `dalamagkidis_2007`."""
+    parameters = ['w1', 'w2', 'w3', 'energy_ref', 'co2_ref']
+
+    def __init__(self) -> None:
+        self.ppd = WindowSum()
+        self.energy = WindowSum()
+        self.co2 = WindowSum()
+
+    def configure(self, env_config: Dict[str, Any]) -> None:
+        config = _reward_config(env_config)
+        # define which rewards will be considered
+        self.comfort_reward = config.get('comfort_reward', True)
+        self.energy_reward = config.get('energy_reward', True)
+        self.co2_reward = config.get('co2_reward', True)
+        # define the number of timesteps per episode
+        self.cut_reward_len_timesteps = config.get('cut_reward_len_timesteps', 1)
+        # define the ponderation parameters
+        self.w1 = config.get('w1', 0.80)
+        self.w2 = config.get('w2', 0.01)
+        self.w3 = config.get('w3', 0.20)
+        self.agent = env_config['agent_ids'][0]
+        self.summed = _summed_names(env_config)
+        if self.comfort_reward:
+            self.ppd_name = config.get('ppd_name', False)
+            self.T_interior_name = config.get('T_interior_name', False)
+            self.occupancy_name = config.get('occupancy_name', False)
+            if not self.ppd_name or not self.occupancy_name or not self.T_interior_name:
+                raise Exception('The names of the variables are not defined')
+        if self.energy_reward:
+            self.energy_ref = config.get('energy_ref', False)
+            self.cooling_name = config.get('cooling_name', False)
+            self.heating_name = config.get('heating_name', False)
+            if not self.energy_ref or not self.cooling_name or not self.heating_name:
+                raise Exception('The names of the variables are not defined')
+        if self.co2_reward:
+            self.co2_ref = config.get('co2_ref', False)
+            self.co2_name = config.get('co2_name', False)
+            self.occupancy_name = config.get('occupancy_name', False)
+            if not self.co2_ref or not self.co2_name or not self.occupancy_name:
+                raise Exception('The names of the variables are not defined')
+
+    def __call__(self, EnvObject, infos: Dict) -> float:
+        # get the values of the energy, PPD, and CO2 from the infos dict, per timestep of the step.
+        agent_infos = infos[self.agent]
+        elapsed, windows = _elapsed_windows(EnvObject, self.cut_reward_len_timesteps)
+        if elapsed != 1:
+            agent_infos = {
+                key: value/elapsed if key in self.summed else value for key, value in agent_infos.items()
+            }
+        if self.comfort_reward:
+            ppd = agent_infos[self.ppd_name]
+            T_interior = agent_infos[self.T_interior_name]
+            if agent_infos[self.occupancy_name] == 0:
+                ppd = 0
+            self.ppd.add(ppd, elapsed)
+        if self.energy_reward:
+            self.energy.add(agent_infos[self.cooling_name] + agent_infos[self.heating_name], elapsed)
+        if self.co2_reward:
+            co2 = agent_infos[self.co2_name]
+            if agent_infos[self.occupancy_name] == 0:
+                co2 = 0
+            self.co2.add(1/(1+exp(-0.06*(co2-self.co2_ref))), elapsed)
+        
+        # calculate the reward if the step ends a window of cut_reward_len_timesteps.
+        # if don't return 0.
+        if windows == 0:
+            return 0
+        if self.comfort_reward:
+            rew1 = -self.w1*(self.ppd.sum/self.cut_reward_len_timesteps/100)
+            # If there are not people, only the reward is calculated when the environment is far away
+            # from the comfort temperature ranges. This limits are recommended in EnergyPlus documentation:
+            # InputOutput Reference p.522
+            if T_interior > 29.4:
+                rew1 += -10*windows
+            elif T_interior < 16.7:
+                rew1 += -10*windows
+        else:
+            rew1 = 0
+        if self.energy_reward:
+            rew2 = -self.w2*(self.energy.sum/self.cut_reward_len_timesteps/self.energy_ref)
+        else:
+            rew2 = 0
+        if self.co2_reward:
+            rew3 = -self.w3*(self.co2.sum/self.cut_reward_len_timesteps)
+        else:
+            rew3 = 0
+        # emptly the windows
+        self.ppd.clear()
+        self.energy.clear()
+        self.co2.clear()
+        return rew1 + rew2 + rew3
+
+    def _series(self, columns: Dict[str, np.ndarray], params: Dict[str, np.ndarray]) -> np.ndarray:
+        L = self.cut_reward_len_timesteps
+        rew = 0.
+        if self.comfort_reward:
+            occupied = columns[self.occupancy_name] != 0
+            T_interior = columns[self.T_interior_name]
+            ppd = np.where(occupied, columns[self.ppd_name], 0.)
+            penalty = np.where((T_interior > 29.4) | (T_interior < 16.7), -10., 0.)
+            penalty = np.where(window_ends(len(T_interior), L), penalty, 0.)
+            rew = rew + (-params['w1']*(window_sums(ppd, L)/L/100) + penalty)
+        if self.energy_reward:
+            energy = columns[self.cooling_name] + columns[self.heating_name]
+            rew = rew + -params['w2']*(window_sums(energy, L)/L/params['energy_ref'])
+        if self.co2_reward:
+            co2 = np.where(columns[self.occupancy_name] != 0, columns[self.co2_name], 0.)
+            co2 = 1/(1+np.exp(-0.06*(co2-params['co2_ref'])))
+            rew = rew + -params['w3']*(window_sums(co2, L)/L)
+        return rew
+
+class NormalizeRewardFunction(RewardFunction):
+    """Compiled version of `normalize_reward_function`."""
+    parameters = ['beta_reward', 'cooling_energy_ref', 'heating_energy_ref']
+
+    def __init__(self) -> None:
+        self.ppd = WindowSum()
+        self.energy = WindowSum()
+
+    def configure(self, env_config: Dict[str, Any]) -> None:
+        config = _reward_config(env_config)
+        # define which rewards will be considered
+        self.comfort_reward = config.get('comfort_reward', True)
+        self.energy_reward = config.get('energy_reward', True)
+        # define the number of timesteps per episode
+        self.cut_reward_len_timesteps = config.get('cut_reward_len_timesteps', 1)
+        # define the beta reward
+        self.beta_reward = config.get('beta_reward', 0.5)
+        self.agent = env_config['agent_ids'][0]
+        self.summed = _summed_names(env_config)
+        if self.comfort_reward:
+            self.ppd_name = config.get('ppd_name', False)
+            self.T_interior_name = config.get('T_interior_name', False)
+            self.occupancy_name = config.get('occupancy_name', False)
+            if not self.ppd_name or not self.occupancy_name or not self.T_interior_name:
+                raise Exception('The names of the variables are not defined')
+        if self.energy_reward:
+            self.cooling_energy_ref = config.get('cooling_energy_ref', False)
+            self.heating_energy_ref = config.get('heating_energy_ref', False)
+            self.cooling_name = config.get('cooling_name', False)
+            self.heating_name = config.get('heating_name', False)
+            if not self.cooling_energy_ref or not self.heating_energy_ref or not self.cooling_name or not self.heating_name:
+                raise Exception('The names of the variables are not defined')
+
+    def __call__(self, EnvObject, infos: Dict) -> float:
+        # get the values of the energy and PPD from the infos dict, per timestep of the step.
+        agent_infos = infos[self.agent]
+        elapsed, windows = _elapsed_windows(EnvObject, self.cut_reward_len_timesteps)
+        if elapsed != 1:
+            agent_infos = {
+                key: value/elapsed if key in self.summed else value for key, value in agent_infos.items()
+            }
+        if self.comfort_reward:
+            ppd = agent_infos[self.ppd_name]
+            T_interior = agent_infos[self.T_interior_name]
+            if agent_infos[self.occupancy_name] > 0:
+                # The minimum PPD of the Fanger model is 5%.
+                if ppd < 5:
+                    ppd = 5
+            else:
+                ppd = 0
+            # If there are not people, only the reward is calculated when the environment is far away
+            # from the comfort temperature ranges. This limits are recommended in EnergyPlus documentation:
+            # InputOutput Reference p.522
+            if T_interior > 29.4:
+                ppd = 100
+            elif T_interior < 16.7:
+                ppd = 100
+            self.ppd.add(ppd, elapsed)
+        if self.energy_reward:
+            self.energy.add(
+                agent_infos[self.cooling_name]/self.cooling_energy_ref
+                + agent_infos[self.heating_name]/self.heating_energy_ref,
+                elapsed
+            )
+        
+        # calculate the reward if the step ends a window of cut_reward_len_timesteps.
+        # if don't return 0. The windows ended in the same step share the average of the step.
+        if windows == 0:
+            return 0
+        if self.comfort_reward:
+            ppd_avg = self.ppd.sum/self.ppd.count
+            rew1 = -(1-self.beta_reward)*(1/(1+np.exp(-0.1*(ppd_avg-45))))*windows
+        else:
+            rew1 = 0
+        if self.energy_reward:
+            rew2 = -self.beta_reward*(self.energy.sum/self.energy.count)*windows
+        else:
+            rew2 = 0
+        # emptly the windows
+        self.ppd.clear()
+        self.energy.clear()
+        return rew1 + rew2
+
+    def _series(self, columns: Dict[str, np.ndarray], params: Dict[str, np.ndarray]) -> np.ndarray:
+        L = self.cut_reward_len_timesteps
+        rew = 0.
+        if self.comfort_reward:
+            T_interior = columns[self.T_interior_name]
+            ppd = np.where(columns[self.occupancy_name] > 0, np.maximum(columns[self.ppd_name], 5.), 0.)
+            ppd = np.where((T_interior > 29.4) | (T_interior < 16.7), 100., ppd)
+            sigmoid = 1/(1+np.exp(-0.1*(window_sums(ppd, L)/L-45)))
+            rew = rew + np.where(window_ends(len(ppd), L), -(1-params['beta_reward'])*sigmoid, 0.)
+        if self.energy_reward:
+            energy = columns[self.cooling_name]/params['cooling_energy_ref'] \
+                + columns[self.heating_name]/params['heating_energy_ref']
+            rew = rew + -params['beta_reward']*(window_sums(energy, L)/L)
+        return rew
+
+def _legacy_call(EnvObject, infos: Dict, reward_class: type) -> float:
+    """Call the compiled object of a reward function saved in the EnvObject. It is configured again
+    when the episode changes.
+    """
+    compiled = EnvObject.__dict__.setdefault('compiled_rewards', {})
+    episode, reward_function = compiled.get(reward_class, (None, None))
+    if reward_function is None:
+        reward_function = reward_class()
+    if episode != EnvObject.episode:
+        reward_function.configure(EnvObject.env_config)
+        compiled[reward_class] = (EnvObject.episode, reward_function)
+    return reward_function(EnvObject, infos)
+
 # Defining the reward functions
 def dalamagkidis_2007(EnvObject, infos: Dict) -> float:
     """El autor plantea una función de recompensa con tres térmicos ponderados. Cada uno de estos 
@@ -104,7 +483,7 @@ def dalamagkidis_2007(EnvObject, infos: Dict) -> float:
                 # Nombres de las variables utilizadas en su configuración del entorno.
                 'occupancy_name': 'occupancy',
                 'ppd_name': 'ppd',
-                T_interior_name: 'Ti',
+                'T_interior_name': 'Ti',
                 'cooling_name': 'cooling',
                 'heating_name': 'heating',
                 'co2_name': 'co2'
@@ -112,100 +491,7 @@ def dalamagkidis_2007(EnvObject, infos: Dict) -> float:
         }
         ```
     """
-    if not EnvObject.env_config.get('reward_function_config', False):
-        print('The reward function configuration is not defined. The default function will be use.')
-    
-    # define which rewards will be considered
-    comfort_reward = EnvObject.env_config['reward_function_config'].get('comfort_reward', True)
-    energy_reward = EnvObject.env_config['reward_function_config'].get('energy_reward', True)
-    co2_reward = EnvObject.env_config['reward_function_config'].get('co2_reward', True)
-    
-    # if the EnvObject don't have the list to append the values here obtained, one list is created as a property of the EnvObject
-    if not hasattr(EnvObject, 'ppd_list') and comfort_reward:
-        EnvObject.ppd_list = []
-    if not hasattr(EnvObject, 'energy_list') and energy_reward:
-        EnvObject.energy_list = []
-    if not hasattr(EnvObject, 'co2_list') and co2_reward:
-        EnvObject.co2_list = []
-    
-    # define the number of timesteps per episode
-    cut_reward_len_timesteps = EnvObject.env_config['reward_function_config'].get('cut_reward_len_timesteps', 1)
-    
-    # define the ponderation parameters
-    w1 = EnvObject.env_config['reward_function_config'].get('w1', 0.80)
-    w2 = EnvObject.env_config['reward_function_config'].get('w2', 0.01)
-    w3 = EnvObject.env_config['reward_function_config'].get('w3', 0.20)
-    
-    # get the values of the energy, PPD, and CO2 from the infos dict
-    agent_ids = EnvObject.env_config['agent_ids']
-    if comfort_reward:
-        ppd_name = EnvObject.env_config['reward_function_config'].get('ppd_name', False)
-        T_interior_name = EnvObject.env_config['reward_function_config'].get('T_interior_name', False)
-        occupancy_name = EnvObject.env_config['reward_function_config'].get('occupancy_name', False)
-        if not ppd_name or not occupancy_name or not T_interior_name:
-            raise Exception('The names of the variables are not defined')
-        ppd = infos[agent_ids[0]][ppd_name]
-        T_interior = infos[agent_ids[0]][T_interior_name]
-        occupancy = infos[agent_ids[0]][occupancy_name]
-        if occupancy == 0:
-            ppd = 0
-        EnvObject.ppd_list.append(ppd)
-    if energy_reward:
-        energy_ref = EnvObject.env_config['reward_function_config'].get('energy_ref',False)
-        cooling_name = EnvObject.env_config['reward_function_config'].get('cooling_name', False)
-        heating_name = EnvObject.env_config['reward_function_config'].get('heating_name', False)
-        if not energy_ref or not cooling_name or not heating_name:
-            raise Exception('The names of the variables are not defined')
-        cooling_meter = infos[agent_ids[0]][cooling_name]
-        heating_meter = infos[agent_ids[0]][heating_name]
-        EnvObject.energy_list.append(cooling_meter+heating_meter)
-    if co2_reward:
-        co2_ref = EnvObject.env_config['reward_function_config'].get('co2_ref',False)
-        co2_name = EnvObject.env_config['reward_function_config'].get('co2_name', False)
-        occupancy_name = EnvObject.env_config['reward_function_config'].get('occupancy_name', False)
-        if not co2_ref or not co2_name or not occupancy_name:
-            raise Exception('The names of the variables are not defined')
-        co2 = infos[agent_ids[0]][co2_name]
-        occupancy = infos[agent_ids[0]][occupancy_name]
-        if occupancy == 0:
-            co2 = 0
-        EnvObject.co2_list.append(co2)
-    
-    # calculate the reward if the timestep is divisible by the cut_reward_len_timesteps.
-    # if don't return 0.
-    if EnvObject.timestep % cut_reward_len_timesteps == 0:
-        if comfort_reward:
-            rew1 = -w1*(sum(EnvObject.ppd_list)/cut_reward_len_timesteps/100)
-            # If there are not people, only the reward is calculated when the environment is far away
-            # from the comfort temperature ranges. This limits are recommended in EnergyPlus documentation:
-            # InputOutput Reference p.522
-            if T_interior > 29.4:
-                rew1 += -10
-            elif T_interior < 16.7:
-                rew1 += -10
-        else:
-            rew1 = 0
-        if energy_reward:
-            rew2 = -w2*(sum(EnvObject.energy_list)/cut_reward_len_timesteps/energy_ref)
-        else:
-            rew2 = 0
-        if co2_reward:
-            rew3 = -w3*(sum(1/(1+exp(-0.06(co2-co2_ref))))/cut_reward_len_timesteps)
-        else:
-            rew3 = 0
-        reward = rew1 + rew2 + rew3
-        
-        # emptly the lists
-        if comfort_reward:
-            EnvObject.ppd_list = []
-        if energy_reward:
-            EnvObject.energy_list = []
-        if co2_reward:
-            EnvObject.co2_list = []
-            
-        return reward
-    else:
-        return 0
+    return _legacy_call(EnvObject, infos, Dalamagkidis2007)
     
 def normalize_reward_function(EnvObject, infos: Dict) -> float:
     """This function returns the normalize reward calcualted as the sum of the penalty of the energy 
@@ -222,82 +508,26 @@ def normalize_reward_function(EnvObject, infos: Dict) -> float:
     Returns:
         float: reward normalize value
     """
-    if not EnvObject.env_config.get('reward_function_config', False):
-        print('The reward function configuration is not defined. The default function will be use.')
-    
-    # define which rewards will be considered
-    comfort_reward = EnvObject.env_config['reward_function_config'].get('comfort_reward', True)
-    energy_reward = EnvObject.env_config['reward_function_config'].get('energy_reward', True)
-    
-    # if the EnvObject don't have the list to append the values here obtained, one list is created as a property of the EnvObject
-    if not hasattr(EnvObject, 'ppd_list') and comfort_reward:
-        EnvObject.ppd_list = []
-    if not hasattr(EnvObject, 'energy_list') and energy_reward:
-        EnvObject.energy_list = []
-        
-    # define the number of timesteps per episode
-    cut_reward_len_timesteps = EnvObject.env_config['reward_function_config'].get('cut_reward_len_timesteps', 1)
-    
-    # define the beta reward
-    beta_reward = EnvObject.env_config['reward_function_config'].get('beta_reward', 0.5)
-    
-    # get the values of the energy, PPD, and CO2 from the infos dict
-    agent_ids = EnvObject.env_config['agent_ids']
-    if comfort_reward:
-        ppd_name = EnvObject.env_config['reward_function_config'].get('ppd_name', False)
-        T_interior_name = EnvObject.env_config['reward_function_config'].get('T_interior_name', False)
-        occupancy_name = EnvObject.env_config['reward_function_config'].get('occupancy_name', False)
-        if not ppd_name or not occupancy_name or not T_interior_name:
-            raise Exception('The names of the variables are not defined')
-        ppd = infos[agent_ids[0]][ppd_name]
-        T_interior = infos[agent_ids[0]][T_interior_name]
-        occupancy = infos[agent_ids[0]][occupancy_name]
-        if occupancy > 0:
-            if infos[agent_ids[0]]['ppd'] < 5:
-                ppd = infos[agent_ids[0]]['ppd'] = 5
-            else:
-                ppd = infos[agent_ids[0]]['ppd']
-        else:
-            ppd = 0
-        # If there are not people, only the reward is calculated when the environment is far away
-        # from the comfort temperature ranges. This limits are recommended in EnergyPlus documentation:
-        # InputOutput Reference p.522
-        if T_interior > 29.4:
-            ppd = 100
-        elif T_interior < 16.7:
-            ppd = 100
-        EnvObject.ppd_list.append(ppd)
-    
-    if energy_reward:
-        cooling_energy_ref = EnvObject.env_config['reward_function_config'].get('cooling_energy_ref', False)
-        heating_energy_ref = EnvObject.env_config['reward_function_config'].get('heating_energy_ref', False)
-        cooling_name = EnvObject.env_config['reward_function_config'].get('cooling_name', False)
-        heating_name = EnvObject.env_config['reward_function_config'].get('heating_name', False)
-        if not cooling_energy_ref or not heating_energy_ref or not cooling_name or not heating_name:
-            raise Exception('The names of the variables are not defined')
-        cooling_meter = infos[agent_ids[0]][cooling_name]
-        heating_meter = infos[agent_ids[0]][heating_name]
-        EnvObject.energy_list.append(cooling_meter/cooling_energy_ref+heating_meter/heating_energy_ref)
-    
-    # calculate the reward if the timestep is divisible by the cut_reward_len_timesteps.
-    # if don't return 0.
-    if EnvObject.timestep % cut_reward_len_timesteps == 0:
-        if comfort_reward:
-            ppd_avg = sum(EnvObject.ppd_list)/len(EnvObject.ppd_list)
-            rew1 = -(1-beta_reward)*(1/(1+np.exp(-0.1*(ppd_avg-45))))
-        else:
-            rew1 = 0
-        if energy_reward:
-            rew2 = -beta_reward*(sum(EnvObject.energy_list)/len(EnvObject.energy_list))
-        else:
-            rew2 = 0
-        reward = rew1 + rew2
-        
-        # emptly the lists
-        if comfort_reward:
-            EnvObject.ppd_list = []
-        if energy_reward:
-            EnvObject.energy_list = []
-        return reward
-    else:
-        return 0
\ No newline at end of file
+    return _legacy_call(EnvObject, infos, NormalizeRewardFunction)
+
+# Compiled object of each reward function.
+COMPILED_REWARD_FUNCTIONS = {
+    dalamagkidis_2007: Dalamagkidis2007,
+    normalize_reward_function: NormalizeRewardFunction,
+}
+
+def compile_reward_function(reward_function: Callable) -> Callable:
+    """Return the object that the environment uses as reward function.
+
+    Args:
+        reward_function (Callable): A reward function, a `RewardFunction` subclass or instance.
+
+    Returns:
+        Callable: A new `RewardFunction` object for the functions in `COMPILED_REWARD_FUNCTIONS` and the
+        `RewardFunction` subclasses, or the same `reward_function` otherwise.
+    """
+    if reward_function in COMPILED_REWARD_FUNCTIONS:
+        return COMPILED_REWARD_FUNCTIONS[reward_function]()
+    if isinstance(reward_function, type) and issubclass(reward_function, RewardFunction):
+        return reward_function()
+    return reward_function
@@ -0,0 +1,94 @@
+"""Timing of the EnergyPlus callbacks of the runner.
+
+The runner measures each part of a timestep with `time.perf_counter`:
+
+- 'collect_obs': the `_collect_obs` callback (reading the API and building the observation).
+- 'action_wait': the wait of the action in `_send_actions`, that is the time of the environment and the policy.
+- 'actuator_write': the transformation of the action and the writing of the actuators in `_send_actions`.
+- 'energyplus': the EnergyPlus computation between two callbacks.
+
+The durations are saved in lists and the statistics (mean, percentiles and total) are calculated once per
+episode. The environment adds the time of `reset()` and the `stop()` of the previous episode (and the
+wait of the model with `episode_pregeneration`), the `api.exchange` calls per step and the actuator
+writes done and skipped (see `marl_ep_actuation`), and exposes the result in `env.timing_metrics`,
+that `tools.callbacks.EnergyPlusTimingCallbacks` reports as RLlib custom metrics.
+
+To use it, add the following to the env_config:
+
+    env_config = {
+        ...
+        'callback_timing': {
+            'percentiles': [50, 90, 99],
+            'dump': False, # if True, write the metrics of each episode in <output>/episode-XXXXXXXX-timing.json
+        },
+    }
+
+`'callback_timing': True` uses the default values. It works with the 'thread' backend of the runner.
+"""
+import os
+import json
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+
+# Sections measured by the runner.
+TIMING_SECTIONS = ['collect_obs', 'action_wait', 'actuator_write', 'energyplus']
+DEFAULT_PERCENTILES = [50, 90, 99]
+
+def timing_config(env_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Configuration of the timing with the default values, or None if it is not enabled."""
+    config = env_config.get('callback_timing', False)
+    if not config:
+        return None
+    if config is True:
+        config = {}
+    return {
+        'percentiles': list(config.get('percentiles', DEFAULT_PERCENTILES)),
+        'dump': config.get('dump', False),
+    }
+
+class CallbackTimer:
+    def __init__(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> None:
+        """Durations of the sections of the timesteps of an episode.
+
+        Args:
+            percentiles (Sequence[float]): Percentiles of the durations included in the summary. Default is [50, 90, 99].
+        """
+        self.percentiles = list(percentiles)
+        self.samples: Dict[str, List[float]] = {section: [] for section in TIMING_SECTIONS}
+
+    def add(self, section: str, seconds: float) -> None:
+        self.samples[section].append(seconds)
+
+    def clear(self) -> None:
+        for samples in self.samples.values():
+            samples.clear()
+
+    def summary(self) -> Dict[str, float]:
+        """Statistics of the durations of each section, in milliseconds except the total in seconds.
+
+        Returns:
+            Dict[str, float]: Keys as '<section>_mean_ms', '<section>_p<percentile>_ms' and '<section>_total_s'.
+            The sections without samples are not included.
+        """
+        metrics = {}
+        for section, samples in self.samples.items():
+            if not samples:
+                continue
+            durations = np.array(samples) * 1000.
+            metrics[f'{section}_mean_ms'] = float(durations.mean())
+            for percentile, value in zip(self.percentiles, np.percentile(durations, self.percentiles)):
+                metrics[f'{section}_p{percentile:g}_ms'] = float(value)
+            metrics[f'{section}_total_s'] = float(durations.sum() / 1000.)
+        return metrics
+
+def dump_timing(metrics: Dict[str, float], env_config: Dict[str, Any], episode: int) -> str:
+    """Write the metrics of an episode in `<output>/episode-XXXXXXXX-timing.json`.
+
+    Returns:
+        str: Path of the file.
+    """
+    os.makedirs(env_config['output'], exist_ok=True)
+    path = os.path.join(env_config['output'], f'episode-{episode:08}-timing.json')
+    with open(path, 'w') as f:
+        json.dump(metrics, f, indent=1)
+    return path
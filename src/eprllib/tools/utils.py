@@ -1,6 +1,7 @@
 
-import pandas as pd
+import json
 import numpy as np
+from eprllib.tools import epjson_cache
 
 def trial_str_creator(trial, name:str='eprllib'):
     """This method create a description for the folder where the outputs and checkpoints 
@@ -31,9 +32,8 @@ def len_episode(env_config:dict) -> str:
     output_folder = env_config['output']
     episode_len = env_config.get('episode_len',7)
     init_julian_day = env_config.get('init_julian_day', 0)
-    # Open the epjson file
-    with open(epjson_file) as epf:
-        epjson_object = pd.read_json(epf)
+    # Open the epjson file. The base model is parsed once per process and only RunPeriod is copied.
+    epjson_object = epjson_cache.episode_copy(epjson_cache.load_epjson(epjson_file), ['RunPeriod'])
     # Transform the julian day into day,month tuple
     if init_julian_day <= 0:
         init_julian_day = np.random.randint(1, 366-episode_len)
@@ -42,14 +42,14 @@ def len_episode(env_config:dict) -> str:
     end_julian_day = init_julian_day + episode_len
     end_day, end_month = from_julian_day(end_julian_day)
     # Change the values in the epjson file
-    epjson_object['RunPeriod']['RunPeriod 1']['beging_month'] = init_month
+    epjson_object['RunPeriod']['RunPeriod 1']['begin_month'] = init_month
     epjson_object['RunPeriod']['RunPeriod 1']['begin_day_of_month'] = init_day
     epjson_object['RunPeriod']['RunPeriod 1']['end_month'] = end_month
     epjson_object['RunPeriod']['RunPeriod 1']['end_day_of_month'] = end_day
     # Save the epjson file modified into the output folder
-    df = pd.DataFrame(epjson_object)
     output_path = output_folder + f'/epjson_file_{init_julian_day}.epjson'
-    df.to_json(output_path, orient='records')
+    with open(output_path, 'w') as fp:
+        json.dump(epjson_object, fp)
 
     print(f"The epjson file with the RunPeriod modified was saved in: {output_path}.")
 
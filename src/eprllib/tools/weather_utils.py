@@ -1,8 +1,88 @@
 """Utilities that involve the weather.
+
+The EPW files are read with `EPWStore`: the hourly data is parsed once into a float32 array of shape
+(8760+240, n_cols), with the first ten days repeated at the end to predict after December 31th, and
+saved as a `.npy` file next to the EPW. The next readings, also in other workers, memory-map that file.
 """
+import os
 import pandas as pd
 from pandas.core.frame import DataFrame
 import numpy as np
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+# Rows of the header of the EPW files.
+EPW_HEADER_ROWS = 8
+# Days of the start of the year added at the end of the data.
+EXTRA_DAYS = 10
+
+class EPWStore:
+    def __init__(
+        self,
+        epw_path: str,
+        use_cache_file: bool = True
+    ):
+        """Hourly data of an EPW file as a contiguous float32 array. The non numerical columns (the data
+        source and uncertainty flags) are NaN.
+
+        Args:
+            epw_path (str): Path of the EPW file.
+            use_cache_file (bool): If True, the array is saved in `epw_path + '.npy'` and memory-mapped from
+            there while the EPW file is not modified. If the file can not be written, the array is kept in
+            memory. Default is True.
+        """
+        self.epw_path = epw_path
+        self.cache_path = epw_path + '.npy'
+        if use_cache_file and os.path.exists(self.cache_path) \
+            and os.path.getmtime(self.cache_path) >= os.path.getmtime(epw_path):
+            self.data: np.ndarray = np.load(self.cache_path, mmap_mode='r')
+            return
+        self.data = self.parse(epw_path)
+        if use_cache_file:
+            # The file is written with a temporary name and then renamed, so other workers never
+            # read an incomplete file.
+            tmp_path = f'{self.cache_path}.{os.getpid()}.tmp'
+            try:
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, self.data)
+                os.replace(tmp_path, self.cache_path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            else:
+                self.data = np.load(self.cache_path, mmap_mode='r')
+
+    @staticmethod
+    def parse(epw_path: str) -> np.ndarray:
+        """Read the EPW file and add the first EXTRA_DAYS days at the end.
+        """
+        weather_file = pd.read_csv(epw_path, header=None, skiprows=EPW_HEADER_ROWS)
+        data = weather_file.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float32)
+        return np.ascontiguousarray(np.concatenate((data, data[:EXTRA_DAYS*24])))
+
+    def days(self, julian_day: int, len_days: int = 1) -> np.ndarray:
+        """Rows of the days `[julian_day, julian_day + len_days)`. The days out of the data are not included.
+
+        Args:
+            julian_day (int): First julian day.
+            len_days (int): Number of days.
+
+        Returns:
+            np.ndarray: View of shape (24*len_days, n_cols), without copying the data.
+        """
+        start = max(julian_day - 1, 0)*24
+        stop = max(julian_day - 1 + len_days, 0)*24
+        return self.data[start:stop]
+
+# Stores of the process, by path and modification time of the EPW file.
+_EPW_STORES: Dict[Tuple[str, float], EPWStore] = {}
+
+def epw_store(epw_path: str) -> EPWStore:
+    """Return the `EPWStore` of the EPW file, shared by all the objects of the process.
+    """
+    key = (os.path.abspath(epw_path), os.path.getmtime(epw_path))
+    if key not in _EPW_STORES:
+        _EPW_STORES[key] = EPWStore(epw_path)
+    return _EPW_STORES[key]
 
 def weather_file(env_config: dict, weather_choice:int = np.random.randint(0,3)):
     """This method select a random or specific weather file path and the respectives latitude, longitude, and altitude for
@@ -29,15 +109,44 @@ def weather_file(env_config: dict, weather_choice:int = np.random.randint(0,3)):
     else:
         return folder_path+'/GEF_Lujan_de_cuyo-hour-H4.epw', -32.985,-68.93,1043
 
+# Columns of the epw file used in the predictions.
+INTEREST_VARIABLES = [6, 8, 20, 21, 22, 33]
+# Assignation of the desviation for each variable, in order with the epw variables consulted.
+# See Hennon et al. (2022) https://journals.ametsoc.org/view/journals/wefo/37/10/WAF-D-22-0009.1.xml for the values.
+# This list, mu, represent the mean absolute error
+SIGMA_MAX = np.array([1.43178211, 4.47213595, 6.32455532, 1.84661853, 6.32455532, 2.19909072])
+# Sigma ramps already calculated, by number of days.
+_SIGMA_RAMPS: Dict[int, np.ndarray] = {}
+
+def sigma_ramp(len_days: int) -> np.ndarray:
+    """Desviation of each hour and variable of a prediction of `len_days` days: zero the first 6 hours,
+    then it grows linearly until the sigma máximo at the hour 24, and the sigma máximo from the second day.
+
+    Args:
+        len_days (int): Days of the prediction.
+
+    Returns:
+        np.ndarray: Read-only array of shape (24*len_days, 6).
+    """
+    if len_days not in _SIGMA_RAMPS:
+        t = np.arange(len_days*24)
+        factor = np.where(t < 6, 0., np.minimum(t/24, 1.))
+        ramp = np.outer(factor, SIGMA_MAX)
+        ramp.flags.writeable = False
+        _SIGMA_RAMPS[len_days] = ramp
+    return _SIGMA_RAMPS[len_days]
+
 class Probabilities:
     def __init__(
         self,
-        env_config:dict
+        env_config:dict,
+        seed: Optional[Union[int, Sequence[int]]] = None
     ):
         """This class provide methods to calculate the weather probabilities during training based on the weather file 'epw'.
 
         Args:
             env_config (dict): Environment configuration with the 'epw' path element.
+            seed (Optional[Union[int, Sequence[int]]]): Seed of the random generator of the predictions. Default is None.
             
         Example:
         ```
@@ -54,27 +163,22 @@ class Probabilities:
         """
         self.env_config = env_config
         
-        with open(self.env_config["epw"] if self.env_config['is_test'] else self.env_config["epw_training"]) as file:
-            self.weather_file: DataFrame = pd.read_csv(
-                file,
-                header = None,
-                skiprows = 8
-            )
-            # Reading the weather epw file.
-        self.ten_rows_added = False
-        # Flag to be sure about the run of the next line.
-        self.complement_10_days()
+        self.store = epw_store(self.env_config["epw"] if self.env_config['is_test'] else self.env_config["epw_training"])
+        # Reading the weather epw file. The store already has the ten days added at the end of the year.
+        self.ten_rows_added = True
+        self.rng = np.random.default_rng(seed)
         
+    @property
+    def weather_file(self) -> DataFrame:
+        """Weather data as a DataFrame, with the columns of the epw file.
+        """
+        return pd.DataFrame(self.store.data)
+
     def complement_10_days(self):
-        """This method add rows to complement the predictions of the entire year of then days after the December 31th using the first 
-        ten days of the year. For that, 240 rows are added because each day has 24 hours.
+        """The predictions of the entire year of then days after the December 31th use the first ten days
+        of the year. The 240 rows (24 for each day) are added by `EPWStore`, so this method does nothing.
         """
-        primeras_10_filas = self.weather_file.head(240)
-        # Obtain the first 240 rows of the weather file.
-        self.weather_file = pd.concat([self.weather_file, primeras_10_filas], ignore_index=True)
-        # Add the rows to the same weather file.
         self.ten_rows_added = True
-        # Put this flag in True mode.
 
 
     # Paso 1: Filtrar los datos para el día juliano dado y los próximos 9 días
@@ -89,16 +193,13 @@ class Probabilities:
         Returns:
             np_ndarray_bool
         """
-        if self.ten_rows_added:
-            # The julian day of each row is calculated for a extended list with 10 days more.
-            dias_julianos = ((self.weather_file.index % 9240) // 24 + 1)
-        else:
-            # The julian day of each row is calculated for a not extended.
-            dias_julianos = (self.weather_file.index % 8760) // 24 + 1
-        # Check if the Julian day is within the desired range and return
-        return dias_julianos.isin(range(dia_juliano, dia_juliano + len_days))
-
-    def n_days_predictions(self, julian_day: int, len_days:int=1):
+        # The rows of the days are a slice of the store (see `EPWStore.days`).
+        mask = np.zeros(len(self.store.data), dtype=bool)
+        start = max(dia_juliano - 1, 0)*24
+        mask[start:max(dia_juliano - 1 + len_days, 0)*24] = True
+        return mask
+
+    def n_days_predictions(self, julian_day: int, len_days:int=1, n_ensembles: Optional[int] = None):
         """This method calculate the probabilies of six variables list bellow with a normal probability based on the desviation 
         of the variable.
         
@@ -112,45 +213,22 @@ class Probabilities:
         Args:
             julian_day (int): First julian day of the range of ten days predictions.
             len_days (int)[Default=10]: The longitud of the filtered data. !0 means a ten days of predictions.
+            n_ensembles (Optional[int]): Number of predictions generated at once. Default is None, that means a
+            single prediction.
 
         Returns:
-            NDArray: Array with the ten days predictions. The size of the array is a sigle shape with 1440 values.
+            NDArray: Array with the ten days predictions. The size of the array is a sigle shape with 1440 values, or
+            (n_ensembles, 1440) if `n_ensembles` is given.
         """
-        interest_variables = [6, 8, 20, 21, 22, 33]
-        # This corresponds with the epw file order.
-        filtered_data: DataFrame = self.weather_file[self.julian_day_filter(julian_day,len_days)][interest_variables]
-        # Filter the data whith the julian day of interes and ten days ahead.
-        data_list: list = filtered_data.values.tolist()
-        # Transform the DataFrame into a list. This list contain a list for each hour, but as an observation of a single shape in
-        # the RLlib configuration, the list is transform into a new one with only a shape.
-        single_shape_list = []
-        for e in range(len(data_list)):
-            for v in data_list[e]:
-                single_shape_list.append(v)
-                # append each value of each day and hour in a consecutive way in the empty list.
-        single_shape_list = np.array(single_shape_list)
-        # Assignation of the desviation for each variable, in order with the epw variables consulted.
-        # See Hennon et al. (2022) https://journals.ametsoc.org/view/journals/wefo/37/10/WAF-D-22-0009.1.xml for the values.
-        # This list, mu, represent the mean absolute error        
-        sigma_max = np.array([1.43178211, 4.47213595, 6.32455532, 1.84661853, 6.32455532, 2.19909072])
-        # primeras 6 horas error de 0.
-        # luego, decae hasta cumplir las 24 horas al sigma máximo.
-        # segundo día, sigma máximo
-        sigma0 = np.array([0,0,0,0,0,0])
-        sigma = np.array([])
-        for t in range(len_days*24):
-            if t < 6:
-                sigma = np.concatenate((sigma, sigma0))
-            elif t < 24:
-                sigmaT = sigma_max*(t/24)
-                sigma = np.concatenate((sigma, sigmaT))
-            else:
-                sigma = np.concatenate((sigma, sigma_max))
+        # Take the rows of the julian day of interes and the days ahead.
+        filtered_data = self.store.days(julian_day, len_days)[:, INTEREST_VARIABLES]
+        sigma = sigma_ramp(len_days)
+        assert sigma.shape == filtered_data.shape
 
-        assert len(sigma) == len(single_shape_list)
-
-        for e in range(len(single_shape_list)):
-            value = np.random.normal(single_shape_list[e], sigma[e])
-            single_shape_list[e] = value if value >= 0 else 0
-        
-        return single_shape_list
\ No newline at end of file
+        # All the noise is drawn in a single call. The values can not be negative.
+        size = sigma.shape if n_ensembles is None else (n_ensembles,) + sigma.shape
+        predictions = self.rng.normal(filtered_data, sigma, size)
+        np.maximum(predictions, 0, out=predictions)
+        # As an observation of a single shape in the RLlib configuration, the values of each day and hour are
+        # consecutive in a single shape array.
+        return predictions.reshape(predictions.shape[:-2] + (-1,))
@@ -0,0 +1,61 @@
+"""# BENCHMARK OF THE ACTUATION
+
+Microbenchmark of the actuation of a building with many windows, with actions that change in 1 of each 6
+timesteps (EnergyPlus is replaced by a dict).
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_actuation.py
+"""
+import numpy as np
+from gymnasium.spaces import Discrete
+
+from eprllib.env.multiagent.marl_ep_actuation import ActuationStage
+
+if __name__ == '__main__':
+    import timeit
+    from eprllib.tools.action_transformers import thermostat_dual
+
+    n_agents = 40
+    agent_ids = [f'opening_window_{n}' for n in range(1, n_agents + 1)]
+    env_config = {
+        'ep_actuators': {agent: () for agent in agent_ids},
+        'action_space': Discrete(4),
+        'action_transformer': thermostat_dual,
+    }
+    class _Exchange:
+        def __init__(self) -> None:
+            self.actuators = {}
+        def set_actuator_value(self, state, actuator_handle, actuator_value) -> None:
+            self.actuators[actuator_handle] = actuator_value
+    handles = {agent: n for n, agent in enumerate(agent_ids)}
+    rng = np.random.default_rng(0)
+    actions = [
+        {agent: int(a) for agent, a in zip(agent_ids, rng.integers(0, 4, n_agents))}
+        for _ in range(100)
+    ]
+    steps = [actions[t // 6] for t in range(6*len(actions))]
+
+    def legacy_episode():
+        exchange = _Exchange()
+        for dict_action in steps:
+            dict_action = {agent: thermostat_dual(agent, dict_action[agent]) for agent in agent_ids}
+            for agent in agent_ids:
+                exchange.set_actuator_value(state=None, actuator_handle=handles[agent], actuator_value=dict_action[agent])
+        return exchange.actuators
+
+    def stage_episode():
+        exchange = _Exchange()
+        stage = ActuationStage(env_config)
+        stage.bind(exchange, handles)
+        for dict_action in steps:
+            stage.write(None, dict_action)
+        return exchange.actuators, stage.counts
+
+    actuators, counts = stage_episode()
+    assert actuators == legacy_episode()
+    print(f"{n_agents} actuators, {len(steps)} timesteps: {counts['writes']} writes, {counts['skipped']} skipped")
+    n = 20
+    for name, fn in [('transform + write all', legacy_episode), ('actuation stage', stage_episode)]:
+        t = timeit.timeit(fn, number=n)
+        print(f"{name}: {t/n/len(steps)*1e6:.1f} us/timestep")
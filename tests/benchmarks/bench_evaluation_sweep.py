@@ -0,0 +1,69 @@
+"""# BENCHMARK OF THE EVALUATION SWEEP
+
+Sweep of the baselines over two weather variants with the mock simulator (see `marl_ep_backend`).
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_evaluation_sweep.py [output]
+"""
+import os
+from time import perf_counter
+
+from eprllib.postprocess.evaluation_sweep import TABLE_FILE, evaluation_sweep
+
+if __name__ == '__main__':
+    import sys
+    import tempfile
+    from gymnasium.spaces import Discrete
+    from eprllib.env.multiagent.marl_ep_obs_layout import BUILDING_PROPERTIES
+
+    output = sys.argv[1] if len(sys.argv) > 1 else tempfile.mkdtemp()
+    env_config = {
+        'ep_terminal_output': False,
+        'is_test': True,
+        'action_space': Discrete(2),
+        'ep_variables': {
+            'To': ('Site Outdoor Air Drybulb Temperature', 'Environment'),
+            'Ti': ('Zone Mean Air Temperature', 'Thermal Zone: Living'),
+            'occupancy': ('Zone People Occupant Count', 'Thermal Zone: Living'),
+            'ppd': ('Zone Thermal Comfort Fanger Model PPD', 'Living Occupancy'),
+        },
+        'ep_meters': {
+            'heating': 'Heating:DistrictHeatingWater',
+            'cooling': 'Cooling:DistrictCooling',
+        },
+        'ep_actuators': {
+            'opening_window_1': ('AirFlow Network Window/Door Opening', 'Venting Opening Factor', 'living_NW_window'),
+            'opening_window_2': ('AirFlow Network Window/Door Opening', 'Venting Opening Factor', 'living_E_window'),
+        },
+        'ep_actuators_type': {'opening_window_1': 4, 'opening_window_2': 5},
+        'time_variables': ['hour', 'day_of_year'],
+        'weather_variables': ['is_raining', 'sun_is_up'],
+        'infos_variables': ['ppd', 'occupancy', 'Ti', 'To', 'heating', 'cooling', 'opening_window_1', 'opening_window_2'],
+        'no_observable_variables': ['ppd'],
+        'episode_config': {key: 1. for key in BUILDING_PROPERTIES},
+        'reward_function_config': {
+            'co2_reward': False,
+            'energy_ref': 6805274,
+            'occupancy_name': 'occupancy',
+            'ppd_name': 'ppd',
+            'T_interior_name': 'Ti',
+            'cooling_name': 'cooling',
+            'heating_name': 'heating',
+        },
+        'simulator_backend': 'mock',
+        'mock_backend_config': {'days': 7},
+    }
+    start = perf_counter()
+    results = evaluation_sweep(
+        env_config,
+        output,
+        epjsons=['mock.epJSON'],
+        epws=['mock_1.epw', 'mock_2.epw'],
+        conventional={'SP_temp': 22, 'dT_up': 2.5, 'dT_dn': 2.5},
+        noventilation=True,
+        max_workers=2,
+    )
+    for result in results:
+        print(result['cell'], result['status'], result['episode_reward'], result['steps'])
+    print(f"Sweep time: {perf_counter() - start:.1f} s. Results table: {os.path.join(output, TABLE_FILE)}")
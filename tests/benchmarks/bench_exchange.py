@@ -0,0 +1,77 @@
+"""# BENCHMARK OF THE STEP EXCHANGE
+
+Latency of the round trip (action -> callback -> observation) with a mock EnergyPlus driver that calls
+the callbacks in its own thread, like EnergyPlus does.
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_exchange.py
+"""
+import threading
+
+from eprllib.env.multiagent.marl_ep_exchange import ExchangeClosed, StepExchange
+
+if __name__ == '__main__':
+    import timeit
+    import numpy as np
+    from queue import Queue
+
+    n = 20000
+    obs = {'agent_1': np.zeros(167, dtype=np.float32), 'agent_2': np.zeros(167, dtype=np.float32)}
+    infos = {'agent_1': {}, 'agent_2': {}}
+    action = {'agent_1': 1, 'agent_2': 0}
+
+    def queues_driver(obs_queue, act_queue, infos_queue, obs_event, act_event, infos_event):
+        # Legacy handshake of the runner callbacks.
+        infos_queue.put(infos); infos_event.set()
+        obs_queue.put(obs); obs_event.set()
+        while True:
+            act_event.wait(10)
+            if act_queue.get() is None:
+                return
+            infos_queue.put(infos); infos_event.set()
+            obs_queue.put(obs); obs_event.set()
+
+    def queues_round_trip():
+        queues = [Queue(maxsize=1), Queue(maxsize=1), Queue(maxsize=1)]
+        events = [threading.Event(), threading.Event(), threading.Event()]
+        obs_queue, act_queue, infos_queue = queues
+        obs_event, act_event, infos_event = events
+        driver = threading.Thread(target=queues_driver, args=(*queues, *events))
+        driver.start()
+        obs_event.wait(); obs_queue.get(); infos_event.wait(); infos_queue.get()
+        start = timeit.default_timer()
+        for _ in range(n):
+            act_queue.put(action, timeout=5); act_event.set()
+            obs_event.wait(5); obs_queue.get(timeout=5)
+            infos_event.wait(5); infos_queue.get(timeout=5)
+        elapsed = timeit.default_timer() - start
+        act_queue.put(None)
+        driver.join()
+        return elapsed
+
+    def exchange_driver(exchange):
+        exchange.put_observation(obs, infos)
+        while True:
+            try:
+                exchange.get_action(10)
+            except ExchangeClosed:
+                return
+            exchange.put_observation(obs, infos)
+
+    def exchange_round_trip():
+        exchange = StepExchange()
+        driver = threading.Thread(target=exchange_driver, args=(exchange,))
+        driver.start()
+        exchange.get_observation()
+        start = timeit.default_timer()
+        for _ in range(n):
+            exchange.put_action(action)
+            exchange.get_observation(5)
+        elapsed = timeit.default_timer() - start
+        exchange.close()
+        driver.join()
+        return elapsed
+
+    for name, fn in [('Queue + Event', queues_round_trip), ('StepExchange', exchange_round_trip)]:
+        print(f"{name}: {fn()/n*1e6:.1f} us/round trip")
@@ -0,0 +1,32 @@
+"""# BENCHMARK OF THE WEATHER FORECAST
+
+Microbenchmark of the prediction per timestep (EnergyPlus calls are not included).
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_forecast.py
+"""
+import numpy as np
+
+from eprllib.env.multiagent.marl_ep_obs_layout import FORECAST_HOURS, FORECAST_VARIABLES
+from eprllib.env.multiagent.marl_ep_forecast import SIGMA_MAX, WeatherForecast
+
+if __name__ == '__main__':
+    import timeit
+
+    table = np.random.random_sample((2*FORECAST_HOURS, len(FORECAST_VARIABLES)))
+    out = np.empty((FORECAST_HOURS, len(FORECAST_VARIABLES)))
+
+    def legacy_step(hour=12):
+        for h in range(FORECAST_HOURS):
+            sigma = SIGMA_MAX * (h/23)
+            for n in range(len(FORECAST_VARIABLES)):
+                out[h, n] = np.random.normal(table[hour+1+h, n], sigma[n])
+        return out
+
+    forecast = WeatherForecast(seed=0)
+    forecast.update(1, table)
+    n = 2000
+    for name, fn in [('scalar draws', legacy_step), ('vectorized draw', lambda: forecast.predict(12, out))]:
+        t = timeit.timeit(fn, number=n)
+        print(f"{name}: {t/n*1e6:.1f} us/step")
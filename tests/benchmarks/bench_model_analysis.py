@@ -0,0 +1,26 @@
+"""# BENCHMARK OF THE MODEL ANALYSIS
+
+Time of the analysis of a model, for the properties computed in each episode.
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_model_analysis.py [epjson]
+"""
+from eprllib.tools.model_analysis import ModelAnalysis
+
+if __name__ == '__main__':
+    import sys
+    import timeit
+    from eprllib.tools import epjson_cache
+
+    epjson = sys.argv[1] if len(sys.argv) > 1 else 'tests/files/prot_3_ceiling.epJSON'
+    epJSON_object = epjson_cache.load_epjson(epjson)
+    analysis = ModelAnalysis(epJSON_object)
+    print(f"{len(analysis.surface_names)} surfaces, {len(analysis.construction_names)} constructions, {len(analysis.material_names)} materials")
+    print(f"U-factor: {analysis.u_factor():.2f} W/K, inertial mass: {analysis.inertial_mass():.4g} J/K")
+    n = 1000
+    def analyze():
+        analysis = ModelAnalysis(epJSON_object)
+        return analysis.u_factor(), analysis.inertial_mass()
+    seconds = timeit.timeit(analyze, number=n) / n
+    print(f"Analysis: {seconds*1e6:.0f} us")
@@ -0,0 +1,66 @@
+"""# BENCHMARK OF THE OBSERVATION LAYOUT
+
+Microbenchmark of the observation assembly per timestep (EnergyPlus calls are not included).
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_obs_layout.py
+"""
+import numpy as np
+
+from eprllib.env.multiagent.marl_ep_obs_layout import (
+    BUILDING_PROPERTIES, FORECAST_VARIABLES, FORECAST_HOURS, ObservationLayout
+)
+
+if __name__ == '__main__':
+    import timeit
+
+    env_config = {
+        "ep_variables": {key: (key, "Environment") for key in ["To", "Ti", "v", "d", "RHo", "RHi", "pres", "occupancy", "ppd"]},
+        "ep_meters": {"electricity": "Electricity", "gas": "NaturalGas"},
+        "ep_actuators": {"opening_window_1": (), "opening_window_2": ()},
+        "ep_actuators_type": {"opening_window_1": [4], "opening_window_2": [5]},
+        "episode_config": {key: 1. for key in BUILDING_PROPERTIES},
+        "time_variables": ['hour', 'day_of_year', 'day_of_week'],
+        "weather_variables": ['is_raining', 'sun_is_up', 'today_weather_beam_solar_at_time'],
+        "infos_variables": ["ppd", "occupancy", "Ti"],
+        "no_observable_variables": ["ppd"],
+    }
+    raw = {key: 1. for key in list(env_config['ep_variables']) + list(env_config['ep_meters']) + list(env_config['ep_actuators'])}
+    extra = {key: 1. for key in env_config['time_variables'] + env_config['weather_variables']}
+    forecast = np.ones((FORECAST_HOURS, len(FORECAST_VARIABLES)))
+
+    def legacy_step():
+        obs = {**{key: value for key, value in raw.items()}}
+        obs.update({key: env_config['episode_config'][key] for key in BUILDING_PROPERTIES})
+        obs.update({key: value for key, value in extra.items()})
+        weather_pred = {}
+        for h in range(FORECAST_HOURS):
+            weather_pred.update({f'{variable}_at_time_{h}': forecast[h, n] for n, variable in enumerate(FORECAST_VARIABLES)})
+        obs.update(weather_pred)
+        infos_dict = {variable: obs[variable] for variable in env_config['infos_variables']}
+        infos = {agent: infos_dict for agent in env_config['ep_actuators']}
+        for variable in env_config['no_observable_variables']:
+            del obs[variable]
+        next_obs = np.array(list(obs.values()))
+        return {
+            agent: np.concatenate(([n], env_config['ep_actuators_type'][agent], next_obs))
+            for n, agent in enumerate(env_config['ep_actuators'], start=1)
+        }, infos
+
+    layout = ObservationLayout(env_config)
+    layout.fill_building_properties(env_config['episode_config'])
+    slots = [(layout.index[key], value) for key, value in {**raw, **extra}.items()]
+
+    def layout_step():
+        values = layout.values
+        for slot, value in slots:
+            values[slot] = value
+        layout.forecast[:] = forecast
+        return layout.observations(), layout.infos()
+
+    assert all(np.array_equal(legacy_step()[0][agent], layout_step()[0][agent]) for agent in layout.agent_ids)
+    n = 20000
+    for name, fn in [('dict + concatenate', legacy_step), ('compiled layout', layout_step)]:
+        t = timeit.timeit(fn, number=n)
+        print(f"{name}: {t/n*1e6:.1f} us/step")
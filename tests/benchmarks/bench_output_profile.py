@@ -0,0 +1,47 @@
+"""# BENCHMARK OF THE OUTPUT PROFILE
+
+Output objects of a model with and without the training profile. If EnergyPlus is installed, the size of
+the output folder of a design day simulation is compared too.
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_output_profile.py [epjson] [epw]
+"""
+import os
+import tempfile
+
+from eprllib.tools import epjson_cache
+from eprllib.tools.output_profile import profiled_epjson
+
+if __name__ == '__main__':
+    import sys
+    import timeit
+    import shutil
+    from eprllib.tools import model_output
+
+    epjson = sys.argv[1] if len(sys.argv) > 1 else 'tests/files/prot_3_ceiling.epJSON'
+    epw = sys.argv[2] if len(sys.argv) > 2 else 'tests/files/GEF_Lujan_de_cuyo-hour-H1.epw'
+    output = tempfile.mkdtemp()
+    env_config = {'epjson': epjson, 'output': output, 'output_profile': 'training', 'is_test': False}
+    epJSON_object = epjson_cache.load_epjson(epjson)
+    profiled = profiled_epjson(env_config)
+    for name, path in [('full', epjson), ('training', profiled)]:
+        model = epjson_cache.load_epjson(path)
+        outputs = {key: len(value) for key, value in model.items() if key.startswith('Output')}
+        print(f"{name}: {os.path.getsize(path)} bytes, output objects {outputs}")
+
+    try:
+        from eprllib.env.multiagent.marl_ep_backend import energyplus_api
+        api = energyplus_api()
+    except ImportError:
+        print('EnergyPlus is not installed, the simulations are not compared.')
+        sys.exit(0)
+    for name, path in [('full', epjson), ('training', profiled)]:
+        state = api.state_manager.new_state()
+        api.runtime.set_console_output_status(state, False)
+        folder = os.path.join(output, name)
+        start = timeit.default_timer()
+        api.runtime.run_energyplus(state, ['-D', '-w', epw, '-d', folder, path])
+        print(f"{name}: {timeit.default_timer() - start:.2f} s, {model_output.path_size(folder)} bytes of outputs")
+        api.state_manager.delete_state(state)
+    shutil.rmtree(output, ignore_errors=True)
@@ -0,0 +1,72 @@
+"""# BENCHMARK OF THE REWARD FUNCTIONS
+
+Cost of a step of the compiled reward functions for different lengths of the window.
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_rewards.py
+"""
+import numpy as np
+
+from eprllib.tools.rewards import Dalamagkidis2007, NormalizeRewardFunction
+
+if __name__ == '__main__':
+    import timeit
+    from types import SimpleNamespace
+
+    for cut_reward_len_timesteps in [1, 144, 1008]:
+        env_config = {
+            'agent_ids': ['agent_1'],
+            'reward_function_config': {
+                'cut_reward_len_timesteps': cut_reward_len_timesteps,
+                'energy_ref': 6805274,
+                'co2_ref': 870,
+                'cooling_energy_ref': 1e6,
+                'heating_energy_ref': 1e6,
+                'occupancy_name': 'occupancy',
+                'ppd_name': 'ppd',
+                'T_interior_name': 'Ti',
+                'cooling_name': 'cooling',
+                'heating_name': 'heating',
+                'co2_name': 'co2',
+            },
+        }
+        env = SimpleNamespace(env_config=env_config, episode=0, timestep=0)
+        infos = {'agent_1': {'occupancy': 2, 'ppd': 12., 'Ti': 24., 'cooling': 1e5, 'heating': 0., 'co2': 900.}}
+        for reward_class in [Dalamagkidis2007, NormalizeRewardFunction]:
+            reward_function = reward_class()
+            reward_function.configure(env_config)
+            def step():
+                env.timestep += 1
+                reward_function(env, infos)
+            n = 100000
+            print(f"{reward_class.__name__} (cut_reward_len_timesteps={cut_reward_len_timesteps}): {timeit.timeit(step, number=n)/n*1e6:.2f} us/step")
+
+    # Rewards of a recorded year for a grid of weights, with the vectorized form and with the per-step loop.
+    T = 52560
+    rng = np.random.default_rng(0)
+    columns = {
+        'occupancy': rng.integers(0, 3, T).astype(np.float64),
+        'ppd': rng.uniform(5, 60, T),
+        'Ti': rng.uniform(15, 31, T),
+        'cooling': rng.uniform(0, 1e6, T),
+        'heating': rng.uniform(0, 1e6, T),
+        'co2': rng.uniform(400, 1500, T),
+    }
+    env_config['reward_function_config']['cut_reward_len_timesteps'] = 144
+    settings = [{'w1': w1, 'w2': w2} for w1 in np.linspace(0.1, 1, 10) for w2 in np.linspace(0.01, 0.1, 10)]
+    reward_function = Dalamagkidis2007()
+    reward_function.configure(env_config)
+    start = timeit.default_timer()
+    reward_function.grid(columns, settings)
+    print(f"Dalamagkidis2007.grid ({len(settings)} settings, T={T}): {timeit.default_timer() - start:.3f} s")
+    start = timeit.default_timer()
+    rows = [dict(zip(columns, values)) for values in zip(*[columns[name].tolist() for name in columns])]
+    for setting in settings[:10]:
+        reward_function = Dalamagkidis2007()
+        reward_function.configure({**env_config, 'reward_function_config': {**env_config['reward_function_config'], **setting}})
+        env.timestep = 0
+        for row in rows:
+            env.timestep += 1
+            reward_function(env, {'agent_1': row})
+    print(f"Dalamagkidis2007 per-step loop ({len(settings)} settings, T={T}): {(timeit.default_timer() - start)*len(settings)/10:.3f} s (estimated from 10 settings)")
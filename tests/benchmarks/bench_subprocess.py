@@ -0,0 +1,42 @@
+"""# BENCHMARK OF THE SHARED MEMORY EXCHANGE
+
+Round trip latency through the shared memory block with a mock EnergyPlus process.
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_subprocess.py
+"""
+import numpy as np
+import multiprocessing
+
+from eprllib.env.multiagent.marl_ep_subprocess import SharedMemoryExchange
+
+def _mock_energyplus(attach_args, n: int) -> None:
+    """EnergyPlus process of the benchmark: it answers each action with the same observation.
+    """
+    exchange = SharedMemoryExchange(*attach_args)
+    obs = {agent: np.ones(exchange.obs_dim, dtype=np.float32) for agent in exchange.agent_ids}
+    infos = {agent: {variable: 1. for variable in exchange.infos_variables} for agent in exchange.agent_ids}
+    exchange.put_observation(obs, infos)
+    for _ in range(n):
+        exchange.get_action(10)
+        exchange.put_observation(obs, infos)
+    exchange.release()
+
+if __name__ == '__main__':
+    import timeit
+
+    n = 20000
+    exchange = SharedMemoryExchange(['agent_1', 'agent_2'], 167, ['Ti', 'ppd', 'occupancy'])
+    process = multiprocessing.get_context('spawn').Process(target=_mock_energyplus, args=(exchange.attach_args(), n))
+    process.start()
+    exchange.peer = process
+    exchange.get_observation()
+    action = {'agent_1': 1, 'agent_2': 0}
+    start = timeit.default_timer()
+    for _ in range(n):
+        exchange.put_action(action)
+        exchange.get_observation(5)
+    print(f"SharedMemoryExchange: {(timeit.default_timer() - start)/n*1e6:.1f} us/round trip")
+    process.join()
+    exchange.release()
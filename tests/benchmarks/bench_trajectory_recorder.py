@@ -0,0 +1,54 @@
+"""# BENCHMARK OF THE TRAJECTORY RECORDER
+
+Time to save a year of 10 minutes timesteps with the CSV writer and with the recorder.
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_trajectory_recorder.py
+"""
+import os
+import numpy as np
+
+from eprllib.postprocess.trajectory_recorder import TrajectoryRecorder, load_trajectory
+
+if __name__ == '__main__':
+    import csv
+    import tempfile
+    import timeit
+
+    T = 52560
+    obs_names = [f'obs_{n}' for n in range(167)]
+    agent_ids = ['opening_window_1', 'opening_window_2']
+    infos_names = ['ppd', 'occupancy', 'Ti']
+    rng = np.random.default_rng(0)
+    obs = rng.normal(size=(len(agent_ids), len(obs_names))).astype(np.float32)
+    obs_dict = {agent: obs[n] for n, agent in enumerate(agent_ids)}
+    actions_dict = {agent: 1 for agent in agent_ids}
+    reward = {agent: -0.5 for agent in agent_ids}
+    done = {'__all__': False}
+    infos_dict = {'ppd': 12., 'occupancy': 2., 'Ti': 24.}
+    infos = {agent: infos_dict for agent in agent_ids}
+    folder = tempfile.mkdtemp()
+
+    start = timeit.default_timer()
+    with open(os.path.join(folder, 'legacy.csv'), 'w') as data:
+        writer = csv.writer(data)
+        for _ in range(T):
+            row = obs_dict[agent_ids[0]].tolist() + list(actions_dict.values())
+            row += [reward[agent_ids[0]], done['__all__'], done['__all__']] + list(infos[agent_ids[0]].values())
+            writer.writerow(row)
+    print(f"csv.writer: {timeit.default_timer() - start:.2f} s")
+
+    start = timeit.default_timer()
+    with TrajectoryRecorder(os.path.join(folder, 'recorder'), obs_names, agent_ids, infos_names) as recorder:
+        for _ in range(T):
+            recorder.record(obs_dict, actions_dict, reward, done, done, infos)
+    print(f"TrajectoryRecorder: {timeit.default_timer() - start:.2f} s")
+
+    start = timeit.default_timer()
+    np.loadtxt(os.path.join(folder, 'legacy.csv'), delimiter=',', dtype=str)
+    print(f"Read the CSV file: {timeit.default_timer() - start:.2f} s")
+    start = timeit.default_timer()
+    trajectory = load_trajectory(os.path.join(folder, 'recorder'))
+    trajectory['Ti'].mean()
+    print(f"Memory-map the trajectory and read a column: {timeit.default_timer() - start:.3f} s")
@@ -0,0 +1,108 @@
+"""# BENCHMARK OF THE VECTOR ENVIRONMENT
+
+Throughput with the example building of the tests folder. It requires EnergyPlus.
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_vector_env.py [num_envs] [num_steps]
+"""
+import os
+import numpy as np
+import multiprocessing
+from time import perf_counter
+from typing import Any, Dict, Tuple
+
+from eprllib.env.multiagent.marl_ep_gym_env import EnergyPlusEnv_v0
+from eprllib.env.multiagent.marl_ep_vector_env import EnergyPlusVectorEnv
+
+def _sample_actions(action_space, shape: Tuple[int, ...]) -> np.ndarray:
+    return np.array([action_space.sample() for _ in range(int(np.prod(shape)))]).reshape(shape)
+
+def _single_env_worker(env_config: Dict[str, Any], num_steps: int) -> int:
+    """Step a single environment with random actions, like a rollout worker with one environment.
+    """
+    env = EnergyPlusEnv_v0(env_config)
+    env.reset()
+    agent_ids = env.env_config['agent_ids']
+    for _ in range(num_steps):
+        actions = _sample_actions(env.action_space, (len(agent_ids),))
+        _, _, terminated, truncated, _ = env.step(dict(zip(agent_ids, actions)))
+        if terminated['__all__'] or truncated['__all__']:
+            env.reset()
+    env.close()
+    return num_steps
+
+def throughput_benchmark(env_config: Dict[str, Any], num_envs: int, num_steps: int) -> Dict[str, float]:
+    """Compare the environment steps per second of a vector environment with `num_envs` buildings in
+    one process against `num_envs` processes with one environment each (the same core count of
+    `num_rollout_workers=num_envs`). The warmup is included in both cases.
+
+    Args:
+        env_config (Dict[str, Any]): Environment configuration.
+        num_envs (int): Number of buildings.
+        num_steps (int): Steps of each building.
+
+    Returns:
+        Dict[str, float]: Steps per second of each option.
+    """
+    start = perf_counter()
+    vector_env = EnergyPlusVectorEnv(env_config, num_envs)
+    vector_env.reset()
+    for _ in range(num_steps):
+        vector_env.step(_sample_actions(vector_env.action_space, (num_envs, len(vector_env.agent_ids))))
+    vector_env.close()
+    vector_steps_s = num_envs*num_steps / (perf_counter() - start)
+
+    start = perf_counter()
+    with multiprocessing.get_context('spawn').Pool(num_envs) as pool:
+        pool.starmap(_single_env_worker, [
+            ({**env_config, 'output': os.path.join(env_config['output'], f'worker-{index:03}')}, num_steps)
+            for index in range(num_envs)
+        ])
+    workers_steps_s = num_envs*num_steps / (perf_counter() - start)
+    return {'vector_env_steps_s': vector_steps_s, 'separate_workers_steps_s': workers_steps_s}
+
+if __name__ == '__main__':
+    import sys
+    import tempfile
+    from gymnasium.spaces import Discrete
+
+    num_envs = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    num_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    env_config = {
+        'epjson': 'tests/files/prot_3_ceiling.epJSON',
+        'epw_training': 'tests/files/GEF_Lujan_de_cuyo-hour-H1.epw',
+        'epw': 'tests/files/GEF_Lujan_de_cuyo-hour-H4.epw',
+        'output': tempfile.mkdtemp(),
+        'ep_terminal_output': False,
+        'is_test': False,
+        'action_space': Discrete(2),
+        'ep_variables': {
+            'To': ('Site Outdoor Air Drybulb Temperature', 'Environment'),
+            'Ti': ('Zone Mean Air Temperature', 'Thermal Zone: Living'),
+            'occupancy': ('Zone People Occupant Count', 'Thermal Zone: Living'),
+            'ppd': ('Zone Thermal Comfort Fanger Model PPD', 'Living Occupancy'),
+        },
+        'ep_meters': {
+            'electricity': 'Electricity:Zone:THERMAL ZONE: LIVING',
+            'gas': 'NaturalGas:Zone:THERMAL ZONE: LIVING',
+        },
+        'ep_actuators': {
+            'opening_window_1': ('AirFlow Network Window/Door Opening', 'Venting Opening Factor', 'living_NW_window'),
+            'opening_window_2': ('AirFlow Network Window/Door Opening', 'Venting Opening Factor', 'living_E_window'),
+        },
+        'ep_actuators_type': {'opening_window_1': 4, 'opening_window_2': 5},
+        'time_variables': ['hour', 'day_of_year'],
+        'weather_variables': ['is_raining', 'sun_is_up'],
+        'infos_variables': ['ppd', 'occupancy', 'Ti'],
+        'no_observable_variables': ['ppd'],
+        'episode_config': {
+            'building_area': 0., 'aspect_ratio': 0., 'window_area_relation_north': 0.,
+            'window_area_relation_east': 0., 'window_area_relation_south': 0., 'window_area_relation_west': 0.,
+            'inercial_mass': 0., 'construction_u_factor': 0., 'E_cool_ref': 1., 'E_heat_ref': 1.,
+        },
+        'T_confort': 23.5,
+        'energyplus_backend': 'subprocess',
+    }
+    for name, value in throughput_benchmark(env_config, num_envs, num_steps).items():
+        print(f"{name}: {value:.0f}")
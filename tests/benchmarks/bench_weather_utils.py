@@ -0,0 +1,35 @@
+"""# BENCHMARK OF THE WEATHER UTILS
+
+Time of the day-range queries with the DataFrame mask and with the slices of the store.
+
+Run it from the root of the repository:
+
+    python tests/benchmarks/bench_weather_utils.py [epw]
+"""
+import pandas as pd
+
+from eprllib.tools.weather_utils import EPW_HEADER_ROWS, EPWStore, epw_store, Probabilities
+
+if __name__ == '__main__':
+    import sys
+    import timeit
+
+    epw_path = sys.argv[1] if len(sys.argv) > 1 else 'tests/files/GEF_Lujan_de_cuyo-hour-H4.epw'
+    weather_file = pd.read_csv(epw_path, header=None, skiprows=EPW_HEADER_ROWS)
+    weather_file = pd.concat([weather_file, weather_file.head(240)], ignore_index=True)
+    store = epw_store(epw_path)
+    n = 2000
+    t = timeit.timeit(lambda: weather_file[((weather_file.index % 9240) // 24 + 1).isin(range(200, 210))], number=n)
+    print(f"DataFrame mask: {t/n*1e6:.1f} us/query")
+    t = timeit.timeit(lambda: store.days(200, 10), number=n)
+    print(f"EPWStore.days: {t/n*1e6:.1f} us/query")
+    t = timeit.timeit(lambda: EPWStore(epw_path), number=20)
+    print(f"EPWStore from the .npy file: {t/20*1e3:.2f} ms")
+
+    # Time of the noisy predictions of 10 days.
+    probabilities = Probabilities({'epw': epw_path, 'is_test': True}, seed=0)
+    n = 200
+    t = timeit.timeit(lambda: probabilities.n_days_predictions(200, 10), number=n)
+    print(f"n_days_predictions (10 days): {t/n*1e6:.1f} us")
+    t = timeit.timeit(lambda: probabilities.n_days_predictions(200, 10, n_ensembles=50), number=n)
+    print(f"n_days_predictions (10 days, 50 ensembles): {t/n*1e6:.1f} us")
@@ -0,0 +1,49 @@
+"""Steps per second of `EnergyPlusEnv_v0.step()` with the mock backend (see `marl_ep_backend`). The mock
+backend measures the Python side of the environment (exchange, observation assembly and reward) without
+EnergyPlus, so the changes in that side can be compared between commits:
+
+    pytest tests/benchmarks --benchmark-autosave
+    pytest tests/benchmarks --benchmark-compare
+
+The steps per second of each benchmark are saved in `extra_info`. The `bench_*.py` scripts of this
+folder are microbenchmarks of the components of the environment and the tools, compared with the
+implementations that they replaced. They are not collected by pytest.
+"""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+def run_episode(env):
+    """Step the environment with random actions until the end of the simulation."""
+    agent_ids = env.env_config['agent_ids']
+    steps = 0
+    terminated = {'__all__': False}
+    while not terminated['__all__']:
+        _, _, terminated, _, _ = env.step({agent: env.action_space.sample() for agent in agent_ids})
+        steps += 1
+    return steps
+
+@pytest.mark.parametrize('changes', [
+    {},
+    {'decision_interval': 6},
+    {'actuator_deduplication': False},
+], ids=['default', 'decision_interval', 'no_deduplication'])
+def test_env_step_mock(benchmark, mock_env_config, changes):
+    from eprllib.env.multiagent.marl_ep_gym_env import EnergyPlusEnv_v0
+    envs = []
+    def setup():
+        # The creation and the reset of the environment are not measured.
+        env = EnergyPlusEnv_v0(mock_env_config(days=7, **changes))
+        env.reset()
+        envs.append(env)
+        return (env,), {}
+    try:
+        steps = benchmark.pedantic(run_episode, setup=setup, rounds=3, iterations=1)
+    finally:
+        for env in envs:
+            env.close()
+    benchmark.extra_info['steps'] = steps
+    # There are not stats with --benchmark-disable.
+    if benchmark.stats is not None:
+        benchmark.extra_info['steps_per_second'] = steps/benchmark.stats.stats.mean
+    assert steps > 0
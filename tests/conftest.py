@@ -0,0 +1,69 @@
+"""Shared fixtures of the test suite.
+
+The environment tests run with the mock simulator backend (see `eprllib.env.multiagent.marl_ep_backend`),
+so they do not need EnergyPlus. They are skipped when RLlib is not installed.
+"""
+import pytest
+from typing import Any, Callable, Dict
+
+from eprllib.env.multiagent.marl_ep_obs_layout import BUILDING_PROPERTIES
+
+def make_mock_env_config(output: str, days: int = 7) -> Dict[str, Any]:
+    """Configuration of an environment with two windows simulated with the mock backend."""
+    from gymnasium.spaces import Discrete
+    return {
+        'epjson': 'mock.epJSON',
+        'epw_training': 'mock.epw',
+        'epw': 'mock.epw',
+        'output': output,
+        'ep_terminal_output': False,
+        'is_test': False,
+        'action_space': Discrete(4),
+        'ep_variables': {
+            'To': ('Site Outdoor Air Drybulb Temperature', 'Environment'),
+            'Ti': ('Zone Mean Air Temperature', 'Thermal Zone: Living'),
+            'v': ('Site Wind Speed', 'Environment'),
+            'd': ('Site Wind Direction', 'Environment'),
+            'RHo': ('Site Outdoor Air Relative Humidity', 'Environment'),
+            'RHi': ('Zone Air Relative Humidity', 'Thermal Zone: Living'),
+            'pres': ('Site Outdoor Air Barometric Pressure', 'Environment'),
+            'occupancy': ('Zone People Occupant Count', 'Thermal Zone: Living'),
+            'ppd': ('Zone Thermal Comfort Fanger Model PPD', 'Living Occupancy'),
+        },
+        'ep_meters': {
+            'heating': 'Heating:DistrictHeatingWater',
+            'cooling': 'Cooling:DistrictCooling',
+        },
+        'ep_actuators': {
+            'opening_window_1': ('AirFlow Network Window/Door Opening', 'Venting Opening Factor', 'living_NW_window'),
+            'opening_window_2': ('AirFlow Network Window/Door Opening', 'Venting Opening Factor', 'living_E_window'),
+        },
+        'ep_actuators_type': {'opening_window_1': 4, 'opening_window_2': 5},
+        'time_variables': ['hour', 'day_of_year', 'day_of_week'],
+        'weather_variables': ['is_raining', 'sun_is_up', 'today_weather_beam_solar_at_time'],
+        'infos_variables': ['ppd', 'occupancy', 'Ti', 'heating', 'cooling'],
+        'no_observable_variables': ['ppd'],
+        'episode_config': {key: 1. for key in BUILDING_PROPERTIES},
+        'reward_function_config': {
+            'co2_reward': False,
+            'energy_ref': 6805274,
+            'occupancy_name': 'occupancy',
+            'ppd_name': 'ppd',
+            'T_interior_name': 'Ti',
+            'cooling_name': 'cooling',
+            'heating_name': 'heating',
+        },
+        'forecast_seed': 3,
+        'simulator_backend': 'mock',
+        'mock_backend_config': {'days': days},
+    }
+
+@pytest.fixture
+def mock_env_config(tmp_path) -> Callable[..., Dict[str, Any]]:
+    """Factory of mock environment configurations with the output in a temporary folder."""
+    pytest.importorskip('ray')
+    def factory(days: int = 7, **changes) -> Dict[str, Any]:
+        env_config = make_mock_env_config(str(tmp_path), days)
+        env_config.update(changes)
+        return env_config
+    return factory
@@ -0,0 +1,55 @@
+"""The rewards of an episode do not depend on the decision interval (see `marl_ep_decision`)."""
+import numpy as np
+import pytest
+
+from eprllib.tools import rewards
+
+def comfort_traces(days: int):
+    """Traces of the mock backend inside the comfort band, with the occupants absent in some hours. The
+    PPD, the temperature and the occupancy are constant in blocks of 6 timesteps, so the nonlinear terms
+    of the rewards are the same with the means of a 6 timesteps interval.
+    """
+    t = np.arange(days*144)
+    block = t // 6
+    return {
+        'thermal zone: living:zone mean air temperature': 22. + 3.*np.sin(2*np.pi*block/24),
+        'living occupancy:zone thermal comfort fanger model ppd': 20. + 15.*np.sin(2*np.pi*block/12),
+        'thermal zone: living:zone people occupant count': 2.*((block // 4) % 2),
+        'heating:districtheatingwater': 1000. + 500.*np.sin(2*np.pi*t/144),
+        'cooling:districtcooling': 300. + 200.*np.cos(2*np.pi*t/144),
+    }
+
+def episode_rewards(env_config):
+    from eprllib.env.multiagent.marl_ep_gym_env import EnergyPlusEnv_v0
+    env = EnergyPlusEnv_v0(env_config)
+    env.reset()
+    totals = [0.]
+    while True:
+        # Constant actions, so the aggregated values are the values of each timestep.
+        _, reward, terminated, truncated, _ = env.step({agent: 1 for agent in env_config['agent_ids']})
+        totals[-1] += reward['opening_window_1']
+        if terminated['__all__']:
+            break
+        if truncated['__all__']:
+            env.reset()
+            totals.append(0.)
+    env.close()
+    # The last step after the end of the simulation repeats the last infos.
+    return totals[:-1]
+
+@pytest.mark.parametrize('reward_function', [rewards.dalamagkidis_2007, rewards.normalize_reward_function])
+@pytest.mark.parametrize('cut_reward_len_timesteps', [1, 6, 144])
+def test_decision_interval_keeps_episode_rewards(mock_env_config, reward_function, cut_reward_len_timesteps):
+    totals = {}
+    for k in [1, 6]:
+        env_config = mock_env_config(days=2, cut_episode_len=1, decision_interval=k, reward_function=reward_function)
+        env_config['mock_backend_config']['traces'] = comfort_traces(2)
+        env_config['reward_function_config'] = {
+            **env_config['reward_function_config'],
+            'cut_reward_len_timesteps': cut_reward_len_timesteps,
+            'cooling_energy_ref': 1e3,
+            'heating_energy_ref': 1e3,
+        }
+        totals[k] = episode_rewards(env_config)
+    assert len(totals[1]) == 2
+    assert totals[6] == pytest.approx(totals[1], rel=1e-9)
@@ -0,0 +1,48 @@
+"""The episode models are pregenerated in a process pool (see `tools.episode_pregeneration`)."""
+import pytest
+
+from eprllib.tools.episode_pregeneration import EpisodePregenerator
+
+def same_model(env_config):
+    """Episode configuration function that keeps the model of the env_config."""
+    env_config['episode_config'] = {**env_config['episode_config'], 'episode': env_config['episode']}
+    return env_config
+
+def test_env_side_keys_are_not_sent_to_the_workers():
+    from eprllib.env.multiagent.marl_ep_subprocess import ENV_SIDE_KEYS
+    env_config = {
+        'epjson': 'mock.epJSON',
+        'episode_config': {},
+        # Lambdas can not be pickled by the spawn workers.
+        'reward_function': lambda EnvObject, infos: 0.,
+        'episode_len_fn': lambda env_config: 7,
+        'episode_pregeneration': {'queue_depth': 2},
+    }
+    pregenerator = EpisodePregenerator(same_model, env_config, queue_depth=2, env_side_keys=ENV_SIDE_KEYS)
+    try:
+        episodes = [pregenerator.pop()['episode_config']['episode'] for _ in range(3)]
+        metrics = pregenerator.metrics()
+    finally:
+        pregenerator.shutdown()
+    assert episodes == [0, 1, 2]
+    assert metrics['reset_wait_s'] >= 0.
+
+def test_reset_wait_in_timing_metrics(mock_env_config):
+    from eprllib.env.multiagent.marl_ep_gym_env import EnergyPlusEnv_v0
+    env_config = mock_env_config(
+        days=1,
+        reward_function=lambda EnvObject, infos: 0.,
+        episode_config_fn=same_model,
+        episode_pregeneration={'queue_depth': 1},
+        callback_timing=True,
+    )
+    env = EnergyPlusEnv_v0(env_config)
+    try:
+        env.reset()
+        terminated = {'__all__': False}
+        while not terminated['__all__']:
+            _, _, terminated, _, _ = env.step({agent: 1 for agent in env_config['agent_ids']})
+    finally:
+        env.close()
+    assert env.timing_metrics['reset_wait_ms'] >= 0.
+    assert env.timing_metrics['reset_ms'] >= env.timing_metrics['reset_wait_ms']
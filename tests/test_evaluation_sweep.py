@@ -0,0 +1,25 @@
+"""Names of the cells of the evaluation sweep (see `postprocess.evaluation_sweep`)."""
+import os
+import pytest
+
+from eprllib.postprocess.evaluation_sweep import sweep_cells
+
+def test_same_stem_in_two_folders_are_different_cells(tmp_path):
+    epjsons = ['buildings/a/prot_1.epJSON', 'buildings/b/prot_1.epJSON', 'buildings/a/prot_3.epJSON']
+    cells = sweep_cells({}, str(tmp_path), epjsons, ['weather/H4.epw'], noventilation=True)
+    names = [cell['cell'] for cell in cells]
+    outputs = {cell['env_config']['output'] for cell in cells}
+    assert len(set(names)) == len(outputs) == 3
+    assert names[2] == 'noventilation__prot_3__H4'
+    assert names[0].startswith('noventilation__prot_1_') and names[1].startswith('noventilation__prot_1_')
+    # The names do not change between executions.
+    assert names == [cell['cell'] for cell in sweep_cells({}, str(tmp_path), epjsons, ['weather/H4.epw'], noventilation=True)]
+
+def test_same_file_with_two_paths_is_repeated(tmp_path):
+    epws = ['weather/H4.epw', os.path.join(os.getcwd(), 'weather/H4.epw')]
+    with pytest.raises(ValueError):
+        sweep_cells({}, str(tmp_path), ['prot_1.epJSON'], epws, noventilation=True)
+
+def test_checkpoints_default(tmp_path):
+    cells = sweep_cells({}, str(tmp_path), ['prot_1.epJSON'], ['H4.epw'], conventional={'SP_temp': 22})
+    assert [cell['controller']['name'] for cell in cells] == ['conventional']
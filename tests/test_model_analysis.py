@@ -0,0 +1,69 @@
+"""The areas, U-factor and thermal mass of `tools.model_analysis` in a model small enough to compute them
+by hand: a wall of 4 x 3 m with a window of 2 x 1 m and an internal mass of 5 m2.
+"""
+import pytest
+
+from eprllib.tools.model_analysis import ModelAnalysis
+
+def rectangle(x0, x1, z0, z1):
+    """Vertices of a rectangle in the plane y=0, counterclockwise seen from outside."""
+    return [(x0, 0., z1), (x0, 0., z0), (x1, 0., z0), (x1, 0., z1)]
+
+def make_epJSON():
+    wall = rectangle(0., 4., 0., 3.)
+    window = rectangle(1., 3., 1., 2.)
+    return {
+        'Material': {
+            'Concrete': {'thickness': 0.2, 'conductivity': 1.0, 'density': 2000., 'specific_heat': 1000.},
+        },
+        'Material:NoMass': {
+            'Insulation': {'thermal_resistance': 2.3},
+        },
+        'WindowMaterial:SimpleGlazingSystem': {
+            'Glazing': {'u_factor': 2.0, 'solar_heat_gain_coefficient': 0.6},
+        },
+        'Construction': {
+            'Wall': {'outside_layer': 'Concrete', 'layer_2': 'Insulation'},
+            'Window': {'outside_layer': 'Glazing'},
+        },
+        'BuildingSurface:Detailed': {
+            'South Wall': {
+                'construction_name': 'Wall',
+                'vertices': [
+                    {'vertex_x_coordinate': x, 'vertex_y_coordinate': y, 'vertex_z_coordinate': z} for x, y, z in wall
+                ],
+            },
+        },
+        'FenestrationSurface:Detailed': {
+            'South Window': {
+                'construction_name': 'Window',
+                'building_surface_name': 'South Wall',
+                **{
+                    f'vertex_{v}_{axis}_coordinate': value
+                    for v, vertex in enumerate(window, start=1) for axis, value in zip('xyz', vertex)
+                },
+            },
+        },
+        'InternalMass': {
+            'Furniture': {'construction_name': 'Wall', 'surface_area': 5.},
+        },
+    }
+
+def test_areas():
+    analysis = ModelAnalysis(make_epJSON())
+    assert analysis.surface_names == ['South Wall', 'South Window']
+    assert analysis.areas == pytest.approx([12., 2.])
+    # The window is subtracted of its wall.
+    assert analysis.net_areas == pytest.approx([10., 2.])
+
+def test_u_factor():
+    analysis = ModelAnalysis(make_epJSON())
+    # Wall: R = 0.2/1.0 + 2.3 = 2.5 m2-K/W, U = 0.4 W/m2-K. Window: U = 2.0 W/m2-K.
+    assert analysis.surface_u_factors() == pytest.approx([0.4, 2.0])
+    assert analysis.u_factor() == pytest.approx(10.*0.4 + 2.*2.0)
+
+def test_inertial_mass():
+    analysis = ModelAnalysis(make_epJSON())
+    # Wall: C = 0.2*2000*1000 = 4e5 J/m2-K, the insulation and the glazing have no mass.
+    assert analysis.construction_capacity == pytest.approx([4e5, 0.])
+    assert analysis.inertial_mass() == pytest.approx(10.*4e5 + 5.*4e5)
@@ -0,0 +1,47 @@
+"""Deletion of the files of the episodes with the quota of `tools.model_output`."""
+import os
+
+from eprllib.tools.model_output import ModelOutputManager
+
+def play_episodes(manager, tmp_path, episodes, size=1000):
+    """Write a model and an output folder of `size` bytes for each episode and release them."""
+    for episode in range(episodes):
+        model = os.path.join(manager.models_dir, f'model-{episode:08}.epJSON')
+        with open(model, 'w') as f:
+            f.write('x'*size)
+        output = tmp_path / 'output' / f'episode-{episode:08}'
+        output.mkdir(parents=True)
+        (output / 'eplusout.err').write_text('x'*size)
+        manager.start_episode(episode, {'epjson': model, 'output': str(tmp_path / 'output')})
+        manager.release()
+
+def test_quota_deletes_the_oldest_episodes(tmp_path):
+    (tmp_path / 'models').mkdir()
+    manager = ModelOutputManager(str(tmp_path / 'models'), keep_last=5, quota_mb=5000/2**20)
+    play_episodes(manager, tmp_path, 4)
+    assert manager.metrics['kept_bytes'] == 4000
+    assert manager.metrics['quota_exceeded'] == 2
+    assert sorted(os.listdir(tmp_path / 'output')) == ['episode-00000002', 'episode-00000003']
+
+def test_quota_with_deletion_disabled(tmp_path, capsys):
+    (tmp_path / 'models').mkdir()
+    manager = ModelOutputManager(str(tmp_path / 'models'), delete_models=False, keep_last=1, quota_mb=2500/2**20)
+    play_episodes(manager, tmp_path, 4)
+    # The outputs of the old episodes are deleted by keep_last, the models are kept.
+    assert manager.metrics['kept_bytes'] == 4*1000 + 1000
+    assert len(os.listdir(tmp_path / 'models')) == 4
+    assert os.listdir(tmp_path / 'output') == ['episode-00000003']
+    # Only in the episode 1 the deletion of the outputs was enough to meet the quota.
+    assert manager.metrics['quota_exceeded'] == 1
+    assert len(manager.kept) == 1
+    assert capsys.readouterr().out.count('can not be enforced') == 1
+
+def test_no_deletion(tmp_path, capsys):
+    (tmp_path / 'models').mkdir()
+    manager = ModelOutputManager(str(tmp_path / 'models'), delete_models=False, delete_outputs=False, quota_mb=1000/2**20)
+    play_episodes(manager, tmp_path, 3)
+    assert manager.metrics['kept_bytes'] == 6000
+    assert manager.metrics['deleted_bytes'] == 0
+    assert manager.metrics['quota_exceeded'] == 0
+    assert len(manager.kept) == 0
+    assert capsys.readouterr().out.count('can not be enforced') == 1
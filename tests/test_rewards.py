@@ -0,0 +1,171 @@
+"""The compiled reward functions return the same rewards of the list-based reward functions that they
+replace (see `tools.rewards`), step by step and with `series`.
+"""
+from itertools import product
+from math import exp
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from eprllib.tools import rewards
+
+def legacy_dalamagkidis_2007(EnvObject, infos):
+    """List-based `dalamagkidis_2007` before the compiled reward functions. The CO2 term of that version
+    called `-0.06(co2-co2_ref)` over a float and raised a TypeError, here it sums the sigmoid of each
+    timestep of the list, like the compiled version.
+    """
+    config = EnvObject.env_config['reward_function_config']
+    comfort_reward = config.get('comfort_reward', True)
+    energy_reward = config.get('energy_reward', True)
+    co2_reward = config.get('co2_reward', True)
+    if not hasattr(EnvObject, 'ppd_list') and comfort_reward:
+        EnvObject.ppd_list = []
+    if not hasattr(EnvObject, 'energy_list') and energy_reward:
+        EnvObject.energy_list = []
+    if not hasattr(EnvObject, 'co2_list') and co2_reward:
+        EnvObject.co2_list = []
+    cut_reward_len_timesteps = config.get('cut_reward_len_timesteps', 1)
+    w1 = config.get('w1', 0.80)
+    w2 = config.get('w2', 0.01)
+    w3 = config.get('w3', 0.20)
+    agent_infos = infos[EnvObject.env_config['agent_ids'][0]]
+    if comfort_reward:
+        ppd = agent_infos[config['ppd_name']]
+        T_interior = agent_infos[config['T_interior_name']]
+        if agent_infos[config['occupancy_name']] == 0:
+            ppd = 0
+        EnvObject.ppd_list.append(ppd)
+    if energy_reward:
+        EnvObject.energy_list.append(agent_infos[config['cooling_name']] + agent_infos[config['heating_name']])
+    if co2_reward:
+        co2 = agent_infos[config['co2_name']]
+        if agent_infos[config['occupancy_name']] == 0:
+            co2 = 0
+        EnvObject.co2_list.append(co2)
+    if EnvObject.timestep % cut_reward_len_timesteps != 0:
+        return 0
+    rew1 = rew2 = rew3 = 0
+    if comfort_reward:
+        rew1 = -w1*(sum(EnvObject.ppd_list)/cut_reward_len_timesteps/100)
+        if T_interior > 29.4:
+            rew1 += -10
+        elif T_interior < 16.7:
+            rew1 += -10
+        EnvObject.ppd_list = []
+    if energy_reward:
+        rew2 = -w2*(sum(EnvObject.energy_list)/cut_reward_len_timesteps/config['energy_ref'])
+        EnvObject.energy_list = []
+    if co2_reward:
+        rew3 = -w3*(sum(1/(1+exp(-0.06*(co2-config['co2_ref']))) for co2 in EnvObject.co2_list)/cut_reward_len_timesteps)
+        EnvObject.co2_list = []
+    return rew1 + rew2 + rew3
+
+def legacy_normalize_reward_function(EnvObject, infos):
+    """List-based `normalize_reward_function` before the compiled reward functions."""
+    config = EnvObject.env_config['reward_function_config']
+    comfort_reward = config.get('comfort_reward', True)
+    energy_reward = config.get('energy_reward', True)
+    if not hasattr(EnvObject, 'ppd_list') and comfort_reward:
+        EnvObject.ppd_list = []
+    if not hasattr(EnvObject, 'energy_list') and energy_reward:
+        EnvObject.energy_list = []
+    cut_reward_len_timesteps = config.get('cut_reward_len_timesteps', 1)
+    beta_reward = config.get('beta_reward', 0.5)
+    agent_infos = infos[EnvObject.env_config['agent_ids'][0]]
+    if comfort_reward:
+        T_interior = agent_infos[config['T_interior_name']]
+        if agent_infos[config['occupancy_name']] > 0:
+            if agent_infos['ppd'] < 5:
+                ppd = agent_infos['ppd'] = 5
+            else:
+                ppd = agent_infos['ppd']
+        else:
+            ppd = 0
+        if T_interior > 29.4:
+            ppd = 100
+        elif T_interior < 16.7:
+            ppd = 100
+        EnvObject.ppd_list.append(ppd)
+    if energy_reward:
+        EnvObject.energy_list.append(
+            agent_infos[config['cooling_name']]/config['cooling_energy_ref']
+            + agent_infos[config['heating_name']]/config['heating_energy_ref']
+        )
+    if EnvObject.timestep % cut_reward_len_timesteps != 0:
+        return 0
+    rew1 = rew2 = 0
+    if comfort_reward:
+        ppd_avg = sum(EnvObject.ppd_list)/len(EnvObject.ppd_list)
+        rew1 = -(1-beta_reward)*(1/(1+np.exp(-0.1*(ppd_avg-45))))
+        EnvObject.ppd_list = []
+    if energy_reward:
+        rew2 = -beta_reward*(sum(EnvObject.energy_list)/len(EnvObject.energy_list))
+        EnvObject.energy_list = []
+    return rew1 + rew2
+
+REWARD_FUNCTIONS = [
+    (legacy_dalamagkidis_2007, rewards.dalamagkidis_2007, rewards.Dalamagkidis2007),
+    (legacy_normalize_reward_function, rewards.normalize_reward_function, rewards.NormalizeRewardFunction),
+]
+
+def make_env_config(cut_reward_len_timesteps, comfort_reward, energy_reward, co2_reward):
+    return {
+        'agent_ids': ['agent_1'],
+        'reward_function_config': {
+            'cut_reward_len_timesteps': cut_reward_len_timesteps,
+            'comfort_reward': comfort_reward,
+            'energy_reward': energy_reward,
+            'co2_reward': co2_reward,
+            'energy_ref': 1e5,
+            'co2_ref': 870,
+            'cooling_energy_ref': 1e5,
+            'heating_energy_ref': 2e5,
+            'occupancy_name': 'occupancy',
+            'ppd_name': 'ppd',
+            'T_interior_name': 'Ti',
+            'cooling_name': 'cooling',
+            'heating_name': 'heating',
+            'co2_name': 'co2',
+        },
+    }
+
+def make_columns(length):
+    """Infos of an episode with empty hours, temperatures out of the comfort band, PPD under 5% and
+    CO2 concentrations around the reference.
+    """
+    rng = np.random.default_rng(0)
+    return {
+        'occupancy': rng.integers(0, 3, length).astype(np.float64),
+        'ppd': rng.uniform(0, 60, length),
+        'Ti': rng.uniform(15, 31, length),
+        'cooling': rng.uniform(0, 1e5, length),
+        'heating': rng.uniform(0, 2e5, length),
+        'co2': rng.uniform(400, 1500, length),
+    }
+
+@pytest.mark.parametrize('legacy_function,reward_function,reward_class', REWARD_FUNCTIONS)
+@pytest.mark.parametrize('cut_reward_len_timesteps', [1, 6, 144])
+@pytest.mark.parametrize('comfort_reward,energy_reward,co2_reward', list(product([True, False], repeat=3)))
+def test_compiled_rewards_match_legacy(
+    legacy_function, reward_function, reward_class, cut_reward_len_timesteps, comfort_reward, energy_reward, co2_reward
+    ):
+    env_config = make_env_config(cut_reward_len_timesteps, comfort_reward, energy_reward, co2_reward)
+    # Two days and an incomplete window at the end.
+    length = 2*144 + 7
+    columns = make_columns(length)
+    legacy_env = SimpleNamespace(env_config=env_config, episode=0, timestep=0)
+    env = SimpleNamespace(env_config=env_config, episode=0, timestep=0)
+    compiled = reward_class()
+    compiled.configure(env_config)
+    expected, wrapped, steps = [], [], []
+    for t in range(length):
+        # The environment calls the reward function after it advances the timestep.
+        legacy_env.timestep = env.timestep = t + 1
+        row = {name: float(column[t]) for name, column in columns.items()}
+        expected.append(legacy_function(legacy_env, {'agent_1': dict(row)}))
+        wrapped.append(reward_function(env, {'agent_1': dict(row)}))
+        steps.append(compiled(env, {'agent_1': dict(row)}))
+    assert wrapped == pytest.approx(expected, rel=1e-12, abs=1e-12)
+    assert steps == pytest.approx(expected, rel=1e-12, abs=1e-12)
+    assert compiled.series(columns) == pytest.approx(np.array(steps), rel=1e-12, abs=1e-12)